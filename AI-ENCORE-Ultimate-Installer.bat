@@ -520,11 +520,9 @@ echo ^) else ^(
 echo     echo    ℹ️ No log files yet
 echo ^)
 echo echo.
-echo echo ⚠️ NOTA: Per acquisizione dati completa, copia i file Python:
-echo echo    - data_pipeline\fetch_options_data.py
-echo echo    - data_pipeline\fetch_futures_volume.py  
-echo echo    - analytics_engine\structural_levels.py
-echo echo    - analytics_engine\price_mapper.py
+echo echo ⚠️ NOTA: Per acquisizione dati completa, copia per intero le directory:
+echo echo    - data_pipeline\     ^(tutti i .py: run_pipeline.py importa i moduli condivisi^)
+echo echo    - analytics_engine\  ^(tutti i .py: structural_levels.py importa gamma_exposure e option_chain_*^)
 echo echo    dalla directory del progetto AI-ENCORE
 echo echo.
 echo echo [%%DATE%% %%TIME%%] Test acquisizione completato
@@ -639,16 +637,34 @@ echo    • Sostituisci "your_broker_server" con il server del tuo broker
 echo    • Salva il file
 echo.
 echo 3. 📁 COPIA FILE PROGETTO AI-ENCORE:
-echo    Dal tuo progetto locale, copia questi file Python:
+echo    Dal tuo progetto locale copia per intero le directory data_pipeline\ e
+echo    analytics_engine\: i moduli si importano a vicenda, copiare solo gli
+echo    script principali non basta. Devono esserci almeno:
 echo.
 echo    In %INSTALL_DIR%\data_pipeline\:
+echo    • run_pipeline.py
 echo    • fetch_options_data.py
 echo    • fetch_futures_volume.py
+echo    • reprocess_bulletins.py
+echo    • exchange_calendar.py
+echo    • lake_io.py
+echo    • http_client.py
+echo    • http_cache.py
+echo    • pipeline_metrics.py
+echo    • pipeline_logging.py
+echo    • bulletin_store.py
+echo    • option_records.py
+echo    • settlement_parser.py
+echo    • bar_sources.py
 echo.  
 echo    In %INSTALL_DIR%\analytics_engine\:
 echo    • structural_levels.py
+echo    • gamma_exposure.py
+echo    • option_chain_analytics.py
+echo    • option_chain_store.py
 echo    • price_mapper.py
 echo    • cli_interface.py
+echo    • lake_watcher.py
 echo.
 echo    In %INSTALL_DIR%\backend\analysis\:
 echo    • structural-analyzer.ts
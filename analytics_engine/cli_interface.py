@@ -18,15 +18,18 @@ from structural_levels import (
     calculate_option_levels, 
     calculate_volume_profile,
     get_combined_structural_levels,
-    identify_confluence_zones
+    identify_confluence_zones,
+    CALENDAR_AVAILABLE,
+    INSTRUMENT_CONFIG
 )
 from price_mapper import PriceMapper
 
-# Configurazione logging per CLI
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+if CALENDAR_AVAILABLE:
+    from exchange_calendar import previous_trading_day
+
+from pipeline_logging import setup_logging
+
+# Configurazione logging per CLI (handler installati in main, su stderr)
 logger = logging.getLogger(__name__)
 
 def setup_cli_parser() -> argparse.ArgumentParser:
@@ -40,10 +43,12 @@ def setup_cli_parser() -> argparse.ArgumentParser:
     
     # Comando: structural-levels
     levels_parser = subparsers.add_parser('structural-levels', help='Calcola livelli strutturali')
-    levels_parser.add_argument('--date', type=str, help='Data in formato YYYY-MM-DD (default: ieri)')
+    levels_parser.add_argument('--date', type=str, help='Data in formato YYYY-MM-DD (default: sessione precedente)')
     levels_parser.add_argument('--instruments', type=str, default='ES,NQ', help='Strumenti separati da virgola (default: ES,NQ)')
     levels_parser.add_argument('--output-format', choices=['json', 'pretty'], default='json', help='Formato output')
     levels_parser.add_argument('--include-confluences', action='store_true', help='Includi zone di confluenza')
+    levels_parser.add_argument('--rank-by', choices=['open_interest', 'oi_change'], default='open_interest',
+                               help='Ordina i livelli opzioni per OI assoluto o per variazione giornaliera di OI')
     
     # Comando: basis
     basis_parser = subparsers.add_parser('basis', help='Calcola basis futures-CFD')
@@ -64,16 +69,26 @@ def setup_cli_parser() -> argparse.ArgumentParser:
     
     return parser
 
-def parse_date(date_str: str = None) -> datetime:
-    """Parsa una data string o restituisce ieri se None"""
+def parse_date(date_str: str = None, instruments: List[str] = None) -> datetime:
+    """
+    Parsa una data string o restituisce la sessione precedente se None
+
+    Con più categorie di sessione la data di default è la più recente: gli
+    strumenti chiusi in quella data ripiegano sulla propria sessione precedente
+    (resolve_trading_date), così una sessione festiva di FX e metalli non va persa.
+    """
     if date_str:
         try:
             return datetime.strptime(date_str, '%Y-%m-%d')
         except ValueError:
-            logger.error(f"Formato data non valido: {date_str}. Usa YYYY-MM-DD")
+            logger.error("Formato data non valido: %s. Usa YYYY-MM-DD", date_str)
             sys.exit(1)
     else:
-        # Default: ieri
+        # Default: sessione di trading precedente
+        if CALENDAR_AVAILABLE:
+            categories = {INSTRUMENT_CONFIG.get(instrument, {}).get('category', 'equity_index')
+                          for instrument in instruments or []} or {'equity_index'}
+            return max(previous_trading_day(datetime.now(), category) for category in categories)
         yesterday = datetime.now() - timedelta(days=1)
         return yesterday
 
@@ -109,19 +124,20 @@ def format_pretty_output(data: Any) -> str:
 
 def command_structural_levels(args) -> Dict[str, Any]:
     """Esegue comando per calcolare livelli strutturali"""
-    date = parse_date(args.date)
     instruments = [inst.strip() for inst in args.instruments.split(',')]
+    date = parse_date(args.date, instruments)
     
-    logger.info(f"Calcolo livelli strutturali per {instruments} del {date.strftime('%Y-%m-%d')}")
+    logger.info("Calcolo livelli strutturali per %s del %s", instruments, date.strftime('%Y-%m-%d'))
     
     try:
         # Calcola livelli strutturali combinati
-        structural_levels = get_combined_structural_levels(date, instruments)
+        structural_levels = get_combined_structural_levels(date, instruments, args.rank_by)
         
         result = {
             'success': True,
             'date': date.strftime('%Y-%m-%d'),
             'instruments': instruments,
+            'rank_by': args.rank_by,
             'data': structural_levels
         }
         
@@ -131,11 +147,11 @@ def command_structural_levels(args) -> Dict[str, Any]:
             confluences = identify_confluence_zones(structural_levels)
             result['confluences'] = confluences
         
-        logger.info(f"✅ Livelli calcolati per {len(structural_levels)} strumenti")
+        logger.info("✅ Livelli calcolati per %s strumenti", len(structural_levels))
         return result
         
     except Exception as e:
-        logger.error(f"❌ Errore calcolo livelli strutturali: {e}")
+        logger.error("❌ Errore calcolo livelli strutturali: %s", e)
         return {
             'success': False,
             'error': str(e),
@@ -147,7 +163,7 @@ def command_basis(args) -> Dict[str, Any]:
     """Esegue comando per calcolare basis"""
     instrument = args.instrument.upper()
     
-    logger.info(f"Calcolo basis per {instrument}")
+    logger.info("Calcolo basis per %s", instrument)
     
     try:
         mapper = PriceMapper()
@@ -206,7 +222,7 @@ def command_basis(args) -> Dict[str, Any]:
             }
     
     except Exception as e:
-        logger.error(f"❌ Errore comando basis: {e}")
+        logger.error("❌ Errore comando basis: %s", e)
         return {
             'success': False,
             'instrument': instrument,
@@ -217,10 +233,10 @@ def command_confluence(args) -> Dict[str, Any]:
     """Esegue analisi di confluenza per un prezzo specifico"""
     price = args.price
     instrument = args.instrument.upper()
-    date = parse_date(args.date)
+    date = parse_date(args.date, [instrument])
     tolerance = args.tolerance
     
-    logger.info(f"Analisi confluenza per {instrument} @ {price} (tolleranza: ±{tolerance})")
+    logger.info("Analisi confluenza per %s @ %s (tolleranza: ±%s)", instrument, price, tolerance)
     
     try:
         # Ottieni livelli strutturali
@@ -307,7 +323,7 @@ def command_confluence(args) -> Dict[str, Any]:
         }
         
     except Exception as e:
-        logger.error(f"❌ Errore analisi confluenza: {e}")
+        logger.error("❌ Errore analisi confluenza: %s", e)
         return {
             'success': False,
             'error': str(e),
@@ -414,7 +430,7 @@ def command_test(args) -> Dict[str, Any]:
         'success_rate': f"{successful_tests/total_tests*100:.1f}%" if total_tests > 0 else "0%"
     }
     
-    logger.info(f"📊 Test completati: {successful_tests}/{total_tests} successi")
+    logger.info("📊 Test completati: %s/%s successi", successful_tests, total_tests)
     
     return results
 
@@ -423,6 +439,9 @@ def main():
     parser = setup_cli_parser()
     args = parser.parse_args()
     
+    # stdout è riservato all'output JSON letto dal sistema TypeScript
+    setup_logging(log_file=None, stream=sys.stderr)
+    
     if not args.command:
         parser.print_help()
         sys.exit(1)
@@ -438,7 +457,7 @@ def main():
         elif args.command == 'test':
             result = command_test(args)
         else:
-            logger.error(f"Comando non riconosciuto: {args.command}")
+            logger.error("Comando non riconosciuto: %s", args.command)
             sys.exit(1)
         
         # Output risultato
@@ -453,7 +472,7 @@ def main():
         logger.info("🛑 Comando interrotto dall'utente")
         sys.exit(130)
     except Exception as e:
-        logger.error(f"❌ Errore imprevisto: {e}")
+        logger.error("❌ Errore imprevisto: %s", e)
         print(json.dumps({
             'success': False,
             'error': f'Errore imprevisto: {str(e)}',
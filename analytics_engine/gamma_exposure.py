@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Gamma exposure (GEX) dei dealer sulle catene di opzioni sui futures.
+La gamma di Black-76 viene calcolata con un'unica operazione numpy su tutte
+le righe della catena (tutti gli strike, underlying e date) e aggregata per
+strike; il livello di "zero gamma" è il prezzo a cui la GEX totale cambia segno.
+
+Convenzione: i dealer sono lunghi le call e corti le put dei clienti, quindi
+la GEX delle call è positiva e quella delle put negativa. La GEX è espressa in
+dollari per una variazione dell'1% del sottostante:
+    GEX = gamma * OI * point_value * F^2 * 0.01
+
+Funzionalità principali:
+- Kernel vettoriale della gamma di Black-76 (nessuna dipendenza da scipy)
+- Volatilità implicita dalla colonna 'iv' della catena o da un valore configurato
+- Tempo alla scadenza dalla colonna 'dte': i contratti con scadenza ignota sono esclusi
+- GEX netta per strike di ogni (date, underlying)
+- Livello di zero gamma con ricalcolo della GEX su una griglia di prezzi
+"""
+
+import logging
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_IMPLIED_VOLATILITY = 0.18
+RISK_FREE_RATE = 0.045
+
+# Giorni minimi alla scadenza: le 0DTE hanno ancora parte della sessione davanti
+# (solo per dte = 0 noto: senza scadenza il contratto non entra nella GEX)
+MIN_DAYS_TO_EXPIRY = 0.25
+
+# Griglia di prezzi per la ricerca dello zero gamma (± frazione dello spot)
+ZERO_GAMMA_RANGE = 0.10
+ZERO_GAMMA_POINTS = 161
+
+# Oltre questa distanza (in deviazioni standard log) la gamma di uno strike è trascurabile
+GAMMA_CUTOFF_SIGMAS = 8.0
+
+_SQRT_2PI = np.sqrt(2.0 * np.pi)
+
+def black76_gamma(forward: np.ndarray, strike: np.ndarray, volatility: np.ndarray,
+                  years: np.ndarray, rate: float = RISK_FREE_RATE) -> np.ndarray:
+    """
+    Gamma di Black-76 (uguale per call e put), con broadcasting numpy
+
+    Args:
+        forward: Prezzo del future
+        strike: Strike
+        volatility: Volatilità implicita annua
+        years: Tempo alla scadenza in anni
+        rate: Tasso privo di rischio
+
+    Returns:
+        Array della gamma per unità di sottostante
+    """
+    sigma_sqrt_t = volatility * np.sqrt(years)
+    d1 = (np.log(forward / strike) + 0.5 * sigma_sqrt_t ** 2) / sigma_sqrt_t
+    return np.exp(-rate * years) * np.exp(-0.5 * d1 ** 2) / (_SQRT_2PI * forward * sigma_sqrt_t)
+
+def _group_columns(chain: pd.DataFrame) -> List[str]:
+    return [column for column in ('date', 'underlying') if column in chain.columns]
+
+def _per_underlying(values: Union[float, Dict[str, float], None], underlyings: pd.Series,
+                    default: float) -> np.ndarray:
+    """Valore per riga da uno scalare o da un dizionario underlying -> valore"""
+    if values is None:
+        return np.full(len(underlyings), default, dtype=np.float64)
+    if isinstance(values, dict):
+        return underlyings.astype(str).map(values).fillna(default).to_numpy(dtype=np.float64)
+    return np.full(len(underlyings), float(values), dtype=np.float64)
+
+def prepare_chain(chain: pd.DataFrame, spots: pd.DataFrame,
+                  implied_volatility: Union[float, Dict[str, float], None] = None,
+                  point_values: Union[float, Dict[str, float], None] = None) -> pd.DataFrame:
+    """
+    Arricchisce la catena con spot, volatilità, tempo alla scadenza e segno dealer
+
+    Args:
+        chain: Catena con underlying, strike, type, open_interest, dte (ed eventualmente date, iv)
+        spots: DataFrame con le colonne di gruppo della catena e 'spot'
+        implied_volatility: Volatilità di default (scalare o per underlying) dove 'iv' manca
+        point_values: Moltiplicatore del contratto (scalare o per underlying)
+
+    Returns:
+        Catena con colonne spot, sigma, years, sign, multiplier (righe senza spot
+        o senza dte escluse: una scadenza ignota non viene prezzata come 0DTE)
+    """
+    if 'dte' not in chain.columns:
+        chain = chain.assign(dte=np.nan)
+    keys = _group_columns(chain)
+    prepared = chain.merge(spots[keys + ['spot']], on=keys, how='inner') if keys else chain.assign(
+        spot=float(spots['spot'].iloc[0]))
+    days = pd.to_numeric(prepared['dte'], errors='coerce')
+    prepared = prepared[(prepared['open_interest'] > 0) & (prepared['strike'] > 0) & (prepared['spot'] > 0)
+                        & days.notna()]
+    prepared = prepared.reset_index(drop=True)
+
+    underlyings = prepared['underlying'] if 'underlying' in prepared.columns else pd.Series([''] * len(prepared))
+    sigma = _per_underlying(implied_volatility, underlyings, DEFAULT_IMPLIED_VOLATILITY)
+    if 'iv' in prepared.columns:
+        stored = prepared['iv'].to_numpy(dtype=np.float64)
+        sigma = np.where(np.isfinite(stored) & (stored > 0), stored, sigma)
+
+    days = pd.to_numeric(prepared['dte']).to_numpy(dtype=np.float64)
+    prepared['sigma'] = sigma
+    prepared['years'] = np.maximum(days, MIN_DAYS_TO_EXPIRY) / 365.0
+    prepared['sign'] = np.where(prepared['type'].astype(str).to_numpy() == 'PUT', -1.0, 1.0)
+    prepared['multiplier'] = _per_underlying(point_values, underlyings, 1.0)
+    return prepared
+
+def gex_by_strike(prepared: pd.DataFrame, rate: float = RISK_FREE_RATE) -> pd.DataFrame:
+    """
+    GEX netta per strike allo spot corrente, calcolata in un solo passaggio su tutte le righe
+
+    Args:
+        prepared: Catena preparata con prepare_chain
+        rate: Tasso privo di rischio
+
+    Returns:
+        DataFrame (gruppo, strike, call_gex, put_gex, net_gex) ordinato per gruppo e strike
+    """
+    keys = _group_columns(prepared)
+
+    spot = prepared['spot'].to_numpy(dtype=np.float64)
+    gamma = black76_gamma(spot, prepared['strike'].to_numpy(dtype=np.float64),
+                          prepared['sigma'].to_numpy(), prepared['years'].to_numpy(), rate)
+    exposure = (gamma * prepared['open_interest'].to_numpy(dtype=np.float64)
+                * prepared['multiplier'].to_numpy() * spot ** 2 * 0.01)
+
+    sign = prepared['sign'].to_numpy()
+    frame = prepared[keys + ['strike']].assign(
+        call_gex=np.where(sign > 0, exposure, 0.0),
+        put_gex=np.where(sign < 0, -exposure, 0.0)
+    )
+    profile = frame.groupby(keys + ['strike'], observed=True)[['call_gex', 'put_gex']].sum().reset_index()
+    profile['net_gex'] = profile['call_gex'] + profile['put_gex']
+    return profile
+
+def _zero_crossing(prices: np.ndarray, totals: np.ndarray, spot: float) -> Optional[float]:
+    """Prezzo (interpolato) del cambio di segno più vicino allo spot"""
+    signs = np.sign(totals)
+    crossings = np.nonzero(signs[:-1] * signs[1:] < 0)[0]
+    if len(crossings) == 0:
+        return None
+
+    left = prices[crossings]
+    right = prices[crossings + 1]
+    weight = totals[crossings] / (totals[crossings] - totals[crossings + 1])
+    levels = left + weight * (right - left)
+    return float(levels[np.argmin(np.abs(levels - spot))])
+
+def zero_gamma_levels(prepared: pd.DataFrame, rate: float = RISK_FREE_RATE,
+                      price_range: float = ZERO_GAMMA_RANGE, points: int = ZERO_GAMMA_POINTS) -> pd.DataFrame:
+    """
+    GEX totale allo spot e livello di zero gamma di ogni (date, underlying)
+
+    Per ogni gruppo la GEX totale viene ricalcolata su una griglia di prezzi
+    attorno allo spot (broadcast griglia x strike) e lo zero gamma è il punto
+    in cui cambia segno. Gli strike lontani dalla griglia, con gamma
+    trascurabile, vengono esclusi.
+
+    Args:
+        prepared: Catena preparata con prepare_chain
+        rate: Tasso privo di rischio
+        price_range: Ampiezza della griglia come frazione dello spot
+        points: Numero di prezzi della griglia
+
+    Returns:
+        DataFrame (gruppo, spot, total_gex, zero_gamma); zero_gamma è NaN se la
+        GEX non cambia segno nella griglia
+    """
+    keys = _group_columns(prepared)
+    grid = np.linspace(1.0 - price_range, 1.0 + price_range, points)
+
+    rows = []
+    groups = prepared.groupby(keys, observed=True, sort=True) if keys else [((), prepared)]
+    for key, group in groups:
+        spot = float(group['spot'].iloc[0])
+        prices = spot * grid
+
+        sigma_sqrt_t = group['sigma'].to_numpy() * np.sqrt(group['years'].to_numpy())
+        log_strikes = np.log(group['strike'].to_numpy(dtype=np.float64))
+
+        # Strike a più di GAMMA_CUTOFF_SIGMAS deviazioni da tutta la griglia: gamma trascurabile
+        relevant = ((log_strikes >= np.log(prices[0]) - GAMMA_CUTOFF_SIGMAS * sigma_sqrt_t)
+                    & (log_strikes <= np.log(prices[-1]) + GAMMA_CUTOFF_SIGMAS * sigma_sqrt_t))
+        sigma_sqrt_t = sigma_sqrt_t[relevant]
+        log_strikes = log_strikes[relevant]
+
+        # Termini per contratto che non dipendono dal prezzo: la GEX totale sulla
+        # griglia diventa un prodotto matrice-vettore
+        weights = (group['sign'].to_numpy()[relevant] * group['open_interest'].to_numpy(dtype=np.float64)[relevant]
+                   * group['multiplier'].to_numpy()[relevant]
+                   * np.exp(-rate * group['years'].to_numpy()[relevant]) / (_SQRT_2PI * sigma_sqrt_t))
+        d1 = (np.log(prices)[:, None] - log_strikes[None, :]) / sigma_sqrt_t[None, :] + 0.5 * sigma_sqrt_t[None, :]
+        # gamma * F^2 * 0.01 = densità / (F sigma sqrt(T)) * F^2 * 0.01
+        totals = np.exp(-0.5 * d1 ** 2) @ weights * prices * 0.01
+
+        key = key if isinstance(key, tuple) else (key,)
+        zero_gamma = _zero_crossing(prices, totals, spot)
+        rows.append(dict(zip(keys, key), spot=spot, total_gex=float(np.interp(spot, prices, totals)),
+                         zero_gamma=np.nan if zero_gamma is None else zero_gamma))
+
+    return pd.DataFrame(rows, columns=keys + ['spot', 'total_gex', 'zero_gamma'])
+
+def compute_gamma_exposure(chain: pd.DataFrame, spots: pd.DataFrame,
+                           implied_volatility: Union[float, Dict[str, float], None] = None,
+                           point_values: Union[float, Dict[str, float], None] = None,
+                           rate: float = RISK_FREE_RATE) -> Dict[str, pd.DataFrame]:
+    """
+    GEX per strike e zero gamma di una o più catene
+
+    Args:
+        chain: Catena con underlying, strike, type, open_interest, dte (ed eventualmente date, iv)
+        spots: DataFrame con le colonne di gruppo della catena e 'spot'
+        implied_volatility: Volatilità di default (scalare o per underlying)
+        point_values: Moltiplicatore del contratto (scalare o per underlying)
+        rate: Tasso privo di rischio
+
+    Returns:
+        {'by_strike': GEX per strike, 'summary': spot, GEX totale e zero gamma per gruppo}
+    """
+    prepared = prepare_chain(chain, spots, implied_volatility, point_values)
+    if prepared.empty:
+        keys = _group_columns(chain)
+        return {
+            'by_strike': pd.DataFrame(columns=keys + ['strike', 'call_gex', 'put_gex', 'net_gex']),
+            'summary': pd.DataFrame(columns=keys + ['spot', 'total_gex', 'zero_gamma'])
+        }
+
+    return {
+        'by_strike': gex_by_strike(prepared, rate),
+        'summary': zero_gamma_levels(prepared, rate)
+    }
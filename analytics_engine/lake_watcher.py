@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""
+Daemon che ricalcola i livelli strutturali quando la data lake cambia.
+Il watcher osserva la directory della data lake (inotify su Linux, polling
+altrove) e, quando arriva un file di opzioni o di barre futures, ricalcola
+solo le parti interessate dei livelli di quella data e ripubblica il file
+YYYY-MM-DD_structural_levels.json.
+
+Funzionalità principali:
+- inotify via ctypes (IN_CLOSE_WRITE/IN_MOVED_TO, quindi anche i rename atomici di lake_io)
+  con fallback automatico al polling di mtime e dimensione
+- Debounce degli eventi: file arrivati insieme producono un solo ricalcolo per data
+- Ricalcolo incrementale: barre futures -> volume profile e GEX del solo strumento;
+  catena di opzioni -> livelli opzioni di tutti gli strumenti, volume profile riusati
+- Catena di opzioni in cache finché il file giornaliero non cambia
+- Latenza tra scrittura del file e pubblicazione dei livelli nei log
+"""
+
+import argparse
+import ctypes
+import logging
+import os
+import re
+import select
+import struct
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import pandas as pd
+
+from structural_levels import (DATA_LAKE_DIR, INSTRUMENT_CONFIG, OPTION_RANKING_METRICS, StructuralLevelsCalculator,
+                               calculate_option_levels, calculate_volume_profile, get_combined_structural_levels,
+                               identify_confluence_zones, publish_structural_levels)
+from pipeline_logging import setup_logging
+
+logger = logging.getLogger(__name__)
+
+# Backend del watcher: 'auto' (inotify se disponibile), 'inotify' o 'polling'
+WATCHER_BACKEND = os.environ.get('LAKE_WATCHER_BACKEND', 'auto').lower()
+
+# Attesa senza nuovi eventi prima di ricalcolare (file che arrivano insieme)
+WATCHER_DEBOUNCE_SECONDS = float(os.environ.get('LAKE_WATCHER_DEBOUNCE', 1.0))
+WATCHER_POLL_INTERVAL = float(os.environ.get('LAKE_WATCHER_POLL_INTERVAL', 2.0))
+
+# Attesa massima di un giro del loop (reattività allo stop)
+WATCHER_WAIT_TIMEOUT = 1.0
+
+# Date di cui tenere in memoria i livelli per gli aggiornamenti incrementali
+MAX_CACHED_DATES = 5
+
+OPTIONS_FILE_PATTERN = re.compile(r'^(\d{4}-\d{2}-\d{2})_cme_options\.csv$')
+FUTURES_FILE_PATTERN = re.compile(r'^(\d{4}-\d{2}-\d{2})_([A-Z0-9]+)_intraday(?:_\d+m)?\.csv$')
+
+# inotify (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+INOTIFY_BUFFER_SIZE = 64 * 1024
+
+_INOTIFY_EVENT = struct.Struct('iIII')  # wd, mask, cookie, len (+ nome)
+
+def _file_signature(path: str) -> Optional[Tuple[int, int]]:
+    """(mtime, dimensione) di un file, None se assente"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+class PollingWatcher:
+    """Rileva file nuovi o modificati confrontando mtime e dimensione a intervalli"""
+
+    def __init__(self, directory: str, name_filter: Callable[[str], bool], interval: float = WATCHER_POLL_INTERVAL):
+        self.directory = directory
+        self.name_filter = name_filter
+        self.interval = interval
+        self._snapshot = self._scan()
+        self._next_scan = time.monotonic() + interval
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if self.name_filter(entry.name) and entry.is_file():
+                        stat = entry.stat()
+                        snapshot[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            pass
+        return snapshot
+
+    def wait(self, timeout: float) -> Set[str]:
+        """Attende al massimo timeout secondi e restituisce i file cambiati"""
+        delay = self._next_scan - time.monotonic()
+        if delay > timeout:
+            time.sleep(timeout)
+            return set()
+        time.sleep(max(0.0, delay))
+        self._next_scan = time.monotonic() + self.interval
+
+        current = self._scan()
+        changed = {name for name, signature in current.items() if self._snapshot.get(name) != signature}
+        self._snapshot = current
+        return changed
+
+    def close(self):
+        pass
+
+class InotifyWatcher:
+    """Eventi di scrittura completata e rename nella directory tramite inotify (Linux, via ctypes)"""
+
+    def __init__(self, directory: str, name_filter: Callable[[str], bool]):
+        libc = ctypes.CDLL(None, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError("inotify non disponibile in questa libc")
+
+        self.directory = directory
+        self.name_filter = name_filter
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 non riuscita")
+
+        watch = libc.inotify_add_watch(self._fd, os.fsencode(directory), IN_CLOSE_WRITE | IN_MOVED_TO)
+        if watch < 0:
+            error = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(error, f"inotify_add_watch non riuscita su {directory}")
+
+        self._last_wait = time.time()
+
+    def _recent_files(self, since: float) -> Set[str]:
+        """Dopo un overflow della coda: file modificati dall'ultimo giro"""
+        with os.scandir(self.directory) as entries:
+            return {entry.name for entry in entries
+                    if self.name_filter(entry.name) and entry.is_file() and entry.stat().st_mtime >= since}
+
+    def wait(self, timeout: float) -> Set[str]:
+        """Attende al massimo timeout secondi e restituisce i file scritti o rinominati"""
+        since = self._last_wait - 1.0
+        self._last_wait = time.time()
+
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        names = set()
+        overflow = False
+        while True:
+            try:
+                buffer = os.read(self._fd, INOTIFY_BUFFER_SIZE)
+            except BlockingIOError:
+                break
+
+            offset = 0
+            while offset < len(buffer):
+                _, mask, _, length = _INOTIFY_EVENT.unpack_from(buffer, offset)
+                offset += _INOTIFY_EVENT.size
+                name = os.fsdecode(buffer[offset:offset + length].rstrip(b'\0'))
+                offset += length
+
+                if mask & IN_Q_OVERFLOW:
+                    overflow = True
+                elif mask & IN_IGNORED:
+                    raise OSError(f"Directory osservata rimossa: {self.directory}")
+                elif name and self.name_filter(name):
+                    names.add(name)
+
+        if overflow:
+            logger.warning("⚠️ Coda inotify piena, rilettura della directory")
+            names |= self._recent_files(since)
+        return names
+
+    def close(self):
+        os.close(self._fd)
+
+def create_watcher(directory: str, name_filter: Callable[[str], bool], backend: str = WATCHER_BACKEND,
+                   poll_interval: float = WATCHER_POLL_INTERVAL):
+    """
+    Watcher della directory con il backend richiesto
+
+    Args:
+        directory: Directory da osservare
+        name_filter: Nomi file da riportare
+        backend: 'auto', 'inotify' o 'polling'
+        poll_interval: Intervallo del polling in secondi
+
+    Returns:
+        InotifyWatcher o PollingWatcher
+    """
+    if backend in ('auto', 'inotify') and sys.platform.startswith('linux'):
+        try:
+            watcher = InotifyWatcher(directory, name_filter)
+            logger.info("👀 Watcher inotify su %s", directory)
+            return watcher
+        except (OSError, AttributeError) as e:
+            if backend == 'inotify':
+                raise
+            logger.warning("⚠️ inotify non disponibile (%s), uso il polling", e)
+    elif backend == 'inotify':
+        raise OSError("inotify è disponibile solo su Linux")
+
+    logger.info("👀 Watcher a polling su %s (ogni %ss)", directory, poll_interval)
+    return PollingWatcher(directory, name_filter, poll_interval)
+
+class CachingLevelsCalculator(StructuralLevelsCalculator):
+    """Calculator che riusa la catena di opzioni di una data finché il file giornaliero non cambia"""
+
+    def __init__(self, data_lake_dir: str = DATA_LAKE_DIR):
+        super().__init__(data_lake_dir)
+        self._options_cache: Dict[str, Tuple[Tuple[int, int], pd.DataFrame]] = {}
+
+    def load_options_data(self, date: datetime) -> pd.DataFrame:
+        date = self.resolve_trading_date(date)
+        path = self._find_data_file(date, '_cme_options.csv')
+        signature = _file_signature(path) if path else None
+        date_str = date.strftime('%Y-%m-%d')
+
+        cached = self._options_cache.get(date_str)
+        if cached is not None and signature is not None and cached[0] == signature:
+            return cached[1].copy()
+
+        df = super().load_options_data(date)
+        if not df.empty and signature is not None:
+            self._options_cache[date_str] = (signature, df)
+            while len(self._options_cache) > MAX_CACHED_DATES:
+                self._options_cache.pop(next(iter(self._options_cache)))
+        return df.copy()
+
+class StructuralLevelsWatcher:
+    """Daemon di ricalcolo incrementale dei livelli strutturali sugli eventi della data lake"""
+
+    def __init__(self, data_lake_dir: str = DATA_LAKE_DIR, instruments: Optional[List[str]] = None,
+                 rank_by: str = 'open_interest', backend: str = WATCHER_BACKEND,
+                 debounce: float = WATCHER_DEBOUNCE_SECONDS, poll_interval: float = WATCHER_POLL_INTERVAL):
+        if rank_by not in OPTION_RANKING_METRICS:
+            raise ValueError(f"rank_by non valido: {rank_by} (ammessi: {', '.join(OPTION_RANKING_METRICS)})")
+
+        self.data_lake_dir = data_lake_dir
+        self.instruments = instruments or list(INSTRUMENT_CONFIG)
+        self.rank_by = rank_by
+        self.backend = backend
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.calculator = CachingLevelsCalculator(data_lake_dir)
+
+        # Data -> {'levels': ..., 'confluences': ...} dell'ultima pubblicazione
+        self._published: 'OrderedDict[str, Dict]' = OrderedDict()
+        self.stats = {'events': 0, 'batches': 0, 'full_recomputes': 0, 'incremental_recomputes': 0}
+
+    def classify(self, filename: str) -> Optional[Tuple[str, Optional[str]]]:
+        """
+        Data e strumento interessati da un file della data lake
+
+        Args:
+            filename: Nome del file
+
+        Returns:
+            (data, strumento) per le barre futures, (data, None) per la catena di opzioni,
+            None per i file che non incidono sui livelli
+        """
+        match = OPTIONS_FILE_PATTERN.match(filename)
+        if match:
+            return match.group(1), None
+        match = FUTURES_FILE_PATTERN.match(filename)
+        if match and match.group(2) in self.instruments:
+            return match.group(1), match.group(2)
+        return None
+
+    def _remember(self, date_str: str, levels: Dict[str, Dict], confluences: Dict[str, List[Dict]]):
+        self._published[date_str] = {'levels': levels, 'confluences': confluences}
+        self._published.move_to_end(date_str)
+        while len(self._published) > MAX_CACHED_DATES:
+            self._published.popitem(last=False)
+
+    def refresh(self, date_str: str, futures_changed: Set[str], options_changed: bool) -> Optional[str]:
+        """
+        Ricalcola e pubblica i livelli di una data dopo l'arrivo di nuovi file
+
+        Args:
+            date_str: Trade date dei file (YYYY-MM-DD)
+            futures_changed: Strumenti con nuove barre intraday
+            options_changed: La catena di opzioni della data è cambiata
+
+        Returns:
+            Path del file pubblicato o None se non ci sono livelli
+        """
+        date = datetime.strptime(date_str, '%Y-%m-%d')
+
+        if options_changed and self.rank_by == 'oi_change':
+            self.calculator.option_chain_store.ingest(refresh_dates=[date])
+
+        published = self._published.get(date_str)
+        if published is None:
+            # Prima pubblicazione della data in questo processo: calcolo completo
+            levels = get_combined_structural_levels(date, self.instruments, self.rank_by, self.calculator)
+            if not levels:
+                return None
+            confluences = identify_confluence_zones(levels)
+            self.stats['full_recomputes'] += 1
+        else:
+            levels = published['levels']
+            confluences = dict(published['confluences'])
+
+            for instrument in futures_changed:
+                levels[instrument]['volume_profile'] = calculate_volume_profile(date, instrument, self.calculator)
+
+            # Con la catena cambiata tutti gli strumenti, altrimenti solo quelli con nuove barre (spot della GEX)
+            affected = sorted(self.instruments if options_changed else futures_changed)
+            spots = {instrument: levels[instrument]['volume_profile'].get('last_price') for instrument in affected}
+            option_levels = calculate_option_levels(date, self.calculator, self.rank_by, spots, affected)
+
+            now = datetime.now().isoformat()
+            for instrument in affected:
+                levels[instrument]['option_levels'] = option_levels.get(instrument, {})
+                levels[instrument]['calculation_timestamp'] = now
+
+            confluences.update(identify_confluence_zones({instrument: levels[instrument] for instrument in affected}))
+            self.stats['incremental_recomputes'] += 1
+
+        self._remember(date_str, levels, confluences)
+        return publish_structural_levels(date, levels, confluences, self.data_lake_dir)
+
+    def _process(self, pending: Dict[str, Dict]):
+        """Ricalcola le date di un gruppo di eventi"""
+        for date_str, changes in sorted(pending.items()):
+            try:
+                path = self.refresh(date_str, changes['futures'], changes['options'])
+            except Exception as e:
+                logger.error("❌ Errore ricalcolo livelli %s: %s", date_str, e)
+                continue
+
+            if path:
+                latency = time.time() - changes['written_at']
+                sources = sorted(changes['futures']) + (['options'] if changes['options'] else [])
+                logger.info("⚡ Livelli %s aggiornati (%s) %.1fs dopo l'ingestion",
+                            date_str, ', '.join(sources), latency)
+
+    def run(self, max_batches: Optional[int] = None, stop_event: Optional[threading.Event] = None) -> int:
+        """
+        Osserva la data lake e ricalcola i livelli ad ogni gruppo di file nuovi
+
+        Args:
+            max_batches: Numero massimo di gruppi di eventi da elaborare (None = infinito)
+            stop_event: Evento che termina il loop (opzionale)
+
+        Returns:
+            Exit code (0 = terminato regolarmente)
+        """
+        os.makedirs(self.data_lake_dir, exist_ok=True)
+        watcher = create_watcher(self.data_lake_dir, lambda name: self.classify(name) is not None,
+                                 self.backend, self.poll_interval)
+        logger.info("🔁 Watcher livelli strutturali avviato (%s, ordinamento %s, debounce %ss)",
+                    ', '.join(self.instruments), self.rank_by, self.debounce)
+
+        pending: Dict[str, Dict] = {}
+        last_event = 0.0
+
+        try:
+            while not (stop_event is not None and stop_event.is_set()):
+                timeout = WATCHER_WAIT_TIMEOUT
+                if pending:
+                    timeout = max(0.0, min(timeout, last_event + self.debounce - time.monotonic()))
+
+                for name in watcher.wait(timeout):
+                    target = self.classify(name)
+                    if target is None:
+                        continue
+                    date_str, instrument = target
+                    changes = pending.setdefault(date_str, {'futures': set(), 'options': False, 'written_at': time.time()})
+                    if instrument is None:
+                        changes['options'] = True
+                    else:
+                        changes['futures'].add(instrument)
+                    signature = _file_signature(os.path.join(self.data_lake_dir, name))
+                    if signature is not None:
+                        changes['written_at'] = min(changes['written_at'], signature[0] / 1e9)
+                    self.stats['events'] += 1
+                    last_event = time.monotonic()
+
+                if pending and time.monotonic() - last_event >= self.debounce:
+                    batch, pending = pending, {}
+                    self._process(batch)
+                    self.stats['batches'] += 1
+                    if max_batches is not None and self.stats['batches'] >= max_batches:
+                        break
+
+        except KeyboardInterrupt:
+            logger.info("🛑 Watcher livelli strutturali interrotto dall'utente")
+        finally:
+            watcher.close()
+
+        logger.info("📊 Watcher: %s eventi, %s calcoli completi, %s incrementali",
+                    self.stats['events'], self.stats['full_recomputes'], self.stats['incremental_recomputes'])
+        return 0
+
+def parse_args():
+    """Parsing degli argomenti da linea di comando"""
+    parser = argparse.ArgumentParser(description='Ricalcolo dei livelli strutturali sugli aggiornamenti della data lake')
+    parser.add_argument('--instruments', nargs='+', choices=list(INSTRUMENT_CONFIG), help='Strumenti (default: tutti)')
+    parser.add_argument('--rank-by', choices=list(OPTION_RANKING_METRICS), default='open_interest',
+                        help='Ordinamento dei livelli opzioni')
+    parser.add_argument('--backend', choices=['auto', 'inotify', 'polling'], default=WATCHER_BACKEND,
+                        help='Meccanismo di osservazione della data lake')
+    parser.add_argument('--debounce', type=float, default=WATCHER_DEBOUNCE_SECONDS,
+                        help='Secondi senza nuovi eventi prima del ricalcolo')
+    parser.add_argument('--poll-interval', type=float, default=WATCHER_POLL_INTERVAL,
+                        help='Secondi tra due scansioni del backend a polling')
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    setup_logging()
+    watcher = StructuralLevelsWatcher(instruments=args.instruments, rank_by=args.rank_by, backend=args.backend,
+                                      debounce=args.debounce, poll_interval=args.poll_interval)
+    sys.exit(watcher.run())
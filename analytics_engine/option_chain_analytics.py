@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Analisi vettoriali della catena di opzioni: max pain, muri di open interest
+e put/call ratio per strike. Tutti i calcoli lavorano su più underlying e
+più date contemporaneamente (gruppi per 'date' e 'underlying').
+
+Funzionalità principali:
+- Profilo per strike con OI call/put, curve cumulative e put/call ratio
+- Max pain in O(n log n): ordinamento degli strike e somme prefisse
+- Call wall / put wall (strike con OI massimo) e put/call ratio complessivo
+"""
+
+import logging
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+PROFILE_COLUMNS = ['strike', 'call_oi', 'put_oi', 'cum_call_oi', 'cum_put_oi', 'put_call_ratio', 'pain']
+
+def _group_columns(chain: pd.DataFrame) -> List[str]:
+    """Colonne di raggruppamento presenti nella catena"""
+    return [column for column in ('date', 'underlying') if column in chain.columns]
+
+def strike_profile(chain: pd.DataFrame) -> pd.DataFrame:
+    """
+    Profilo di open interest per strike di ogni (date, underlying)
+
+    Il "pain" a uno strike K è il valore intrinseco totale che i detentori di
+    opzioni incasserebbero con il sottostante a K alla scadenza:
+        call: somma su Ki < K di C_i * (K - Ki) = K * sum(C_i) - sum(C_i * Ki)
+        put:  somma su Ki > K di P_i * (Ki - K) = sum(P_i * Ki) - K * sum(P_i)
+    Le somme su Ki < K e Ki > K sono somme prefisse (o suffisse) sugli strike
+    ordinati, quindi il costo è dominato dall'ordinamento.
+
+    Args:
+        chain: Catena con colonne underlying, strike, type ('CALL'/'PUT'),
+            open_interest ed eventualmente date
+
+    Returns:
+        DataFrame ordinato per gruppo e strike con le colonne di gruppo e PROFILE_COLUMNS;
+        cum_call_oi è cumulato dagli strike bassi, cum_put_oi dagli strike alti
+    """
+    keys = _group_columns(chain)
+
+    if chain.empty:
+        return pd.DataFrame(columns=keys + PROFILE_COLUMNS)
+
+    by_type = (chain.groupby(keys + ['strike', 'type'], observed=True)['open_interest'].sum()
+               .unstack('type', fill_value=0)
+               .reindex(columns=['CALL', 'PUT'], fill_value=0))
+    profile = by_type.rename(columns={'CALL': 'call_oi', 'PUT': 'put_oi'}).reset_index()
+    profile.columns.name = None
+
+    strikes = profile['strike'].to_numpy(dtype=np.float64)
+    profile['call_oi'] = profile['call_oi'].astype(np.float64)
+    profile['put_oi'] = profile['put_oi'].astype(np.float64)
+    profile['call_value'] = profile['call_oi'] * strikes
+    profile['put_value'] = profile['put_oi'] * strikes
+
+    sums = ['call_oi', 'put_oi', 'call_value', 'put_value']
+    if keys:
+        grouped = profile.groupby(keys, observed=True, sort=False)[sums]
+        cumulative = grouped.cumsum()
+        totals = grouped.transform('sum')
+    else:
+        cumulative = profile[sums].cumsum()
+        totals = pd.DataFrame({column: np.full(len(profile), profile[column].sum()) for column in sums})
+
+    cum_call = cumulative['call_oi'].to_numpy()
+    cum_put = cumulative['put_oi'].to_numpy()
+
+    # Il termine dello strike stesso vale zero, quindi le somme inclusive vanno bene
+    call_pain = strikes * cum_call - cumulative['call_value'].to_numpy()
+    put_pain = ((totals['put_value'].to_numpy() - cumulative['put_value'].to_numpy())
+                - strikes * (totals['put_oi'].to_numpy() - cum_put))
+
+    call_oi = profile['call_oi'].to_numpy()
+    put_oi = profile['put_oi'].to_numpy()
+
+    profile['cum_call_oi'] = cum_call
+    profile['cum_put_oi'] = totals['put_oi'].to_numpy() - cum_put + put_oi
+    with np.errstate(divide='ignore', invalid='ignore'):
+        profile['put_call_ratio'] = np.where(call_oi > 0, put_oi / call_oi, np.nan)
+    profile['pain'] = call_pain + put_pain
+
+    return profile[keys + PROFILE_COLUMNS]
+
+def summarize_chain(chain: pd.DataFrame, profile: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Max pain, call/put wall e put/call ratio di ogni (date, underlying)
+
+    Args:
+        chain: Catena di opzioni (vedi strike_profile)
+        profile: Profilo già calcolato con strike_profile (opzionale)
+
+    Returns:
+        DataFrame per gruppo con max_pain, call_wall, put_wall, call_wall_oi,
+        put_wall_oi, total_call_oi, total_put_oi, put_call_ratio
+    """
+    profile = strike_profile(chain) if profile is None else profile
+    keys = _group_columns(profile)
+
+    columns = ['max_pain', 'call_wall', 'put_wall', 'call_wall_oi', 'put_wall_oi',
+               'total_call_oi', 'total_put_oi', 'put_call_ratio']
+    if profile.empty:
+        return pd.DataFrame(columns=keys + columns)
+
+    profile = profile.reset_index(drop=True)
+    grouped = profile.groupby(keys, observed=True, sort=False) if keys else profile.groupby(np.zeros(len(profile)))
+
+    # idxmin/idxmax: prima occorrenza, cioè lo strike più basso in caso di parità
+    pain_index = grouped['pain'].idxmin()
+    call_index = grouped['call_oi'].idxmax()
+    put_index = grouped['put_oi'].idxmax()
+    totals = grouped[['call_oi', 'put_oi']].sum()
+
+    strikes = profile['strike']
+    summary = pd.DataFrame({
+        'max_pain': strikes.loc[pain_index.to_numpy()].to_numpy(),
+        'call_wall': strikes.loc[call_index.to_numpy()].to_numpy(),
+        'put_wall': strikes.loc[put_index.to_numpy()].to_numpy(),
+        'call_wall_oi': profile['call_oi'].loc[call_index.to_numpy()].to_numpy(),
+        'put_wall_oi': profile['put_oi'].loc[put_index.to_numpy()].to_numpy(),
+        'total_call_oi': totals['call_oi'].to_numpy(),
+        'total_put_oi': totals['put_oi'].to_numpy()
+    }, index=pain_index.index)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        summary['put_call_ratio'] = np.where(summary['total_call_oi'] > 0,
+                                             summary['total_put_oi'] / summary['total_call_oi'], np.nan)
+
+    if keys:
+        return summary.reset_index()
+    return summary.reset_index(drop=True)
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Archivio consolidato multi-giorno delle catene di opzioni CME.
+I file giornalieri YYYY-MM-DD_cme_options.csv della data lake vengono unificati
+in un'unica tabella indicizzata per (date, underlying, expiry, strike, type),
+con le variazioni giornaliere di open interest e volume calcolate all'ingest.
+
+Le variazioni sono disponibili per contratto (stessa scadenza) e per strike
+(somma su tutte le scadenze): quando il simbolo del contratto non codifica
+la scadenza (dte vuoto nei file giornalieri) ogni contratto vive una sola
+sessione e l'indicatore utile è quello per strike.
+
+Funzionalità principali:
+- Ingest incrementale dei file giornalieri non ancora consolidati
+- Variazioni OI/volume rispetto alla sessione precedente della stessa serie (vettoriali)
+- Vista per strike (tutte le scadenze) con le stesse variazioni giornaliere
+- Accumulo delle variazioni su una finestra di date per strike ("dove è cresciuto l'OI")
+- Persistenza in Parquet (se pyarrow è installato) o CSV compresso, con scrittura
+  atomica e ingest di processi concorrenti serializzati da un lock advisory
+"""
+
+import glob
+import logging
+import os
+import re
+import sys
+from contextlib import nullcontext
+from datetime import datetime
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401 - motore Parquet di pandas
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Scritture atomiche e lock della data lake (modulo della data pipeline)
+DATA_PIPELINE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data_pipeline'))
+if DATA_PIPELINE_DIR not in sys.path:
+    sys.path.append(DATA_PIPELINE_DIR)
+
+from lake_io import atomic_write, lake_lock
+
+DATA_LAKE_DIR = os.path.join(os.path.dirname(__file__), '..', 'data_lake')
+
+STORE_BASENAME = 'option_chain_store'
+
+# Chiave di una riga dell'archivio e identità di una serie (contratto) nel tempo
+INDEX_COLUMNS = ['date', 'underlying', 'expiry', 'strike', 'type']
+SERIES_COLUMNS = ['underlying', 'expiry', 'strike', 'type']
+STRIKE_SERIES_COLUMNS = ['underlying', 'strike', 'type']
+
+VALUE_COLUMNS = ['volume', 'open_interest']
+DELTA_COLUMNS = ['oi_change', 'volume_change']
+
+# Colonna di valore -> colonna della variazione giornaliera
+DELTA_OF = {'open_interest': 'oi_change', 'volume': 'volume_change'}
+
+OPTIONS_FILE_PATTERN = re.compile(r'^(\d{4}-\d{2}-\d{2})_cme_options\.csv$')
+
+def compute_deltas(chain: pd.DataFrame, series_columns: List[str] = SERIES_COLUMNS) -> pd.DataFrame:
+    """
+    Variazioni giornaliere di open interest e volume per serie
+
+    La variazione è calcolata rispetto all'ultima data precedente in cui la
+    stessa serie è presente; una serie nuova ha come variazione l'intero valore.
+
+    Args:
+        chain: Catena con colonne 'date', series_columns e VALUE_COLUMNS
+        series_columns: Colonne che identificano una serie nel tempo
+
+    Returns:
+        Catena ordinata per serie e data con le colonne DELTA_COLUMNS
+    """
+    chain = chain.sort_values(series_columns + ['date'], kind='mergesort').reset_index(drop=True)
+
+    if chain.empty:
+        for column in DELTA_COLUMNS:
+            chain[column] = pd.Series(dtype=np.int64)
+        return chain
+
+    # Inizio di una nuova serie: una qualsiasi colonna della serie cambia rispetto alla riga precedente
+    new_series = np.zeros(len(chain), dtype=bool)
+    new_series[0] = True
+    for column in series_columns:
+        values = chain[column].to_numpy()
+        new_series[1:] |= values[1:] != values[:-1]
+
+    for value_column, delta_column in DELTA_OF.items():
+        values = chain[value_column].to_numpy(dtype=np.int64)
+        previous = np.concatenate(([0], values[:-1]))
+        chain[delta_column] = np.where(new_series, values, values - previous)
+
+    return chain
+
+class OptionChainStore:
+    """Catene di opzioni consolidate di tutte le date della data lake"""
+
+    def __init__(self, data_lake_dir: str = DATA_LAKE_DIR):
+        self.data_lake_dir = data_lake_dir
+        extension = 'parquet' if PYARROW_AVAILABLE else 'csv.gz'
+        self.store_path = os.path.join(data_lake_dir, f"{STORE_BASENAME}.{extension}")
+        self._chain: Optional[pd.DataFrame] = None
+        self._strike_chain: Optional[pd.DataFrame] = None
+        self._loaded_signature: Optional[tuple] = None
+
+    @property
+    def chain(self) -> pd.DataFrame:
+        """Tabella consolidata (caricata dal disco al primo accesso)"""
+        if self._chain is None:
+            self._chain = self._load()
+        return self._chain
+
+    @property
+    def strike_chain(self) -> pd.DataFrame:
+        """
+        Vista per (date, underlying, strike, type) con volume e OI sommati su
+        tutte le scadenze e variazioni rispetto alla sessione precedente
+        """
+        if self._strike_chain is None:
+            chain = self.chain
+            keys = ['date'] + STRIKE_SERIES_COLUMNS
+            strikes = chain.groupby(keys, observed=True)[VALUE_COLUMNS].sum().reset_index()
+            strikes = compute_deltas(strikes, STRIKE_SERIES_COLUMNS)
+            self._strike_chain = strikes.sort_values(keys, kind='mergesort').reset_index(drop=True)
+        return self._strike_chain
+
+    def _empty(self) -> pd.DataFrame:
+        return pd.DataFrame({
+            'date': pd.Series(dtype='datetime64[ns]'),
+            'underlying': pd.Series(dtype='category'),
+            'expiry': pd.Series(dtype='datetime64[ns]'),
+            'strike': pd.Series(dtype=np.float64),
+            'type': pd.Series(dtype='category'),
+            'option_symbol': pd.Series(dtype=object),
+            'volume': pd.Series(dtype=np.int64),
+            'open_interest': pd.Series(dtype=np.int64),
+            'oi_change': pd.Series(dtype=np.int64),
+            'volume_change': pd.Series(dtype=np.int64)
+        })
+
+    def _store_signature(self) -> Optional[tuple]:
+        """(mtime, dimensione) del file dell'archivio, None se assente"""
+        try:
+            stat = os.stat(self.store_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self) -> pd.DataFrame:
+        self._loaded_signature = self._store_signature()
+        if self._loaded_signature is None:
+            return self._empty()
+
+        try:
+            if PYARROW_AVAILABLE:
+                chain = pd.read_parquet(self.store_path)
+            else:
+                chain = pd.read_csv(self.store_path, parse_dates=['date', 'expiry'])
+            for column in ('underlying', 'type'):
+                chain[column] = chain[column].astype('category')
+            return chain
+        except Exception as e:
+            logger.error("❌ Archivio catene opzioni illeggibile, verrà ricostruito: %s", e)
+            return self._empty()
+
+    def _save(self):
+        with atomic_write(self.store_path, 'wb') as f:
+            if PYARROW_AVAILABLE:
+                self._chain.to_parquet(f, index=False)
+            else:
+                self._chain.to_csv(f, index=False, compression='gzip')
+        self._loaded_signature = self._store_signature()
+
+    def dates(self) -> List[datetime]:
+        """Date presenti nell'archivio in ordine crescente"""
+        return sorted(pd.to_datetime(self.chain['date'].unique()).to_pydatetime())
+
+    def _pending_files(self) -> List[tuple]:
+        """File giornalieri della data lake non ancora consolidati: [(data, path)]"""
+        ingested = {date.strftime('%Y-%m-%d') for date in self.dates()}
+        pending = []
+        for path in sorted(glob.glob(os.path.join(self.data_lake_dir, '*_cme_options.csv'))):
+            match = OPTIONS_FILE_PATTERN.match(os.path.basename(path))
+            if match and match.group(1) not in ingested:
+                pending.append((match.group(1), path))
+        return pending
+
+    def _read_daily_file(self, path: str) -> pd.DataFrame:
+        """Legge un file giornaliero e lo aggrega per chiave dell'archivio"""
+        df = pd.read_csv(path)
+        df['date'] = pd.to_datetime(df['date'])
+        dte = df['dte'].fillna(0) if 'dte' in df.columns else 0
+        df['expiry'] = df['date'] + pd.to_timedelta(dte, unit='D')
+        if 'option_symbol' not in df.columns:
+            df['option_symbol'] = df['underlying']
+
+        # Più simboli (es. settimanali e 0DTE) sulla stessa chiave vengono sommati
+        return df.groupby(INDEX_COLUMNS, sort=False, observed=True).agg(
+            option_symbol=('option_symbol', 'first'),
+            volume=('volume', 'sum'),
+            open_interest=('open_interest', 'sum')
+        ).reset_index()
+
+    def ingest(self, save: bool = True, refresh_dates: Optional[List[datetime]] = None) -> int:
+        """
+        Aggiunge all'archivio i file giornalieri non ancora consolidati e
+        ricalcola le variazioni giornaliere
+
+        Args:
+            save: Salva l'archivio aggiornato su disco
+            refresh_dates: Date già consolidate da rileggere dai file giornalieri
+                (es. dopo una rielaborazione dei bulletin)
+
+        Returns:
+            Numero di date aggiunte
+        """
+        # Un processo alla volta aggiorna l'archivio, partendo dall'ultima versione su disco
+        with lake_lock(self.store_path) if save else nullcontext():
+            if save and self._chain is not None and self._store_signature() != self._loaded_signature:
+                self._chain = None
+                self._strike_chain = None
+
+            if refresh_dates:
+                refresh = pd.to_datetime([date.strftime('%Y-%m-%d') for date in refresh_dates])
+                self._chain = self.chain[~self.chain['date'].isin(refresh)].reset_index(drop=True)
+                self._strike_chain = None
+
+            pending = self._pending_files()
+            if not pending:
+                return 0
+
+            frames = []
+            for date_str, path in pending:
+                try:
+                    frames.append(self._read_daily_file(path))
+                except Exception as e:
+                    logger.error("❌ Errore ingest %s: %s", os.path.basename(path), e)
+
+            if not frames:
+                return 0
+
+            existing = self.chain.drop(columns=DELTA_COLUMNS)
+            chain = pd.concat([existing.astype({'underlying': str, 'type': str})] +
+                              [frame.astype({'underlying': str, 'type': str}) for frame in frames],
+                              ignore_index=True)
+            chain[VALUE_COLUMNS] = chain[VALUE_COLUMNS].fillna(0).astype(np.int64)
+
+            chain = compute_deltas(chain)
+            for column in ('underlying', 'type'):
+                chain[column] = chain[column].astype('category')
+            self._chain = chain.sort_values(INDEX_COLUMNS, kind='mergesort').reset_index(drop=True)
+            self._strike_chain = None
+
+            if save:
+                self._save()
+
+            logger.info("📚 Archivio catene opzioni: %s date aggiunte, %s righe totali", len(frames), len(self._chain))
+            return len(frames)
+
+    def chain_for(self, date: datetime, underlying: Optional[str] = None, by_strike: bool = False) -> pd.DataFrame:
+        """
+        Righe di una data (con variazioni giornaliere)
+
+        Args:
+            date: Data della catena
+            underlying: Filtra per strumento (opzionale)
+            by_strike: Vista per strike (tutte le scadenze) invece che per contratto
+
+        Returns:
+            DataFrame della catena della data
+        """
+        chain = self.strike_chain if by_strike else self.chain
+        mask = chain['date'] == pd.Timestamp(date.date())
+        if underlying is not None:
+            mask &= chain['underlying'] == underlying
+        return chain[mask].reset_index(drop=True)
+
+    def window_changes(self, start: datetime, end: datetime, underlying: Optional[str] = None) -> pd.DataFrame:
+        """
+        Variazioni di OI e volume accumulate per strike su una finestra di date
+
+        Args:
+            start: Prima data della finestra (inclusa)
+            end: Ultima data della finestra (inclusa)
+            underlying: Filtra per strumento (opzionale)
+
+        Returns:
+            DataFrame (underlying, strike, type, oi_change, volume_change, open_interest)
+            ordinato per oi_change decrescente; open_interest è quello dell'ultima data
+        """
+        chain = self.strike_chain
+        mask = (chain['date'] >= pd.Timestamp(start.date())) & (chain['date'] <= pd.Timestamp(end.date()))
+        if underlying is not None:
+            mask &= chain['underlying'] == underlying
+        window = chain[mask]
+
+        if window.empty:
+            return pd.DataFrame(columns=['underlying', 'strike', 'type'] + DELTA_COLUMNS + ['open_interest'])
+
+        keys = STRIKE_SERIES_COLUMNS
+        changes = window.groupby(keys, observed=True)[DELTA_COLUMNS].sum()
+        last_date = window['date'].max()
+        latest_oi = window[window['date'] == last_date].groupby(keys, observed=True)['open_interest'].sum()
+
+        result = changes.join(latest_oi, how='left').fillna({'open_interest': 0}).reset_index()
+        result['open_interest'] = result['open_interest'].astype(np.int64)
+        return result.sort_values('oi_change', ascending=False, kind='mergesort').reset_index(drop=True)
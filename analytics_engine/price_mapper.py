@@ -20,23 +20,34 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple, Union
 import json
 
+# Configurazione logging (handler configurati dall'entry point, vedi pipeline_logging)
+logger = logging.getLogger(__name__)
+
 # Importazioni con gestione errori per ambienti diversi
 try:
     import MetaTrader5 as mt5
     MT5_AVAILABLE = True
 except ImportError:
     MT5_AVAILABLE = False
-    logging.warning("⚠️ MetaTrader5 non disponibile - modalità simulazione attiva")
+    logger.warning("⚠️ MetaTrader5 non disponibile - modalità simulazione attiva")
 
 try:
     import requests
     REQUESTS_AVAILABLE = True
 except ImportError:
     REQUESTS_AVAILABLE = False
-    logging.error("❌ Requests non disponibile - funzionalità limitate")
+    logger.error("❌ Requests non disponibile - funzionalità limitate")
 
-# Configurazione logging
-logger = logging.getLogger(__name__)
+# Client HTTP condiviso della data pipeline (pool, retry, limiti per host)
+DATA_PIPELINE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data_pipeline'))
+if DATA_PIPELINE_DIR not in sys.path:
+    sys.path.append(DATA_PIPELINE_DIR)
+
+try:
+    from http_client import create_session
+    HTTP_CLIENT_AVAILABLE = True
+except ImportError:
+    HTTP_CLIENT_AVAILABLE = False
 
 # Configurazione API Finnhub (per prezzi futures)
 FINNHUB_API_KEY = os.environ.get('FINNHUB_API_KEY', 'demo')
@@ -166,11 +177,11 @@ class MT5PriceProvider:
                 return False
                 
             self.is_connected = True
-            logger.info(f"✅ MT5 connesso - Account: {account_info.login}")
+            logger.info("✅ MT5 connesso - Account: %s", account_info.login)
             return True
             
         except Exception as e:
-            logger.error(f"❌ Errore inizializzazione MT5: {e}")
+            logger.error("❌ Errore inizializzazione MT5: %s", e)
             return False
     
     def _ensure_connection(self) -> bool:
@@ -188,7 +199,7 @@ class MT5PriceProvider:
                 
         if not self.is_connected and self.connection_attempts < self.max_connection_attempts:
             self.connection_attempts += 1
-            logger.info(f"🔄 Tentativo riconnessione MT5 ({self.connection_attempts}/{self.max_connection_attempts})")
+            logger.info("🔄 Tentativo riconnessione MT5 (%s/%s)", self.connection_attempts, self.max_connection_attempts)
             return self._initialize_connection()
             
         return False
@@ -204,7 +215,7 @@ class MT5PriceProvider:
             Prezzo last o None se non disponibile
         """
         if not self._ensure_connection():
-            logger.debug(f"⚠️ MT5 non connesso per {symbol}")
+            logger.debug("⚠️ MT5 non connesso per %s", symbol)
             return None
             
         try:
@@ -214,7 +225,7 @@ class MT5PriceProvider:
             if tick is not None:
                 # Utilizza il prezzo mid (bid + ask) / 2 per maggiore accuratezza
                 mid_price = (tick.bid + tick.ask) / 2 if tick.bid > 0 and tick.ask > 0 else tick.last
-                logger.debug(f"✅ Prezzo {symbol}: {mid_price}")
+                logger.debug("✅ Prezzo %s: %s", symbol, mid_price)
                 return float(mid_price)
                 
             # Se il simbolo non funziona, prova varianti
@@ -224,11 +235,11 @@ class MT5PriceProvider:
                 tick = mt5.symbol_info_tick(alt_symbol)
                 if tick is not None:
                     mid_price = (tick.bid + tick.ask) / 2 if tick.bid > 0 and tick.ask > 0 else tick.last
-                    logger.debug(f"✅ Prezzo {alt_symbol} (alternativo per {symbol}): {mid_price}")
+                    logger.debug("✅ Prezzo %s (alternativo per %s): %s", alt_symbol, symbol, mid_price)
                     return float(mid_price)
                     
         except Exception as e:
-            logger.error(f"❌ Errore ottenimento prezzo CFD {symbol}: {e}")
+            logger.error("❌ Errore ottenimento prezzo CFD %s: %s", symbol, e)
             
         return None
     
@@ -267,13 +278,19 @@ class FinnhubPriceProvider:
     
     def __init__(self, api_key: str = FINNHUB_API_KEY):
         self.api_key = api_key
-        self.session = requests.Session() if REQUESTS_AVAILABLE else None
+        headers = {
+            'X-Finnhub-Token': api_key,
+            'User-Agent': 'PriceMapper/1.0'
+        }
         
-        if self.session:
-            self.session.headers.update({
-                'X-Finnhub-Token': api_key,
-                'User-Agent': 'PriceMapper/1.0'
-            })
+        # Prezzi real-time: sessione del client condiviso senza cache delle risposte
+        if HTTP_CLIENT_AVAILABLE:
+            self.session = create_session(headers, cache=False)
+        elif REQUESTS_AVAILABLE:
+            self.session = requests.Session()
+            self.session.headers.update(headers)
+        else:
+            self.session = None
         
         self.last_request_time = 0
         self.rate_limit_delay = 1.5  # secondi
@@ -300,7 +317,7 @@ class FinnhubPriceProvider:
             Prezzo corrente o None se non disponibile
         """
         if not REQUESTS_AVAILABLE or not self.session:
-            logger.debug(f"⚠️ Requests non disponibile per {symbol}")
+            logger.debug("⚠️ Requests non disponibile per %s", symbol)
             return None
             
         try:
@@ -318,13 +335,13 @@ class FinnhubPriceProvider:
                 # Verifica che i dati siano validi
                 if data and 'c' in data and data['c'] is not None and data['c'] > 0:
                     price = float(data['c'])  # Current price
-                    logger.debug(f"✅ Prezzo future {symbol}: {price}")
+                    logger.debug("✅ Prezzo future %s: %s", symbol, price)
                     return price
                     
-            logger.debug(f"⚠️ Dati price non validi per {symbol}: {response.status_code}")
+            logger.debug("⚠️ Dati price non validi per %s: %s", symbol, response.status_code)
                     
         except Exception as e:
-            logger.error(f"❌ Errore ottenimento prezzo future {symbol}: {e}")
+            logger.error("❌ Errore ottenimento prezzo future %s: %s", symbol, e)
             
         return None
     
@@ -366,7 +383,7 @@ class PriceMapper:
             Dizionario con basis e metadati o None se fallisce
         """
         if instrument not in INSTRUMENT_MAPPING:
-            logger.error(f"❌ Strumento {instrument} non configurato")
+            logger.error("❌ Strumento %s non configurato", instrument)
             return None
             
         # Controlla cache prima
@@ -374,7 +391,7 @@ class PriceMapper:
         cached_basis = self.cache.get(cache_key, BASIS_CACHE_DURATION)
         
         if cached_basis:
-            logger.debug(f"📋 Basis {instrument} da cache: {cached_basis['basis']}")
+            logger.debug("📋 Basis %s da cache: %s", instrument, cached_basis['basis'])
             return cached_basis
             
         config = INSTRUMENT_MAPPING[instrument]
@@ -386,7 +403,7 @@ class PriceMapper:
         future_price = self._get_best_future_price(config)
         
         if cfd_price is None or future_price is None:
-            logger.warning(f"⚠️ Impossibile calcolare basis per {instrument} - prezzi mancanti")
+            logger.warning("⚠️ Impossibile calcolare basis per %s - prezzi mancanti", instrument)
             return self._get_fallback_basis(instrument, config)
             
         # Calcola basis = prezzo_cfd - prezzo_future
@@ -395,7 +412,7 @@ class PriceMapper:
         # Verifica sanity check
         typical_range = config['typical_basis_range']
         if not (typical_range[0] <= basis <= typical_range[1]):
-            logger.warning(f"⚠️ Basis {instrument} fuori range tipico: {basis} (atteso: {typical_range})")
+            logger.warning("⚠️ Basis %s fuori range tipico: %s (atteso: %s)", instrument, basis, typical_range)
         
         result = {
             'instrument': instrument,
@@ -412,7 +429,7 @@ class PriceMapper:
         # Salva in cache
         self.cache.set(cache_key, result)
         
-        logger.info(f"✅ Basis {instrument}: {basis:.4f} (CFD: {cfd_price:.4f}, Future: {future_price:.4f})")
+        logger.info("✅ Basis %s: %.4f (CFD: %.4f, Future: %.4f)", instrument, basis, cfd_price, future_price)
         return result
     
     def _get_best_cfd_price(self, config: Dict) -> Optional[float]:
@@ -427,7 +444,7 @@ class PriceMapper:
         for alt_symbol in config.get('alternative_cfd_symbols', []):
             cfd_price = self.mt5_provider.get_cfd_price(alt_symbol)
             if cfd_price is not None:
-                logger.debug(f"✅ Usato simbolo CFD alternativo: {alt_symbol}")
+                logger.debug("✅ Usato simbolo CFD alternativo: %s", alt_symbol)
                 return cfd_price
                 
         return None
@@ -447,7 +464,7 @@ class PriceMapper:
         Returns:
             Basis stimato o None
         """
-        logger.warning(f"⚠️ Usando basis di fallback per {instrument}")
+        logger.warning("⚠️ Usando basis di fallback per %s", instrument)
         
         # Basis tipici basati su esperienza di mercato
         fallback_basis = {
@@ -492,7 +509,7 @@ class PriceMapper:
         basis_data = self.get_current_basis(instrument)
         
         if basis_data is None:
-            logger.error(f"❌ Impossibile mappare livelli per {instrument} - basis non disponibile")
+            logger.error("❌ Impossibile mappare livelli per %s - basis non disponibile", instrument)
             return []
             
         basis = basis_data['basis']
@@ -511,7 +528,7 @@ class PriceMapper:
                 'mapping_time': datetime.now().isoformat()
             })
         
-        logger.info(f"✅ Mappati {len(mapped_levels)} livelli {instrument} con basis {basis:.4f}")
+        logger.info("✅ Mappati %s livelli %s con basis %.4f", len(mapped_levels), instrument, basis)
         return mapped_levels
     
     def get_multiple_basis(self, instruments: List[str]) -> Dict[str, Optional[Dict]]:
@@ -530,7 +547,7 @@ class PriceMapper:
             try:
                 results[instrument] = self.get_current_basis(instrument)
             except Exception as e:
-                logger.error(f"❌ Errore calcolo basis per {instrument}: {e}")
+                logger.error("❌ Errore calcolo basis per %s: %s", instrument, e)
                 results[instrument] = None
                 
         return results
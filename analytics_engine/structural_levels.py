@@ -4,7 +4,9 @@ Modulo per il calcolo dei livelli di prezzo strutturali basati sui dati delle op
 Trasforma i dati grezzi raccolti dalla data pipeline in insight azionabili per il sistema di trading.
 
 Funzionalità principali:
-- Calcolo livelli chiave da Open Interest delle opzioni
+- Calcolo livelli chiave da Open Interest delle opzioni (assoluto o variazione giornaliera)
+- Max pain, call/put wall e put/call ratio della catena di opzioni
+- Gamma exposure (GEX) dei dealer per strike e livello di zero gamma
 - Calcolo Value Area e Point of Control dai volumi intraday
 - Identificazione livelli di supporto/resistenza strutturale
 - Algoritmi per determinare la rilevanza dei livelli
@@ -13,6 +15,7 @@ Funzionalità principali:
 import pandas as pd
 import numpy as np
 import os
+import sys
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple, Union
@@ -27,10 +30,38 @@ logger = logging.getLogger(__name__)
 # Directory dove si trovano i dati grezzi
 DATA_LAKE_DIR = os.path.join(os.path.dirname(__file__), '..', 'data_lake')
 
+# File pubblicato con livelli e confluenze di una data (YYYY-MM-DD_structural_levels.json)
+STRUCTURAL_LEVELS_SUFFIX = '_structural_levels.json'
+
+# Moduli condivisi della data pipeline (calendario di borsa)
+DATA_PIPELINE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data_pipeline'))
+if DATA_PIPELINE_DIR not in sys.path:
+    sys.path.append(DATA_PIPELINE_DIR)
+
+try:
+    from exchange_calendar import is_trading_day, previous_trading_day
+    CALENDAR_AVAILABLE = True
+except ImportError:
+    CALENDAR_AVAILABLE = False
+    logger.warning("⚠️ Calendario di borsa non disponibile - festività non considerate")
+
+from lake_io import lake_lock, write_json_atomic
+from gamma_exposure import compute_gamma_exposure
+from option_chain_analytics import summarize_chain
+from option_chain_store import OptionChainStore
+
 # Configurazioni per il calcolo dei livelli
 VALUE_AREA_PERCENTAGE = 0.70  # 70% dei volumi per calcolare la Value Area
 MIN_VOLUME_THRESHOLD = 100    # Volume minimo per considerare un livello significativo
 MIN_OPEN_INTEREST_THRESHOLD = 500  # Open Interest minimo per livelli opzioni
+MIN_OI_CHANGE_THRESHOLD = 250  # Incremento minimo di Open Interest per livelli ordinati per variazione
+GEX_LEVEL_COUNT = 5  # Strike con maggiore |GEX netta| riportati come livelli
+
+# Criteri di ordinamento dei livelli opzioni: colonna -> soglia minima
+OPTION_RANKING_METRICS = {
+    'open_interest': MIN_OPEN_INTEREST_THRESHOLD,
+    'oi_change': MIN_OI_CHANGE_THRESHOLD
+}
 
 # Configurazioni specifiche per strumento
 INSTRUMENT_CONFIG = {
@@ -39,14 +70,18 @@ INSTRUMENT_CONFIG = {
         'tick_size': 0.25,
         'point_value': 50.0,
         'min_level_distance': 5.0,  # Distanza minima tra livelli in punti
-        'volume_profile_bins': 50   # Numero di bin per il volume profile
+        'volume_profile_bins': 50,  # Numero di bin per il volume profile
+        'category': 'equity_index',  # Template di sessione del calendario CME
+        'implied_volatility': 0.16  # Volatilità per la GEX se la catena non ha IV
     },
     'NQ': {
         'name': 'E-mini Nasdaq 100',
         'tick_size': 0.25,
         'point_value': 20.0,
         'min_level_distance': 10.0,
-        'volume_profile_bins': 50
+        'volume_profile_bins': 50,
+        'category': 'equity_index',
+        'implied_volatility': 0.20
     }
 }
 
@@ -55,10 +90,29 @@ class StructuralLevelsCalculator:
     
     def __init__(self, data_lake_dir: str = DATA_LAKE_DIR):
         self.data_lake_dir = data_lake_dir
+        self._option_chain_store = None
         
         if not os.path.exists(data_lake_dir):
-            logger.warning(f"⚠️ Directory data lake non trovata: {data_lake_dir}")
+            logger.warning("⚠️ Directory data lake non trovata: %s", data_lake_dir)
             
+    def resolve_trading_date(self, date: datetime, category: str = 'equity_index') -> datetime:
+        """
+        Riporta una data di chiusura del mercato all'ultima sessione di trading
+        
+        Args:
+            date: Data richiesta
+            category: Categoria di sessione dello strumento
+            
+        Returns:
+            La data stessa se è una trade date, altrimenti la sessione precedente
+        """
+        if not CALENDAR_AVAILABLE or is_trading_day(date, category):
+            return date
+        
+        resolved = previous_trading_day(date, category)
+        logger.info("📅 %s non è una trade date, uso %s", date.strftime('%Y-%m-%d'), resolved.strftime('%Y-%m-%d'))
+        return resolved
+    
     def _find_data_file(self, date: datetime, pattern: str) -> Optional[str]:
         """
         Trova il file di dati per una data specifica
@@ -81,7 +135,7 @@ class StructuralLevelsCalculator:
         if os.path.exists(self.data_lake_dir):
             for filename in os.listdir(self.data_lake_dir):
                 if date_str in filename and pattern.replace('.csv', '') in filename:
-                    logger.info(f"🔍 Trovato file alternativo: {filename}")
+                    logger.info("🔍 Trovato file alternativo: %s", filename)
                     return os.path.join(self.data_lake_dir, filename)
         
         return None
@@ -96,20 +150,56 @@ class StructuralLevelsCalculator:
         Returns:
             DataFrame con i dati delle opzioni o DataFrame vuoto
         """
+        date = self.resolve_trading_date(date)
         file_path = self._find_data_file(date, '_cme_options.csv')
         
         if not file_path:
-            logger.warning(f"⚠️ File opzioni non trovato per {date.strftime('%Y-%m-%d')}")
+            logger.warning("⚠️ File opzioni non trovato per %s", date.strftime('%Y-%m-%d'))
             return pd.DataFrame()
         
         try:
             df = pd.read_csv(file_path)
-            logger.info(f"📊 Caricati {len(df)} record di opzioni da {os.path.basename(file_path)}")
+            logger.info("📊 Caricati %s record di opzioni da %s", len(df), os.path.basename(file_path))
             return df
             
         except Exception as e:
-            logger.error(f"❌ Errore caricamento file opzioni {file_path}: {e}")
+            logger.error("❌ Errore caricamento file opzioni %s: %s", file_path, e)
+            return pd.DataFrame()
+    
+    @property
+    def option_chain_store(self) -> OptionChainStore:
+        """Archivio consolidato delle catene di opzioni, aggiornato al primo utilizzo"""
+        if self._option_chain_store is None:
+            self._option_chain_store = OptionChainStore(self.data_lake_dir)
+            self._option_chain_store.ingest()
+        return self._option_chain_store
+    
+    def load_options_changes(self, date: datetime) -> pd.DataFrame:
+        """
+        Carica la catena di opzioni della data con le variazioni giornaliere di OI e volume
+        
+        Args:
+            date: Data per cui caricare i dati
+            
+        Returns:
+            DataFrame con colonne oi_change/volume_change o DataFrame vuoto
+        """
+        date = self.resolve_trading_date(date)
+        
+        try:
+            df = self.option_chain_store.chain_for(date, by_strike=True)
+        except Exception as e:
+            logger.error("❌ Errore archivio catene opzioni: %s", e)
             return pd.DataFrame()
+        
+        if df.empty:
+            logger.warning("⚠️ Catena opzioni non presente nell'archivio per %s", date.strftime('%Y-%m-%d'))
+            return df
+        
+        # Stesso formato del file giornaliero (underlying/type come stringhe)
+        df = df.astype({'underlying': str, 'type': str})
+        logger.info("📊 Caricati %s record di opzioni con variazioni giornaliere dall'archivio", len(df))
+        return df
     
     def load_futures_data(self, date: datetime, instrument: str) -> pd.DataFrame:
         """
@@ -122,6 +212,9 @@ class StructuralLevelsCalculator:
         Returns:
             DataFrame con i dati intraday o DataFrame vuoto
         """
+        category = INSTRUMENT_CONFIG.get(instrument, {}).get('category', 'equity_index')
+        date = self.resolve_trading_date(date, category)
+        
         # Prova diversi pattern per trovare il file
         patterns = [
             f'_{instrument}_intraday_5m.csv',
@@ -135,40 +228,64 @@ class StructuralLevelsCalculator:
                 break
         
         if not file_path:
-            logger.warning(f"⚠️ File futures {instrument} non trovato per {date.strftime('%Y-%m-%d')}")
+            logger.warning("⚠️ File futures %s non trovato per %s", instrument, date.strftime('%Y-%m-%d'))
             return pd.DataFrame()
         
         try:
-            df = pd.read_csv(file_path)
+            # Lock condiviso: il file intraday può essere aggiornato sul posto dall'ingestion
+            with lake_lock(file_path, shared=True):
+                df = pd.read_csv(file_path)
             
             # Converte la colonna datetime se presente
             if 'datetime' in df.columns:
                 df['datetime'] = pd.to_datetime(df['datetime'])
             
-            logger.info(f"📊 Caricati {len(df)} record futures {instrument} da {os.path.basename(file_path)}")
+            logger.info("📊 Caricati %s record futures %s da %s", len(df), instrument, os.path.basename(file_path))
             return df
             
         except Exception as e:
-            logger.error(f"❌ Errore caricamento file futures {file_path}: {e}")
+            logger.error("❌ Errore caricamento file futures %s: %s", file_path, e)
             return pd.DataFrame()
 
-def calculate_option_levels(date: datetime, calculator: StructuralLevelsCalculator = None) -> Dict[str, Dict]:
+def calculate_option_levels(date: datetime, calculator: StructuralLevelsCalculator = None,
+                            rank_by: str = 'open_interest', spots: Optional[Dict[str, float]] = None,
+                            instruments: Optional[List[str]] = None) -> Dict[str, Dict]:
     """
     Calcola i livelli di prezzo chiave dai dati delle opzioni del CME
     
     Args:
         date: Data per cui calcolare i livelli
         calculator: Istanza del calculator (opzionale, ne crea una nuova se None)
+        rank_by: 'open_interest' (OI assoluto) o 'oi_change' (incremento di OI sulla sessione precedente)
+        spots: Prezzo corrente del future per strumento, usato per la GEX
+            (in mancanza si usa il max pain come approssimazione)
+        instruments: Limita il calcolo a questi strumenti (default: tutti quelli della catena)
         
     Returns:
         Dizionario con i livelli per Call e Put per ogni strumento
     """
+    if rank_by not in OPTION_RANKING_METRICS:
+        raise ValueError(f"rank_by non valido: {rank_by} (ammessi: {', '.join(OPTION_RANKING_METRICS)})")
+    
     if calculator is None:
         calculator = StructuralLevelsCalculator()
     
-    logger.info(f"🎯 Calcolo livelli opzioni per {date.strftime('%Y-%m-%d')}")
+    logger.info("🎯 Calcolo livelli opzioni per %s (ordinamento: %s)", date.strftime('%Y-%m-%d'), rank_by)
     
-    options_df = calculator.load_options_data(date)
+    # Catena completa (scadenze e dte): base di max pain, muri e GEX con qualunque ordinamento
+    chain_df = calculator.load_options_data(date)
+    
+    if rank_by == 'oi_change':
+        # Variazioni aggregate per strike: solo per l'ordinamento dei livelli
+        options_df = calculator.load_options_changes(date)
+    else:
+        options_df = chain_df
+    
+    if instruments is not None:
+        if not options_df.empty:
+            options_df = options_df[options_df['underlying'].isin(instruments)]
+        if not chain_df.empty:
+            chain_df = chain_df[chain_df['underlying'].isin(instruments)]
     
     if options_df.empty:
         logger.warning("⚠️ Nessun dato opzioni disponibile")
@@ -176,10 +293,20 @@ def calculate_option_levels(date: datetime, calculator: StructuralLevelsCalculat
     
     results = {}
     
+    # Max pain e muri di OI di tutti gli strumenti in un solo passaggio vettoriale
+    if chain_df.empty:
+        logger.warning("⚠️ Catena completa non disponibile: max pain e GEX non calcolati")
+        chain_summary = pd.DataFrame(columns=['underlying']).set_index('underlying')
+    else:
+        chain_summary = summarize_chain(chain_df).set_index('underlying')
+    
+    # GEX di tutti gli strumenti in un solo calcolo vettoriale
+    gamma_exposure = _calculate_gamma_exposure(chain_df, chain_summary, spots or {})
+    
     # Processa ogni strumento presente nei dati
     for underlying in options_df['underlying'].unique():
         if underlying not in INSTRUMENT_CONFIG:
-            logger.warning(f"⚠️ Strumento {underlying} non configurato, ignorato")
+            logger.warning("⚠️ Strumento %s non configurato, ignorato", underlying)
             continue
         
         instrument_data = options_df[options_df['underlying'] == underlying].copy()
@@ -192,12 +319,12 @@ def calculate_option_levels(date: datetime, calculator: StructuralLevelsCalculat
         # Calcola livelli per Call e Put separatamente
         call_levels = _calculate_option_levels_by_type(
             instrument_data[instrument_data['type'] == 'CALL'], 
-            'CALL', config
+            'CALL', config, rank_by
         )
         
         put_levels = _calculate_option_levels_by_type(
             instrument_data[instrument_data['type'] == 'PUT'], 
-            'PUT', config
+            'PUT', config, rank_by
         )
         
         results[underlying] = {
@@ -211,15 +338,105 @@ def calculate_option_levels(date: datetime, calculator: StructuralLevelsCalculat
                 'strike_range': {
                     'min': instrument_data['strike'].min(),
                     'max': instrument_data['strike'].max()
-                }
+                },
+                'rank_by': rank_by
+            }
+        }
+        
+        if underlying in chain_summary.index:
+            summary = chain_summary.loc[underlying]
+            results[underlying]['chain_analytics'] = {
+                'max_pain': float(summary['max_pain']),
+                'call_wall': float(summary['call_wall']),
+                'put_wall': float(summary['put_wall']),
+                'call_wall_oi': int(summary['call_wall_oi']),
+                'put_wall_oi': int(summary['put_wall_oi']),
+                'put_call_oi_ratio': None if pd.isna(summary['put_call_ratio']) else round(float(summary['put_call_ratio']), 3)
             }
+        
+        if underlying in gamma_exposure:
+            results[underlying]['gamma_exposure'] = gamma_exposure[underlying]
+        
+        if 'oi_change' in instrument_data.columns:
+            results[underlying]['metadata'].update({
+                'call_oi_change': int(instrument_data[instrument_data['type'] == 'CALL']['oi_change'].sum()),
+                'put_oi_change': int(instrument_data[instrument_data['type'] == 'PUT']['oi_change'].sum())
+            })
+        
+        logger.info("✅ Livelli %s: %s CALL, %s PUT", underlying, len(call_levels), len(put_levels))
+    
+    return results
+
+def _calculate_gamma_exposure(options_df: pd.DataFrame, chain_summary: pd.DataFrame,
+                              spots: Dict[str, float]) -> Dict[str, Dict]:
+    """
+    GEX per strike e zero gamma degli strumenti configurati
+    
+    Args:
+        options_df: Catena di opzioni della data
+        chain_summary: Risultato di summarize_chain indicizzato per underlying
+        spots: Prezzo corrente del future per strumento
+        
+    Returns:
+        Dizionario strumento -> {'spot', 'spot_source', 'total_gex', 'zero_gamma', 'levels'}
+        (strumenti senza scadenze note esclusi)
+    """
+    spot_rows = []
+    for underlying in chain_summary.index:
+        if underlying not in INSTRUMENT_CONFIG:
+            continue
+        if spots.get(underlying):
+            spot_rows.append((underlying, float(spots[underlying]), 'futures'))
+        else:
+            spot_rows.append((underlying, float(chain_summary.loc[underlying, 'max_pain']), 'max_pain'))
+    
+    if not spot_rows:
+        return {}
+    
+    spot_frame = pd.DataFrame(spot_rows, columns=['underlying', 'spot', 'spot_source'])
+    chain = options_df.drop(columns=['date'], errors='ignore')
+    
+    try:
+        exposure = compute_gamma_exposure(
+            chain, spot_frame,
+            implied_volatility={symbol: config['implied_volatility'] for symbol, config in INSTRUMENT_CONFIG.items()},
+            point_values={symbol: config['point_value'] for symbol, config in INSTRUMENT_CONFIG.items()}
+        )
+    except Exception as e:
+        logger.error("❌ Errore calcolo gamma exposure: %s", e)
+        return {}
+    
+    by_strike = exposure['by_strike']
+    summary = exposure['summary'].set_index('underlying')
+    sources = spot_frame.set_index('underlying')['spot_source']
+    
+    for underlying in sources.index.difference(summary.index):
+        logger.warning("⚠️ GEX %s omessa: nessun contratto con scadenza nota (dte) nella catena", underlying)
+    
+    results = {}
+    for underlying in summary.index:
+        strikes = by_strike[by_strike['underlying'] == underlying]
+        top = strikes.reindex(strikes['net_gex'].abs().sort_values(ascending=False).index).head(GEX_LEVEL_COUNT)
+        zero_gamma = summary.loc[underlying, 'zero_gamma']
+        
+        results[underlying] = {
+            'spot': round(float(summary.loc[underlying, 'spot']), 2),
+            'spot_source': sources[underlying],
+            'total_gex': round(float(summary.loc[underlying, 'total_gex']), 0),
+            'zero_gamma': None if pd.isna(zero_gamma) else round(float(zero_gamma), 2),
+            'levels': [
+                {'strike': float(row['strike']), 'net_gex': round(float(row['net_gex']), 0)}
+                for _, row in top.iterrows()
+            ]
         }
         
-        logger.info(f"✅ Livelli {underlying}: {len(call_levels)} CALL, {len(put_levels)} PUT")
+        logger.info("🧲 GEX %s: totale %.1fM$/1%%, zero gamma %s",
+                    underlying, results[underlying]['total_gex'] / 1e6, results[underlying]['zero_gamma'])
     
     return results
 
-def _calculate_option_levels_by_type(data: pd.DataFrame, option_type: str, config: Dict) -> List[Dict]:
+def _calculate_option_levels_by_type(data: pd.DataFrame, option_type: str, config: Dict,
+                                     rank_by: str = 'open_interest') -> List[Dict]:
     """
     Calcola i livelli per un tipo di opzione specifico (Call o Put)
     
@@ -227,6 +444,7 @@ def _calculate_option_levels_by_type(data: pd.DataFrame, option_type: str, confi
         data: DataFrame filtrato per tipo di opzione
         option_type: 'CALL' o 'PUT'
         config: Configurazione dello strumento
+        rank_by: Colonna di Open Interest usata per soglia e rilevanza ('open_interest' o 'oi_change')
         
     Returns:
         Lista di livelli ordinati per rilevanza
@@ -234,17 +452,17 @@ def _calculate_option_levels_by_type(data: pd.DataFrame, option_type: str, confi
     if data.empty:
         return []
     
-    # Filtra per Open Interest minimo
-    significant_data = data[data['open_interest'] >= MIN_OPEN_INTEREST_THRESHOLD].copy()
+    # Filtra per Open Interest (o incremento di OI) minimo
+    significant_data = data[data[rank_by] >= OPTION_RANKING_METRICS[rank_by]].copy()
     
     if significant_data.empty:
-        logger.debug(f"Nessuna opzione {option_type} con OI significativo")
+        logger.debug("Nessuna opzione %s con %s significativo", option_type, rank_by)
         return []
     
     # Calcola score di rilevanza combinando Volume e Open Interest
     significant_data['relevance_score'] = (
         significant_data['volume'] * 0.4 +
-        significant_data['open_interest'] * 0.6
+        significant_data[rank_by] * 0.6
     )
     
     # Ordina per rilevanza decrescente
@@ -264,14 +482,17 @@ def _calculate_option_levels_by_type(data: pd.DataFrame, option_type: str, confi
         )
         
         if not too_close:
-            selected_levels.append({
+            level = {
                 'strike': float(current_strike),
                 'type': option_type,
                 'volume': int(row['volume']),
                 'open_interest': int(row['open_interest']),
                 'relevance_score': float(row['relevance_score']),
                 'option_symbol': row.get('option_symbol', f"{current_strike}{option_type[0]}")
-            })
+            }
+            if 'oi_change' in row:
+                level['oi_change'] = int(row['oi_change'])
+            selected_levels.append(level)
         
         # Limita a massimo 5 livelli per tipo
         if len(selected_levels) >= 5:
@@ -295,16 +516,16 @@ def calculate_volume_profile(date: datetime, instrument_symbol: str, calculator:
     if calculator is None:
         calculator = StructuralLevelsCalculator()
     
-    logger.info(f"📊 Calcolo Volume Profile {instrument_symbol} per {date.strftime('%Y-%m-%d')}")
+    logger.info("📊 Calcolo Volume Profile %s per %s", instrument_symbol, date.strftime('%Y-%m-%d'))
     
     futures_df = calculator.load_futures_data(date, instrument_symbol)
     
     if futures_df.empty:
-        logger.warning(f"⚠️ Nessun dato futures per {instrument_symbol}")
+        logger.warning("⚠️ Nessun dato futures per %s", instrument_symbol)
         return {}
     
     if instrument_symbol not in INSTRUMENT_CONFIG:
-        logger.error(f"❌ Strumento {instrument_symbol} non configurato")
+        logger.error("❌ Strumento %s non configurato", instrument_symbol)
         return {}
     
     config = INSTRUMENT_CONFIG[instrument_symbol]
@@ -316,7 +537,7 @@ def calculate_volume_profile(date: datetime, instrument_symbol: str, calculator:
         price_range = session_high - session_low
         
         if price_range <= 0:
-            logger.warning(f"⚠️ Range di prezzo invalido per {instrument_symbol}")
+            logger.warning("⚠️ Range di prezzo invalido per %s", instrument_symbol)
             return {}
         
         # Crea bins per il volume profile
@@ -388,6 +609,7 @@ def calculate_volume_profile(date: datetime, instrument_symbol: str, calculator:
         
         result = {
             'poc': round(poc_price, 2),
+            'last_price': round(float(futures_df['close'].iloc[-1]), 2) if 'close' in futures_df.columns else None,
             'vah': round(vah_price, 2),
             'val': round(val_price, 2),
             'session_high': round(session_high, 2),
@@ -401,21 +623,26 @@ def calculate_volume_profile(date: datetime, instrument_symbol: str, calculator:
             'bin_size': round(bin_size, 3)
         }
         
-        logger.info(f"✅ Volume Profile {instrument_symbol}: POC={result['poc']}, VAH={result['vah']}, VAL={result['val']}")
+        logger.info("✅ Volume Profile %s: POC=%s, VAH=%s, VAL=%s",
+                    instrument_symbol, result['poc'], result['vah'], result['val'])
         
         return result
         
     except Exception as e:
-        logger.error(f"❌ Errore calcolo Volume Profile per {instrument_symbol}: {e}")
+        logger.error("❌ Errore calcolo Volume Profile per %s: %s", instrument_symbol, e)
         return {}
 
-def get_combined_structural_levels(date: datetime, instruments: List[str] = None) -> Dict[str, Dict]:
+def get_combined_structural_levels(date: datetime, instruments: List[str] = None,
+                                   rank_by: str = 'open_interest',
+                                   calculator: StructuralLevelsCalculator = None) -> Dict[str, Dict]:
     """
     Ottiene tutti i livelli strutturali combinati per una data specifica
     
     Args:
         date: Data per cui calcolare i livelli
         instruments: Lista degli strumenti (default: ['ES', 'NQ'])
+        rank_by: Ordinamento dei livelli opzioni ('open_interest' o 'oi_change')
+        calculator: Istanza del calculator (opzionale, ne crea una nuova se None)
         
     Returns:
         Dizionario completo con livelli opzioni e volume profile per ogni strumento
@@ -423,19 +650,25 @@ def get_combined_structural_levels(date: datetime, instruments: List[str] = None
     if instruments is None:
         instruments = list(INSTRUMENT_CONFIG.keys())
     
-    logger.info(f"🎯 Calcolo livelli strutturali combinati per {date.strftime('%Y-%m-%d')}")
+    logger.info("🎯 Calcolo livelli strutturali combinati per %s", date.strftime('%Y-%m-%d'))
     
-    calculator = StructuralLevelsCalculator()
+    if calculator is None:
+        calculator = StructuralLevelsCalculator()
     combined_results = {}
     
+    # Calcola volume profile per ogni strumento (l'ultimo prezzo serve alla GEX)
+    volume_profiles = {}
+    for instrument in instruments:
+        logger.info("📊 Processando %s...", instrument)
+        volume_profiles[instrument] = calculate_volume_profile(date, instrument, calculator)
+    
+    spots = {instrument: profile.get('last_price') for instrument, profile in volume_profiles.items()}
+    
     # Calcola livelli opzioni una volta per tutti gli strumenti
-    option_levels = calculate_option_levels(date, calculator)
+    option_levels = calculate_option_levels(date, calculator, rank_by, spots, instruments)
     
-    # Calcola volume profile per ogni strumento
     for instrument in instruments:
-        logger.info(f"📊 Processando {instrument}...")
-        
-        volume_profile = calculate_volume_profile(date, instrument, calculator)
+        volume_profile = volume_profiles[instrument]
         
         combined_results[instrument] = {
             'option_levels': option_levels.get(instrument, {}),
@@ -464,7 +697,7 @@ def identify_confluence_zones(structural_levels: Dict[str, Dict], price_toleranc
         if not data:
             continue
             
-        logger.info(f"🔍 Ricerca confluenze per {instrument}")
+        logger.info("🔍 Ricerca confluenze per %s", instrument)
         
         all_levels = []
         
@@ -491,6 +724,23 @@ def identify_confluence_zones(structural_levels: Dict[str, Dict], price_toleranc
                 'open_interest': put_level.get('open_interest', 0)
             })
         
+        # Livelli dalla gamma exposure: strike con GEX netta maggiore (M$ per 1%) e zero gamma
+        gamma_data = option_data.get('gamma_exposure', {})
+        for gex_level in gamma_data.get('levels', []):
+            all_levels.append({
+                'price': gex_level['strike'],
+                'type': 'GEX_STRIKE',
+                'strength': abs(gex_level['net_gex']) / 1e6,
+                'net_gex': gex_level['net_gex']
+            })
+        
+        if gamma_data.get('zero_gamma') is not None:
+            all_levels.append({
+                'price': gamma_data['zero_gamma'],
+                'type': 'ZERO_GAMMA',
+                'strength': abs(gamma_data.get('total_gex', 0)) / 1e6
+            })
+        
         # Livelli dal volume profile
         volume_data = data.get('volume_profile', {})
         if volume_data:
@@ -542,10 +792,45 @@ def identify_confluence_zones(structural_levels: Dict[str, Dict], price_toleranc
         
         confluence_results[instrument] = confluences[:10]  # Limita ai top 10
         
-        logger.info(f"✅ {instrument}: trovate {len(confluences)} zone di confluenza")
+        logger.info("✅ %s: trovate %s zone di confluenza", instrument, len(confluences))
     
     return confluence_results
 
+def structural_levels_path(date: datetime, data_lake_dir: str = DATA_LAKE_DIR) -> str:
+    """Path del file pubblicato dei livelli strutturali di una data"""
+    return os.path.join(data_lake_dir, f"{date.strftime('%Y-%m-%d')}{STRUCTURAL_LEVELS_SUFFIX}")
+
+def publish_structural_levels(date: datetime, structural_levels: Dict[str, Dict],
+                              confluences: Optional[Dict[str, List[Dict]]] = None,
+                              data_lake_dir: str = DATA_LAKE_DIR) -> str:
+    """
+    Pubblica livelli e zone di confluenza di una data nella data lake (scrittura atomica)
+    
+    Args:
+        date: Data dei livelli
+        structural_levels: Risultato di get_combined_structural_levels()
+        confluences: Zone di confluenza (default: calcolate da structural_levels)
+        data_lake_dir: Directory della data lake
+        
+    Returns:
+        Path del file pubblicato
+    """
+    if confluences is None:
+        confluences = identify_confluence_zones(structural_levels)
+    
+    output = {
+        'date': date.strftime('%Y-%m-%d'),
+        'instruments': list(structural_levels),
+        'data': structural_levels,
+        'confluences': confluences,
+        'published_at': datetime.now().isoformat()
+    }
+    path = structural_levels_path(date, data_lake_dir)
+    write_json_atomic(path, output, indent=2, default=str)
+    
+    logger.info("🎯 Livelli strutturali pubblicati: %s", path)
+    return path
+
 def main():
     """Funzione di test per verificare il funzionamento dei moduli"""
     import json
@@ -3,9 +3,20 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 import logging
 import os
+import sys
+from datetime import datetime, timezone
+
+# Shared queue-based logging from the data pipeline (log I/O off the request threads)
+DATA_PIPELINE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'data_pipeline'))
+if DATA_PIPELINE_DIR not in sys.path:
+    sys.path.append(DATA_PIPELINE_DIR)
+
+try:
+    from pipeline_logging import setup_logging
+    PIPELINE_LOGGING_AVAILABLE = True
+except ImportError:
+    PIPELINE_LOGGING_AVAILABLE = False
 
-# Setup logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
@@ -29,8 +40,8 @@ def initialize_mt5():
         mt5.shutdown()
         return False
     
-    logger.info(f"MT5 initialized successfully")
-    logger.info(f"Account: {account_info.login}, Balance: {account_info.balance}, Server: {account_info.server}")
+    logger.info("MT5 initialized successfully")
+    logger.info("Account: %s, Balance: %s, Server: %s", account_info.login, account_info.balance, account_info.server)
     mt5_connected = True
     return True
 
@@ -67,7 +78,7 @@ def get_status():
         })
         
     except Exception as e:
-        logger.error(f"Status check error: {e}")
+        logger.error("Status check error: %s", e)
         return jsonify({
             'connected': False,
             'trade_allowed': False,
@@ -85,6 +96,8 @@ def get_rates():
         symbol = data.get('symbol')
         timeframe = data.get('timeframe', '5m')
         count = data.get('count', 50)
+        date_from = data.get('from')  # Optional Unix timestamps (UTC) for a time window
+        date_to = data.get('to')
         
         if not symbol:
             return jsonify({'error': 'Symbol is required'}), 400
@@ -102,8 +115,16 @@ def get_rates():
         
         mt5_timeframe = timeframe_map.get(timeframe, mt5.TIMEFRAME_M5)
         
-        # Get rates
-        rates = mt5.copy_rates_from_pos(symbol, mt5_timeframe, 0, count)
+        # Get rates: explicit time window if requested, otherwise the latest bars
+        if date_from is not None and date_to is not None:
+            rates = mt5.copy_rates_range(
+                symbol,
+                mt5_timeframe,
+                datetime.fromtimestamp(int(date_from), tz=timezone.utc),
+                datetime.fromtimestamp(int(date_to), tz=timezone.utc)
+            )
+        else:
+            rates = mt5.copy_rates_from_pos(symbol, mt5_timeframe, 0, count)
         
         if rates is None or len(rates) == 0:
             return jsonify({'error': f'No rates available for {symbol}'}), 404
@@ -127,7 +148,7 @@ def get_rates():
         })
         
     except Exception as e:
-        logger.error(f"Get rates error: {e}")
+        logger.error("Get rates error: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/symbol_info', methods=['POST'])
@@ -166,7 +187,7 @@ def get_symbol_info():
         })
         
     except Exception as e:
-        logger.error(f"Get symbol info error: {e}")
+        logger.error("Get symbol info error: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/execute', methods=['POST'])
@@ -252,7 +273,7 @@ def execute_order():
             if tp > 0:
                 request_dict["tp"] = float(tp)
             
-            logger.info(f"Trying filling mode {filling_mode} for order: {request_dict}")
+            logger.info("Trying filling mode %s for order: %s", filling_mode, request_dict)
             
             # Execute the order
             result = mt5.order_send(request_dict)
@@ -264,7 +285,7 @@ def execute_order():
             
             # Check result
             if result.retcode == mt5.TRADE_RETCODE_DONE:
-                logger.info(f"✅ Order executed successfully with filling mode {filling_mode}: Order {result.order}")
+                logger.info("✅ Order executed successfully with filling mode %s: Order %s", filling_mode, result.order)
                 return jsonify({
                     'success': True,
                     'order': result.order,
@@ -288,7 +309,7 @@ def execute_order():
         }), 400
             
     except Exception as e:
-        logger.error(f"Order execution error: {e}")
+        logger.error("Order execution error: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
@@ -325,7 +346,7 @@ def get_positions():
         })
         
     except Exception as e:
-        logger.error(f"Get positions error: {e}")
+        logger.error("Get positions error: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/close_position', methods=['POST'])
@@ -405,13 +426,18 @@ def close_position():
         }), 400
             
     except Exception as e:
-        logger.error(f"Close position error: {e}")
+        logger.error("Close position error: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
 if __name__ == '__main__':
+    # Setup logging
+    if PIPELINE_LOGGING_AVAILABLE:
+        setup_logging(log_file=os.environ.get('MT5_SERVER_LOG_FILE'))
+    else:
+        logging.basicConfig(level=logging.INFO)
     logger.info("Starting MT5 Python Server...")
     
     # Initialize MT5 connection
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Sorgenti di barre OHLCV per la pipeline futures con acquisizione "hedged".
+Se la sorgente primaria (Finnhub) non risponde entro il budget di latenza o
+non ha dati, viene interrogata la sorgente secondaria (bridge MT5, endpoint
+/rates di backend/analysis/mt5-python-server.py) e vince la prima risposta valida.
+
+Funzionalità principali:
+- Astrazione BarSource con formato di risposta candle comune ('t','o','h','l','c','v')
+- Sorgente Finnhub (tentativi multipli di simbolo) e sorgente bridge MT5
+- Richieste hedged con budget di latenza e cancellazione della sorgente perdente
+- Provenienza del dato registrata in 'symbol_used' (es. 'CME:ES' o 'MT5:US500')
+"""
+
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Dict, List, Optional
+
+import requests
+
+from http_client import create_session
+
+logger = logging.getLogger(__name__)
+
+# Bridge MT5 (mt5-python-server.py)
+MT5_BRIDGE_URL = os.environ.get('MT5_BRIDGE_URL', 'http://localhost:8080')
+MT5_BRIDGE_TIMEOUT = 10
+MT5_FALLBACK_ENABLED = os.environ.get('PIPELINE_MT5_FALLBACK', '1') != '0'
+
+# Secondi di attesa della sorgente primaria prima di lanciare la secondaria
+HEDGE_LATENCY_BUDGET = 8.0
+
+# Risoluzione pipeline (minuti) -> timeframe del bridge MT5
+MT5_TIMEFRAMES = {
+    '1': '1m',
+    '5': '5m',
+    '15': '15m',
+    '30': '30m',
+    '60': '1h'
+}
+
+class BarSource(ABC):
+    """Interfaccia comune delle sorgenti di barre OHLCV"""
+
+    name = 'base'
+
+    @abstractmethod
+    def fetch_bars(self, instrument_config: Dict, resolution: str, from_ts: int, to_ts: int,
+                   cancel_event: Optional[threading.Event] = None) -> Optional[Dict]:
+        """
+        Scarica le barre della finestra richiesta
+
+        Args:
+            instrument_config: Configurazione dello strumento (FUTURES_INSTRUMENTS)
+            resolution: Risoluzione in minuti
+            from_ts: Timestamp di inizio (Unix)
+            to_ts: Timestamp di fine (Unix)
+            cancel_event: Evento impostato quando un'altra sorgente ha già risposto
+
+        Returns:
+            Dizionario candle ('t','o','h','l','c','v','symbol_used') o None
+        """
+
+class FinnhubBarSource(BarSource):
+    """Sorgente primaria: API Finnhub tramite FinnhubDataFetcher"""
+
+    name = 'finnhub'
+
+    def __init__(self, fetcher):
+        self.fetcher = fetcher
+
+    def fetch_bars(self, instrument_config: Dict, resolution: str, from_ts: int, to_ts: int,
+                   cancel_event: Optional[threading.Event] = None) -> Optional[Dict]:
+        return self.fetcher.try_multiple_symbols(instrument_config, resolution, from_ts, to_ts, cancel_event)
+
+class MT5BridgeBarSource(BarSource):
+    """Sorgente secondaria: endpoint POST /rates del bridge MT5"""
+
+    name = 'mt5'
+
+    def __init__(self, base_url: str = MT5_BRIDGE_URL, timeout: float = MT5_BRIDGE_TIMEOUT,
+                 session: Optional[requests.Session] = None):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = session or create_session(cache=False)
+
+    def _request_rates(self, symbol: str, resolution: str, from_ts: int, to_ts: int) -> Optional[List[Dict]]:
+        """Richiede le barre di un simbolo al bridge"""
+        seconds_per_bar = int(resolution) * 60
+        payload = {
+            'symbol': symbol,
+            'timeframe': MT5_TIMEFRAMES.get(resolution, '5m'),
+            'from': from_ts,
+            'to': to_ts,
+            'count': max(1, (to_ts - from_ts) // seconds_per_bar + 1)
+        }
+
+        response = self.session.post(f"{self.base_url}/rates", json=payload, timeout=self.timeout)
+
+        if response.status_code != 200:
+            logger.debug("Bridge MT5 %s: HTTP %s", symbol, response.status_code)
+            return None
+
+        return response.json().get('rates') or None
+
+    def fetch_bars(self, instrument_config: Dict, resolution: str, from_ts: int, to_ts: int,
+                   cancel_event: Optional[threading.Event] = None) -> Optional[Dict]:
+        for symbol in instrument_config.get('mt5_symbols', []):
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+
+            try:
+                rates = self._request_rates(symbol, resolution, from_ts, to_ts)
+            except (requests.RequestException, ValueError) as e:
+                logger.debug("Bridge MT5 non disponibile per %s: %s", symbol, e)
+                return None
+
+            rates = [r for r in (rates or []) if from_ts <= r['time'] <= to_ts]
+            if not rates:
+                continue
+
+            logger.info("✅ Dati bridge MT5 per %s con simbolo: %s", instrument_config['name'], symbol)
+            return {
+                's': 'ok',
+                't': [r['time'] for r in rates],
+                'o': [r['open'] for r in rates],
+                'h': [r['high'] for r in rates],
+                'l': [r['low'] for r in rates],
+                'c': [r['close'] for r in rates],
+                'v': [r.get('tick_volume', 0) for r in rates],
+                'symbol_used': f"MT5:{symbol}"
+            }
+
+        return None
+
+class HedgedBarAcquirer(BarSource):
+    """
+    Combina una sorgente primaria e una secondaria con richieste hedged:
+    la secondaria parte se la primaria supera il budget di latenza o non ha dati,
+    e vince la prima risposta valida.
+    """
+
+    name = 'hedged'
+
+    def __init__(self, primary: BarSource, secondary: Optional[BarSource] = None,
+                 hedge_delay: float = HEDGE_LATENCY_BUDGET, metrics=None):
+        self.primary = primary
+        self.secondary = secondary
+        self.hedge_delay = hedge_delay
+        self.metrics = metrics
+
+    def _count(self, counter: str):
+        if self.metrics is not None:
+            self.metrics.add(counter)
+
+    def _safe_fetch(self, source: BarSource, args, cancel_event: threading.Event) -> Optional[Dict]:
+        try:
+            return source.fetch_bars(*args, cancel_event=cancel_event)
+        except Exception as e:
+            logger.error("❌ Errore sorgente %s: %s", source.name, e)
+            return None
+
+    def fetch_bars(self, instrument_config: Dict, resolution: str, from_ts: int, to_ts: int,
+                   cancel_event: Optional[threading.Event] = None) -> Optional[Dict]:
+        args = (instrument_config, resolution, from_ts, to_ts)
+        cancel_event = cancel_event or threading.Event()
+
+        if self.secondary is None:
+            return self._safe_fetch(self.primary, args, cancel_event)
+
+        # Executor per chiamata: con un fetcher condiviso tra thread (nodi futures
+        # dell'orchestratore) un pool comune sarebbe saturato dalle primarie e la
+        # richiesta hedged resterebbe in coda senza partire
+        executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='bar-source')
+        pending = {executor.submit(self._safe_fetch, self.primary, args, cancel_event): self.primary}
+
+        try:
+            result = next(iter(pending)).result(timeout=self.hedge_delay)
+            if result:
+                executor.shutdown(wait=False)
+                return result
+            # La primaria ha risposto senza dati: secondaria subito
+            logger.info("🔀 Nessun dato primario per %s, provo %s", instrument_config['name'], self.secondary.name)
+            pending = {}
+        except FutureTimeoutError:
+            logger.info("⏱️ %s oltre %ss per %s, richiesta hedged a %s",
+                        self.primary.name, self.hedge_delay, instrument_config['name'], self.secondary.name)
+            self._count('hedged_requests')
+
+        pending[executor.submit(self._safe_fetch, self.secondary, args, cancel_event)] = self.secondary
+
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    source = pending.pop(future)
+                    result = future.result()
+                    if result:
+                        if source is self.secondary:
+                            self._count('secondary_source_wins')
+                        return result
+            return None
+        finally:
+            # Ferma la sorgente perdente al prossimo tentativo di simbolo
+            cancel_event.set()
+            executor.shutdown(wait=False)
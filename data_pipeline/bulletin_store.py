@@ -0,0 +1,485 @@
+#!/usr/bin/env python3
+"""
+Archivio locale dei Daily Bulletin CME con download riprendibili e verificati.
+Ogni bulletin viene scaricato in un file temporaneo '.part' e rinominato in
+modo atomico solo a download completo; dimensione e SHA-256 vengono registrati
+in un manifest, così un bulletin già presente e verificato non viene più scaricato.
+
+Funzionalità principali:
+- Scrittura in streaming a blocchi su file temporaneo con rename atomico
+- Ripresa dei download interrotti con HTTP Range (If-Range su ETag/Last-Modified)
+- Ripresa anche tra esecuzioni diverse tramite i metadati del file '.part'
+- Manifest con dimensione e checksum SHA-256 di ogni bulletin completato, aggiornato
+  sotto lock advisory (un solo download per bulletin tra processi concorrenti)
+- Archivio compresso (zstd se disponibile, altrimenti gzip) con lettura diretta
+  dallo stream di decompressione e file temporaneo solo per i PDF
+"""
+
+import gzip
+import hashlib
+import io
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, Optional
+
+import requests
+
+from lake_io import atomic_write, lake_lock, replace_file, write_bytes_atomic, write_json_atomic
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILENAME = 'bulletin_manifest.json'
+PART_SUFFIX = '.part'
+
+# Estensioni possibili di un bulletin (cme_bulletin_YYYYMMDD.<ext>)
+BULLETIN_EXTENSIONS = ('pdf', 'txt')
+
+DOWNLOAD_RETRIES = 3
+DOWNLOAD_RETRY_BACKOFF = 1.0
+DOWNLOAD_TIMEOUT = (10, 30)
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Letture dal socket durante il download: i byte di un blocco non completato
+# prima di una disconnessione vanno persi, blocchi piccoli limitano la perdita
+DOWNLOAD_READ_SIZE = 64 * 1024
+
+# Compressione dell'archivio: 'zstd', 'gzip' o 'none'
+ARCHIVE_COMPRESSION = os.environ.get('BULLETIN_COMPRESSION', 'zstd' if ZSTD_AVAILABLE else 'gzip').lower()
+ZSTD_LEVEL = 10
+GZIP_LEVEL = 6
+
+# Risparmio minimo per archiviare compresso (i PDF hanno già stream compressi)
+ARCHIVE_MIN_SAVING = 0.05
+
+COMPRESSION_SUFFIXES = {'zstd': '.zst', 'gzip': '.gz'}
+
+# Errori di rete dopo cui il download viene ripreso dall'ultimo byte ricevuto
+_RESUMABLE_ERRORS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.ChunkedEncodingError,
+    requests.exceptions.Timeout
+)
+
+class IncompleteDownloadError(IOError):
+    """Il server ha chiuso il body prima della dimensione dichiarata"""
+
+def file_sha256(path: str, chunk_size: int = DOWNLOAD_CHUNK_SIZE) -> str:
+    """SHA-256 esadecimale del contenuto di un file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def compression_of(path: str) -> Optional[str]:
+    """Compressione di un file dell'archivio dal suffisso (None se non compresso)"""
+    for compression, suffix in COMPRESSION_SUFFIXES.items():
+        if path.endswith(suffix):
+            return compression
+    return None
+
+def raw_name(path: str) -> str:
+    """Nome del bulletin senza il suffisso di compressione (es. .txt.zst -> .txt)"""
+    compression = compression_of(path)
+    return path[:-len(COMPRESSION_SUFFIXES[compression])] if compression else path
+
+def open_bulletin(path: str):
+    """
+    Apre un bulletin in lettura binaria, decomprimendo in streaming se archiviato compresso
+
+    Args:
+        path: Path del file (.txt/.pdf, eventualmente .zst/.gz)
+
+    Returns:
+        File object binario
+    """
+    compression = compression_of(path)
+    if compression == 'gzip':
+        return gzip.open(path, 'rb')
+    if compression == 'zstd':
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError(f"zstandard non installato: impossibile leggere {path}")
+        raw = open(path, 'rb')
+        return zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+    return open(path, 'rb')
+
+def open_bulletin_text(path: str):
+    """Apre un bulletin TXT in lettura testuale riga per riga (decompressione in streaming)"""
+    return io.TextIOWrapper(io.BufferedReader(open_bulletin(path), DOWNLOAD_CHUNK_SIZE),
+                            encoding='utf-8', errors='ignore')
+
+@contextmanager
+def materialized_bulletin(path: str) -> Iterator[str]:
+    """
+    Path di un file non compresso del bulletin, per le librerie che richiedono
+    un file su disco (pdfplumber, processi worker). Un bulletin compresso viene
+    decompresso in un file temporaneo rimosso all'uscita.
+
+    Args:
+        path: Path del bulletin nell'archivio
+    """
+    if compression_of(path) is None:
+        yield path
+        return
+
+    extension = os.path.splitext(raw_name(path))[1]
+    fd, tmp_path = tempfile.mkstemp(prefix='bulletin_', suffix=extension)
+    try:
+        with os.fdopen(fd, 'wb') as target, open_bulletin(path) as source:
+            shutil.copyfileobj(source, target, DOWNLOAD_CHUNK_SIZE)
+        yield tmp_path
+    finally:
+        os.remove(tmp_path)
+
+def compress_file(source_path: str, target_path: str, compression: str):
+    """Comprime un file in streaming (scrittura su temporaneo e rename atomico)"""
+    with open(source_path, 'rb') as source, atomic_write(target_path, 'wb') as target:
+        if compression == 'zstd':
+            compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+            compressor.copy_stream(source, target, read_size=DOWNLOAD_CHUNK_SIZE)
+        else:
+            with gzip.GzipFile(fileobj=target, mode='wb', compresslevel=GZIP_LEVEL, mtime=0) as writer:
+                shutil.copyfileobj(source, writer, DOWNLOAD_CHUNK_SIZE)
+
+def write_json_compressed(base_path: str, data: Dict, compression: str = ARCHIVE_COMPRESSION) -> str:
+    """
+    Scrive un file JSON compresso accanto a un bulletin (temporaneo e rename atomico)
+
+    Args:
+        base_path: Path senza suffisso di compressione (es. cme_bulletin_X.pdf.text.json)
+        data: Contenuto serializzabile in JSON
+        compression: 'zstd', 'gzip' o 'none'
+
+    Returns:
+        Path del file scritto
+    """
+    if compression == 'zstd' and not ZSTD_AVAILABLE:
+        compression = 'gzip'
+    path = base_path + COMPRESSION_SUFFIXES.get(compression, '')
+    payload = json.dumps(data).encode('utf-8')
+
+    if compression == 'zstd':
+        payload = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(payload)
+    elif compression == 'gzip':
+        payload = gzip.compress(payload, compresslevel=GZIP_LEVEL, mtime=0)
+
+    return write_bytes_atomic(path, payload)
+
+def read_json_compressed(base_path: str) -> Optional[Dict]:
+    """Legge un file scritto da write_json_compressed (qualunque compressione), None se assente o illeggibile"""
+    for suffix in (*COMPRESSION_SUFFIXES.values(), ''):
+        path = base_path + suffix
+        if not os.path.exists(path):
+            continue
+        try:
+            with open_bulletin(path) as f:
+                return json.loads(f.read())
+        except Exception:
+            # File troncato o corrotto: trattato come assente
+            continue
+    return None
+
+class BulletinStore:
+    """Bulletin CME scaricati nella data lake e relativo manifest"""
+
+    def __init__(self, data_dir: str, compression: str = ARCHIVE_COMPRESSION):
+        if compression == 'zstd' and not ZSTD_AVAILABLE:
+            logger.warning("⚠️ zstandard non installato, archivio bulletin compresso con gzip")
+            compression = 'gzip'
+        self.data_dir = data_dir
+        self.compression = compression if compression in COMPRESSION_SUFFIXES else None
+        self.manifest_path = os.path.join(data_dir, MANIFEST_FILENAME)
+
+    def bulletin_filename(self, date_str: str, extension: str) -> str:
+        """Nome file standard del bulletin (date_str = YYYYMMDD)"""
+        return f"cme_bulletin_{date_str}.{extension}"
+
+    def load_manifest(self) -> Dict[str, Dict]:
+        """
+        Manifest filename -> {'url', 'size', 'sha256', 'downloaded_at', ...}.
+        Per i bulletin compressi 'archive' è il file su disco (a cui si riferiscono
+        'size' e 'sha256') e 'raw_size'/'raw_sha256' descrivono il bulletin originale.
+        """
+        try:
+            with open(self.manifest_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _record(self, filename: str, entry: Dict):
+        # Lettura e riscrittura sotto lock: processi concorrenti non perdono voci del manifest
+        with lake_lock(self.manifest_path):
+            manifest = self.load_manifest()
+            manifest[filename] = entry
+            write_json_atomic(self.manifest_path, manifest, indent=2)
+
+    def verify(self, filename: str, entry: Optional[Dict] = None) -> bool:
+        """
+        Verifica un bulletin locale contro il manifest
+
+        Args:
+            filename: Nome file del bulletin
+            entry: Voce del manifest (default: letta dal manifest)
+
+        Returns:
+            True se il file esiste con dimensione e SHA-256 registrati
+        """
+        entry = entry if entry is not None else self.load_manifest().get(filename)
+        if not entry:
+            return False
+        path = os.path.join(self.data_dir, entry.get('archive', filename))
+        if not os.path.exists(path):
+            return False
+        if os.path.getsize(path) != entry.get('size'):
+            return False
+        return file_sha256(path) == entry.get('sha256')
+
+    def local_bulletin(self, date_str: str) -> Optional[str]:
+        """
+        Bulletin della data già presente e verificato
+
+        Args:
+            date_str: Data del bulletin (YYYYMMDD)
+
+        Returns:
+            Path del file (eventualmente compresso) o None se va scaricato
+        """
+        manifest = self.load_manifest()
+        for extension in BULLETIN_EXTENSIONS:
+            filename = self.bulletin_filename(date_str, extension)
+            if filename in manifest and self.verify(filename, manifest[filename]):
+                return os.path.join(self.data_dir, manifest[filename].get('archive', filename))
+            if filename in manifest:
+                logger.warning(f"⚠️ Bulletin locale non valido (checksum/dimensione): {filename}")
+        return None
+
+    def pending_download(self, date_str: str) -> Optional[Dict]:
+        """Metadati di un download interrotto da riprendere ({'url', 'filename', ...})"""
+        for extension in BULLETIN_EXTENSIONS:
+            filename = self.bulletin_filename(date_str, extension)
+            part_path = os.path.join(self.data_dir, filename + PART_SUFFIX)
+            try:
+                with open(part_path + '.json', 'r') as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if os.path.exists(part_path) and meta.get('url'):
+                return meta
+        return None
+
+    def _archive(self, filename: str, entry: Dict) -> Dict:
+        """
+        Comprime un bulletin completo nell'archivio se il risparmio è sufficiente
+
+        Args:
+            filename: Nome file del bulletin non compresso nella data lake
+            entry: Voce del manifest del file non compresso
+
+        Returns:
+            Voce del manifest aggiornata
+        """
+        if self.compression is None:
+            return entry
+
+        raw_path = os.path.join(self.data_dir, filename)
+        archive_name = filename + COMPRESSION_SUFFIXES[self.compression]
+        archive_path = os.path.join(self.data_dir, archive_name)
+
+        try:
+            compress_file(raw_path, archive_path, self.compression)
+        except OSError as e:
+            logger.warning(f"⚠️ Compressione di {filename} non riuscita, conservato non compresso: {e}")
+            return entry
+
+        archive_size = os.path.getsize(archive_path)
+        if archive_size > entry['size'] * (1 - ARCHIVE_MIN_SAVING):
+            os.remove(archive_path)
+            logger.debug(f"Compressione di {filename} poco efficace, conservato non compresso")
+            return dict(entry, compression='none')
+
+        archived = dict(entry, archive=archive_name, compression=self.compression, size=archive_size,
+                        sha256=file_sha256(archive_path), raw_size=entry['size'], raw_sha256=entry['sha256'])
+        os.remove(raw_path)
+        logger.info(f"🗜️ {filename} archiviato con {self.compression}: "
+                    f"{entry['size']} -> {archive_size} byte ({archive_size / max(entry['size'], 1):.0%})")
+        return archived
+
+    def add_local(self, filename: str, url: str = '') -> str:
+        """
+        Registra nel manifest (e comprime nell'archivio) un bulletin già scritto
+        nella data lake senza passare dal download, es. i bulletin sintetici
+
+        Args:
+            filename: Nome file standard del bulletin (cme_bulletin_YYYYMMDD.<ext>)
+            url: Origine del file da riportare nel manifest
+
+        Returns:
+            Path del file archiviato (eventualmente compresso)
+        """
+        path = os.path.join(self.data_dir, filename)
+        entry = self._archive(filename, {
+            'url': url,
+            'size': os.path.getsize(path),
+            'sha256': file_sha256(path),
+            'downloaded_at': datetime.now().isoformat()
+        })
+        self._record(filename, entry)
+        return os.path.join(self.data_dir, entry.get('archive', filename))
+
+    def compact(self) -> int:
+        """
+        Comprime i bulletin del manifest ancora archiviati non compressi
+
+        Returns:
+            Numero di bulletin compressi
+        """
+        compacted = 0
+        for filename, entry in self.load_manifest().items():
+            if 'compression' in entry or not self.verify(filename, entry):
+                continue
+            archived = self._archive(filename, entry)
+            if 'archive' in archived:
+                self._record(filename, archived)
+                compacted += 1
+        return compacted
+
+    def download(self, session: requests.Session, url: str, filename: str,
+                 response: Optional[requests.Response] = None) -> Optional[str]:
+        """
+        Scarica un bulletin in modo riprendibile e lo registra nel manifest
+
+        Args:
+            session: Sessione HTTP
+            url: URL del bulletin
+            filename: Nome file di destinazione nella data lake
+            response: Risposta GET già aperta in streaming (es. dalla scoperta dell'URL)
+
+        Returns:
+            Path del file completo e verificato o None se il download non riesce
+        """
+        # Un processo per bulletin: due download concorrenti scriverebbero sullo stesso '.part'
+        # (il lock è rilasciato dal sistema anche se il processo termina)
+        with lake_lock(os.path.join(self.data_dir, filename), timeout=None):
+            entry = self.load_manifest().get(filename)
+            if entry and self.verify(filename, entry):
+                # Completato da un altro processo durante l'attesa del lock
+                if response is not None:
+                    response.close()
+                return os.path.join(self.data_dir, entry.get('archive', filename))
+            return self._download(session, url, filename, response)
+
+    def _download(self, session: requests.Session, url: str, filename: str,
+                  response: Optional[requests.Response]) -> Optional[str]:
+        final_path = os.path.join(self.data_dir, filename)
+        part_path = final_path + PART_SUFFIX
+        meta_path = part_path + '.json'
+        os.makedirs(self.data_dir, exist_ok=True)
+
+        meta = {}
+        try:
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+        # Un file parziale è riutilizzabile solo se proviene dallo stesso URL
+        digest = hashlib.sha256()
+        offset = 0
+        if meta.get('url') == url and os.path.exists(part_path):
+            with open(part_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b''):
+                    digest.update(chunk)
+                    offset += len(chunk)
+            if offset:
+                logger.info(f"⏯️ Ripresa download {filename} da {offset} byte")
+        else:
+            meta = {'url': url, 'filename': filename}
+
+        for attempt in range(DOWNLOAD_RETRIES + 1):
+            try:
+                if response is None:
+                    # I Range valgono sui byte del file: niente compressione di trasporto
+                    headers = {'Accept-Encoding': 'identity'}
+                    if offset:
+                        headers['Range'] = f"bytes={offset}-"
+                        validator = meta.get('etag') or meta.get('last_modified')
+                        if validator:
+                            headers['If-Range'] = validator
+                    response = session.get(url, headers=headers, stream=True, timeout=DOWNLOAD_TIMEOUT)
+
+                # Con un body compresso dal server la dimensione dichiarata non è quella su disco
+                encoded = response.headers.get('Content-Encoding', 'identity').lower() != 'identity'
+
+                with response:
+                    if response.status_code == 206 and offset:
+                        mode = 'ab'
+                        total = response.headers.get('Content-Range', '').rpartition('/')[2]
+                    elif response.status_code == 200:
+                        # Range ignorato o file cambiato sul server: si riparte da zero
+                        if offset:
+                            logger.info(f"🔄 Il server non ha ripreso {filename}, download completo")
+                        mode, offset, digest = 'wb', 0, hashlib.sha256()
+                        total = response.headers.get('Content-Length', '')
+                    elif response.status_code == 416 and offset and offset == meta.get('total'):
+                        # Il file parziale era già completo
+                        mode, total = None, str(offset)
+                    else:
+                        logger.error(f"❌ Errore download {filename}: HTTP {response.status_code}")
+                        return None
+
+                    meta.update({
+                        'etag': response.headers.get('ETag') or meta.get('etag'),
+                        'last_modified': response.headers.get('Last-Modified') or meta.get('last_modified'),
+                        'total': int(total) if total.isdigit() and not encoded else None
+                    })
+                    write_json_atomic(meta_path, meta, indent=2)
+
+                    if mode is not None:
+                        with open(part_path, mode) as f:
+                            for chunk in response.iter_content(chunk_size=DOWNLOAD_READ_SIZE):
+                                f.write(chunk)
+                                digest.update(chunk)
+                                offset += len(chunk)
+                            f.flush()
+                            os.fsync(f.fileno())
+
+                if meta['total'] is not None and offset < meta['total']:
+                    raise IncompleteDownloadError(f"{offset}/{meta['total']} byte")
+                break
+
+            except (IncompleteDownloadError, *_RESUMABLE_ERRORS) as e:
+                response = None
+                if attempt == DOWNLOAD_RETRIES:
+                    logger.error(f"❌ Download {filename} interrotto a {offset} byte, verrà ripreso: {e}")
+                    return None
+                logger.warning(f"⚠️ Connessione interrotta su {filename} a {offset} byte, ripresa "
+                               f"({attempt + 1}/{DOWNLOAD_RETRIES}): {e}")
+                time.sleep(DOWNLOAD_RETRY_BACKOFF * (attempt + 1))
+
+        replace_file(part_path, final_path)
+        try:
+            os.remove(meta_path)
+        except OSError:
+            pass
+
+        entry = self._archive(filename, {
+            'url': url,
+            'size': offset,
+            'sha256': digest.hexdigest(),
+            'downloaded_at': datetime.now().isoformat()
+        })
+        self._record(filename, entry)
+        logger.info(f"🔒 Bulletin verificato e registrato nel manifest: {filename} ({offset} byte)")
+        return os.path.join(self.data_dir, entry.get('archive', filename))
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Calendario di borsa offline per i mercati CME Globex.
+Usato dalla data pipeline (futures e opzioni) e dall'analytics engine per
+determinare le sessioni di trading senza dipendenze esterne né chiamate API.
+
+Funzionalità principali:
+- Template di sessione per equity index, FX, metalli ed energia (orari Chicago)
+- Tabella festività CME calcolata a regole per categoria (chiusure e chiusure anticipate)
+- Conversione di una trade date nella finestra UTC della sessione Globex
+- Calcolo della sessione di trading precedente/corrente saltando weekend e festività
+- Sessione precedente per categoria (le festività solo USA hanno trade date per FX e metalli)
+"""
+
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+# Offset UTC di Chicago (CT): standard -6h, ora legale -5h
+CHICAGO_STANDARD_OFFSET = timedelta(hours=-6)
+CHICAGO_DST_OFFSET = timedelta(hours=-5)
+
+# Template di sessione per categoria di strumento (orari locali Chicago).
+# La sessione della trade date D apre alle 'open' del giorno di calendario
+# precedente e chiude alle 'close' del giorno D.
+SESSION_TEMPLATES = {
+    'equity_index': {
+        'name': 'CME Globex Equity Index',
+        'open': time(17, 0),
+        'close': time(16, 0),
+        'early_close': time(12, 15),
+        'holiday_sessions': False
+    },
+    'forex_major': {
+        'name': 'CME Globex FX',
+        'open': time(17, 0),
+        'close': time(16, 0),
+        'early_close': time(12, 15),
+        'holiday_sessions': True
+    },
+    'precious_metals': {
+        'name': 'COMEX Metals',
+        'open': time(17, 0),
+        'close': time(16, 0),
+        'early_close': time(12, 45),
+        'holiday_sessions': True
+    },
+    'energy': {
+        'name': 'NYMEX Energy',
+        'open': time(17, 0),
+        'close': time(16, 0),
+        'early_close': time(13, 30),
+        'holiday_sessions': False
+    }
+}
+
+DEFAULT_CATEGORY = 'equity_index'
+
+# Festività solo USA: le categorie con 'holiday_sessions' (FX e metalli, mercati
+# sottostanti globali) negoziano una sessione abbreviata con trade date propria,
+# le altre non hanno trade date
+US_ONLY_HOLIDAYS = {
+    'Martin Luther King Jr. Day',
+    "Presidents' Day",
+    'Memorial Day',
+    'Juneteenth',
+    'Independence Day',
+    'Labor Day',
+    'Thanksgiving Day'
+}
+
+DateLike = Union[date, datetime]
+
+def _as_date(day: DateLike) -> date:
+    """Normalizza datetime/date in un oggetto date"""
+    return day.date() if isinstance(day, datetime) else day
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """N-esimo giorno della settimana del mese (n=-1 per l'ultimo)"""
+    if n > 0:
+        first = date(year, month, 1)
+        offset = (weekday - first.weekday()) % 7
+        return first + timedelta(days=offset + 7 * (n - 1))
+
+    next_month = date(year + (month == 12), month % 12 + 1, 1)
+    last = next_month - timedelta(days=1)
+    offset = (last.weekday() - weekday) % 7
+    return last - timedelta(days=offset)
+
+def _easter_sunday(year: int) -> date:
+    """Domenica di Pasqua (algoritmo gregoriano anonimo)"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+def _observed(holiday: date) -> date:
+    """Giorno osservato: sabato -> venerdì, domenica -> lunedì"""
+    if holiday.weekday() == 5:
+        return holiday - timedelta(days=1)
+    if holiday.weekday() == 6:
+        return holiday + timedelta(days=1)
+    return holiday
+
+def _template(category: str) -> Dict:
+    return SESSION_TEMPLATES.get(category, SESSION_TEMPLATES[DEFAULT_CATEGORY])
+
+@lru_cache(maxsize=64)
+def get_holidays(year: int, category: str = DEFAULT_CATEGORY) -> Dict[date, Dict]:
+    """
+    Tabella delle festività CME per l'anno e la categoria indicati
+
+    Args:
+        year: Anno di riferimento
+        category: Categoria strumento (equity_index, forex_major, ...)
+
+    Returns:
+        Dizionario data -> {'name', 'kind'} dove kind è 'closed'
+        (nessuna trade date) o 'early_close' (sessione abbreviata)
+    """
+    holidays = {}
+    holiday_sessions = _template(category)['holiday_sessions']
+
+    def add(day: date, name: str, kind: str = 'closed'):
+        if kind == 'closed' and holiday_sessions and name in US_ONLY_HOLIDAYS:
+            kind = 'early_close'
+        if day.year == year and day.weekday() < 5:
+            holidays[day] = {'name': name, 'kind': kind}
+
+    # Capodanno: se cade di sabato non viene osservato il venerdì precedente
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        add(_observed(new_year), "New Year's Day")
+
+    add(_nth_weekday(year, 1, 0, 3), 'Martin Luther King Jr. Day')
+    add(_nth_weekday(year, 2, 0, 3), "Presidents' Day")
+    add(_easter_sunday(year) - timedelta(days=2), 'Good Friday')
+    add(_nth_weekday(year, 5, 0, -1), 'Memorial Day')
+    if year >= 2022:
+        add(_observed(date(year, 6, 19)), 'Juneteenth')
+
+    independence_day = _observed(date(year, 7, 4))
+    add(independence_day, 'Independence Day')
+    add(independence_day - timedelta(days=1), 'Independence Day Eve', 'early_close')
+
+    add(_nth_weekday(year, 9, 0, 1), 'Labor Day')
+
+    thanksgiving = _nth_weekday(year, 11, 3, 4)
+    add(thanksgiving, 'Thanksgiving Day')
+    add(thanksgiving + timedelta(days=1), 'Day after Thanksgiving', 'early_close')
+
+    christmas = _observed(date(year, 12, 25))
+    add(christmas, 'Christmas Day')
+    if christmas == date(year, 12, 25):
+        add(date(year, 12, 24), 'Christmas Eve', 'early_close')
+
+    return holidays
+
+def get_holiday(day: DateLike, category: str = DEFAULT_CATEGORY) -> Optional[Dict]:
+    """Restituisce la festività CME della data per la categoria o None"""
+    day = _as_date(day)
+    return get_holidays(day.year, category).get(day)
+
+def is_trading_day(day: DateLike, category: str = DEFAULT_CATEGORY) -> bool:
+    """
+    Verifica se la data è una trade date valida per la categoria
+
+    Args:
+        day: Data da verificare
+        category: Categoria strumento (equity_index, forex_major, ...)
+
+    Returns:
+        True se esiste una sessione di trading per quella data
+    """
+    day = _as_date(day)
+    if day.weekday() >= 5:
+        return False
+
+    holiday = get_holiday(day, category)
+    return holiday is None or holiday['kind'] != 'closed'
+
+def previous_trading_day(reference: DateLike, category: str = DEFAULT_CATEGORY) -> datetime:
+    """
+    Trade date più recente strettamente precedente alla data di riferimento
+
+    Args:
+        reference: Data di riferimento (tipicamente oggi)
+        category: Categoria strumento
+
+    Returns:
+        datetime (mezzanotte) della sessione precedente
+    """
+    day = _as_date(reference) - timedelta(days=1)
+    while not is_trading_day(day, category):
+        day -= timedelta(days=1)
+    return datetime.combine(day, time())
+
+def previous_trading_days(reference: DateLike, categories: Iterable[str]) -> Dict[datetime, List[str]]:
+    """
+    Sessione precedente di ciascuna categoria, raggruppata per trade date.
+    Il giorno dopo una festività solo USA le categorie con 'holiday_sessions'
+    hanno come sessione precedente la festività stessa, le altre il giorno di
+    borsa prima: una sola data per tutti gli strumenti ne salterebbe una.
+
+    Args:
+        reference: Data di riferimento (tipicamente oggi)
+        categories: Categorie strumento
+
+    Returns:
+        Dizionario trade date -> categorie, in ordine di data
+    """
+    groups: Dict[datetime, List[str]] = {}
+    for category in dict.fromkeys(categories):
+        groups.setdefault(previous_trading_day(reference, category), []).append(category)
+    return dict(sorted(groups.items()))
+
+def _chicago_utc_offset(day: date) -> timedelta:
+    """Offset UTC di Chicago per il giorno indicato (regole DST USA dal 2007)"""
+    dst_start = _nth_weekday(day.year, 3, 6, 2)   # Seconda domenica di marzo
+    dst_end = _nth_weekday(day.year, 11, 6, 1)    # Prima domenica di novembre
+    return CHICAGO_DST_OFFSET if dst_start <= day < dst_end else CHICAGO_STANDARD_OFFSET
+
+def _chicago_to_utc(day: date, local_time: time) -> datetime:
+    """Converte un orario locale di Chicago in datetime UTC"""
+    local = datetime.combine(day, local_time)
+    return (local - _chicago_utc_offset(day)).replace(tzinfo=timezone.utc)
+
+def get_session_window(trade_date: DateLike, category: str = DEFAULT_CATEGORY) -> Optional[Tuple[datetime, datetime]]:
+    """
+    Finestra temporale UTC della sessione Globex per una trade date
+
+    Args:
+        trade_date: Trade date della sessione
+        category: Categoria strumento
+
+    Returns:
+        Tupla (inizio, fine) in UTC o None se il mercato è chiuso
+    """
+    day = _as_date(trade_date)
+    if not is_trading_day(day, category):
+        return None
+
+    template = _template(category)
+
+    holiday = get_holiday(day, category)
+    close_time = template['early_close'] if holiday else template['close']
+
+    session_start = _chicago_to_utc(day - timedelta(days=1), template['open'])
+    session_end = _chicago_to_utc(day, close_time)
+
+    return session_start, session_end
+
+def next_trading_day(reference: DateLike, category: str = DEFAULT_CATEGORY) -> datetime:
+    """
+    Prima trade date strettamente successiva alla data di riferimento
+
+    Args:
+        reference: Data di riferimento
+        category: Categoria strumento
+
+    Returns:
+        datetime (mezzanotte) della sessione successiva
+    """
+    day = _as_date(reference) + timedelta(days=1)
+    while not is_trading_day(day, category):
+        day += timedelta(days=1)
+    return datetime.combine(day, time())
+
+def trade_date_for(moment: datetime, category: str = DEFAULT_CATEGORY) -> datetime:
+    """
+    Trade date della sessione in corso (o della prossima) all'istante indicato
+
+    Args:
+        moment: Istante di riferimento (naive = ora locale del sistema)
+        category: Categoria strumento
+
+    Returns:
+        datetime (mezzanotte) della trade date corrispondente
+    """
+    if moment.tzinfo is None:
+        moment = moment.astimezone()
+    utc_moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    chicago_moment = utc_moment + _chicago_utc_offset(utc_moment.date())
+
+    template = _template(category)
+
+    # Dopo l'apertura serale si negozia già la trade date del giorno dopo
+    day = chicago_moment.date()
+    if chicago_moment.time() >= template['open']:
+        day += timedelta(days=1)
+
+    if is_trading_day(day, category):
+        return datetime.combine(day, time())
+    return next_trading_day(day, category)
@@ -10,25 +10,26 @@ Funzionalità principali:
 - Salvataggio in formato CSV nella directory data_lake/
 """
 
-import requests
 import pandas as pd
 import os
 import sys
+import argparse
 import logging
+import threading
 import time
-from datetime import datetime, timedelta
+from datetime import datetime, timezone
 from typing import Dict, List, Optional, Tuple
 import json
 
-# Configurazione logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('data_pipeline.log'),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+from exchange_calendar import get_session_window, previous_trading_days, trade_date_for
+from http_cache import is_replay_mode
+from http_client import create_session
+from lake_io import LAKE_FSYNC, append_line, lake_lock, write_csv_atomic, write_json_atomic
+from pipeline_metrics import PipelineMetrics
+from pipeline_logging import setup_logging
+from bar_sources import FinnhubBarSource, HedgedBarAcquirer, MT5BridgeBarSource, MT5_FALLBACK_ENABLED
+
+# Configurazione logging (handler installati da setup_logging nell'entry point)
 logger = logging.getLogger(__name__)
 
 # Directory di destinazione per i dati
@@ -52,7 +53,8 @@ FUTURES_INSTRUMENTS = {
         'description': 'Chicago Mercantile Exchange E-mini S&P 500',
         'tick_size': 0.25,
         'contract_size': 50,
-        'category': 'equity_index'
+        'category': 'equity_index',
+        'mt5_symbols': ['US500', 'SPX500', 'SP500']  # Simboli CFD per il fallback bridge MT5
     },
     'NQ': {
         'name': 'E-mini Nasdaq 100 Future',
@@ -61,7 +63,8 @@ FUTURES_INSTRUMENTS = {
         'description': 'Chicago Mercantile Exchange E-mini Nasdaq 100',
         'tick_size': 0.25,
         'contract_size': 20,
-        'category': 'equity_index'
+        'category': 'equity_index',
+        'mt5_symbols': ['US100', 'NAS100', 'NDX']
     },
     'EUR': {
         'name': 'Euro FX Future (CME)',
@@ -71,7 +74,8 @@ FUTURES_INSTRUMENTS = {
         'description': 'CME Euro/US Dollar Currency Future',
         'tick_size': 0.00005,
         'contract_size': 125000,
-        'category': 'forex_major'
+        'category': 'forex_major',
+        'mt5_symbols': ['EURUSD']
     },
     'GBP': {
         'name': 'British Pound Future (CME)', 
@@ -81,7 +85,8 @@ FUTURES_INSTRUMENTS = {
         'description': 'CME British Pound/US Dollar Currency Future',
         'tick_size': 0.0001,
         'contract_size': 62500,
-        'category': 'forex_major'
+        'category': 'forex_major',
+        'mt5_symbols': ['GBPUSD']
     },
     'JPY': {
         'name': 'Japanese Yen Future (CME)',
@@ -91,7 +96,8 @@ FUTURES_INSTRUMENTS = {
         'description': 'CME US Dollar/Japanese Yen Currency Future',
         'tick_size': 0.000001,
         'contract_size': 12500000,
-        'category': 'forex_major'
+        'category': 'forex_major',
+        'mt5_symbols': ['USDJPY']
     },
     'CHF': {
         'name': 'Swiss Franc Future (CME)',
@@ -101,7 +107,8 @@ FUTURES_INSTRUMENTS = {
         'description': 'CME US Dollar/Swiss Franc Currency Future',
         'tick_size': 0.0001,
         'contract_size': 125000,
-        'category': 'forex_major'
+        'category': 'forex_major',
+        'mt5_symbols': ['USDCHF']
     },
     'AUD': {
         'name': 'Australian Dollar Future (CME)',
@@ -111,7 +118,8 @@ FUTURES_INSTRUMENTS = {
         'description': 'CME Australian Dollar/US Dollar Currency Future',
         'tick_size': 0.0001,
         'contract_size': 100000,
-        'category': 'forex_major'
+        'category': 'forex_major',
+        'mt5_symbols': ['AUDUSD']
     },
     'GOLD': {
         'name': 'Gold Future',
@@ -120,7 +128,8 @@ FUTURES_INSTRUMENTS = {
         'description': 'COMEX Gold Future',
         'tick_size': 0.10,
         'contract_size': 100,  # 100 troy ounces
-        'category': 'precious_metals'
+        'category': 'precious_metals',
+        'mt5_symbols': ['XAUUSD', 'GOLD']
     },
     'SILVER': {
         'name': 'Silver Future',
@@ -129,7 +138,8 @@ FUTURES_INSTRUMENTS = {
         'description': 'COMEX Silver Future',
         'tick_size': 0.005,
         'contract_size': 5000,  # 5000 troy ounces
-        'category': 'precious_metals'
+        'category': 'precious_metals',
+        'mt5_symbols': ['XAGUSD', 'SILVER']
     },
     'CRUDE': {
         'name': 'Crude Oil Future',
@@ -138,7 +148,8 @@ FUTURES_INSTRUMENTS = {
         'description': 'NYMEX Light Sweet Crude Oil',
         'tick_size': 0.01,
         'contract_size': 1000,  # 1000 barrels
-        'category': 'energy'
+        'category': 'energy',
+        'mt5_symbols': ['USOIL', 'XTIUSD', 'WTI']
     }
 }
 
@@ -149,17 +160,39 @@ TIMEFRAME_CONFIG = {
     '60': {'name': '1 ora', 'seconds': 3600}  # Backup per volumi aggregati
 }
 
+# Ordine standard delle colonne nei file intraday
+FUTURES_COLUMNS_ORDER = [
+    'datetime', 'timestamp', 'instrument', 'symbol_used',
+    'open', 'high', 'low', 'close', 'volume', 'resolution_minutes'
+]
+
+# Configurazione modalità daemon (ingestione intraday continua)
+DAEMON_POLL_MINUTES = 5
+DAEMON_RATE_BUDGET_SHARE = 0.8  # Quota del rate limit utilizzabile per ciclo
+INGESTION_EVENTS_FILE = 'ingestion_events.jsonl'
+
 class FinnhubDataFetcher:
     """Classe per l'acquisizione dei dati da Finnhub API"""
     
-    def __init__(self, api_key: str = FINNHUB_API_KEY):
+    def __init__(self, api_key: str = FINNHUB_API_KEY, metrics: Optional[PipelineMetrics] = None):
         self.api_key = api_key
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.metrics = metrics or PipelineMetrics('futures')
+        self.session = create_session({
             'X-Finnhub-Token': api_key,
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
+        }, self.metrics)
         self.last_request_time = 0
+        self.request_count = 0  # Chiamate API effettuate (budget del daemon)
+        self._rate_lock = threading.Lock()
+        
+        # Sorgente delle barre: Finnhub con fallback hedged sul bridge MT5
+        finnhub_source = FinnhubBarSource(self)
+        if MT5_FALLBACK_ENABLED:
+            mt5_source = MT5BridgeBarSource()
+            self.metrics.instrument_session(mt5_source.session)
+            self.bar_source = HedgedBarAcquirer(finnhub_source, mt5_source, metrics=self.metrics)
+        else:
+            self.bar_source = finnhub_source
         
         if api_key == 'demo':
             logger.warning("⚠️ Usando API key demo di Finnhub - funzionalità limitate")
@@ -167,16 +200,23 @@ class FinnhubDataFetcher:
             logger.info("✅ Configurata API key Finnhub personalizzata")
     
     def _enforce_rate_limit(self):
-        """Applica il rate limiting per rispettare i limiti API"""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        
-        if time_since_last < RATE_LIMIT_DELAY:
-            sleep_time = RATE_LIMIT_DELAY - time_since_last
-            logger.debug(f"Rate limiting: aspetto {sleep_time:.2f} secondi")
-            time.sleep(sleep_time)
-        
-        self.last_request_time = time.time()
+        """Applica il rate limiting per rispettare i limiti API (thread-safe)"""
+        with self._rate_lock:
+            self.request_count += 1
+            
+            # In replay le risposte arrivano dalla cache locale: nessun limite da rispettare
+            if is_replay_mode():
+                return
+            
+            current_time = time.time()
+            time_since_last = current_time - self.last_request_time
+            
+            if time_since_last < RATE_LIMIT_DELAY:
+                sleep_time = RATE_LIMIT_DELAY - time_since_last
+                logger.debug(f"Rate limiting: aspetto {sleep_time:.2f} secondi")
+                self.metrics.sleep(sleep_time)
+            
+            self.last_request_time = time.time()
     
     def test_api_connection(self) -> bool:
         """
@@ -262,7 +302,8 @@ class FinnhubDataFetcher:
             logger.error(f"❌ Errore richiesta dati per {symbol}: {e}")
             return None
     
-    def try_multiple_symbols(self, instrument_config: Dict, resolution: str, from_ts: int, to_ts: int) -> Optional[Dict]:
+    def try_multiple_symbols(self, instrument_config: Dict, resolution: str, from_ts: int, to_ts: int,
+                             cancel_event: Optional[threading.Event] = None) -> Optional[Dict]:
         """
         Prova diversi simboli per un strumento fino a trovare dati validi
         
@@ -271,6 +312,7 @@ class FinnhubDataFetcher:
             resolution: Risoluzione temporale
             from_ts: Timestamp di inizio
             to_ts: Timestamp di fine
+            cancel_event: Evento che interrompe i tentativi (richiesta hedged già soddisfatta)
             
         Returns:
             Dati trovati per il primo simbolo valido o None
@@ -350,6 +392,10 @@ class FinnhubDataFetcher:
         logger.info(f"Tentativo acquisizione {instrument_config['name']} ({category})")
         
         for i, symbol_format in enumerate(symbol_formats):
+            if cancel_event is not None and cancel_event.is_set():
+                logger.debug(f"Tentativi interrotti per {instrument_config['name']}: risposta già ottenuta")
+                return None
+            
             logger.debug(f"Tentativo {i+1}/{len(symbol_formats)} con simbolo: {symbol_format}")
             
             data = self.get_forex_candles(symbol_format, resolution, from_ts, to_ts)
@@ -358,8 +404,9 @@ class FinnhubDataFetcher:
                 logger.info(f"✅ Dati trovati per {instrument_config['name']} con simbolo: {symbol_format}")
                 return {**data, 'symbol_used': symbol_format}
                 
-            # Pausa tra i tentativi per rispettare il rate limit
-            time.sleep(0.3)
+            # Tentativo a vuoto: pausa tra i tentativi per rispettare il rate limit
+            self.metrics.add('symbol_probes_wasted')
+            self.metrics.sleep(0.3)
         
         logger.warning(f"⚠️ Nessun simbolo valido trovato per {instrument_config['name']} ({category})")
         return None
@@ -381,24 +428,77 @@ class FinnhubDataFetcher:
             return pd.DataFrame()
         
         config = FUTURES_INSTRUMENTS[instrument]
+        category = config.get('category', 'equity_index')
         
-        # Calcola timestamp per la sessione di trading del giorno target
-        start_time = target_date.replace(hour=0, minute=0, second=0, microsecond=0)
-        end_time = target_date.replace(hour=23, minute=59, second=59, microsecond=999999)
+        # Calcola la finestra della sessione Globex della trade date (UTC)
+        session_window = get_session_window(target_date, category)
         
+        if session_window is None:
+            logger.info(f"📅 Mercato chiuso per {instrument} il {target_date.strftime('%Y-%m-%d')} - nessuna richiesta")
+            return pd.DataFrame()
+        
+        start_time, end_time = session_window
         from_ts = int(start_time.timestamp())
         to_ts = int(end_time.timestamp())
         
         logger.info(f"Acquisizione dati {config['name']} per {target_date.strftime('%Y-%m-%d')}")
-        logger.info(f"Periodo: {start_time} - {end_time} (risoluzione: {resolution}m)")
+        logger.info(f"Sessione: {start_time} - {end_time} (risoluzione: {resolution}m)")
         
-        # Prova diversi simboli per questo strumento
-        raw_data = self.try_multiple_symbols(config, resolution, from_ts, to_ts)
+        # Prova diversi simboli per questo strumento (con fallback hedged)
+        raw_data = self.bar_source.fetch_bars(config, resolution, from_ts, to_ts)
         
         if not raw_data:
             return pd.DataFrame()
         
-        # Converte i dati in DataFrame
+        with self.metrics.timer('parse_seconds'):
+            return self._candles_to_dataframe(raw_data, instrument, resolution, from_ts, to_ts)
+    
+    def get_latest_bars(self, instrument: str, resolution: str, from_ts: int, to_ts: int,
+                        symbol_hint: Optional[str] = None) -> pd.DataFrame:
+        """
+        Ottiene solo le barre più recenti di uno strumento (modalità daemon)
+        
+        Args:
+            instrument: Codice strumento (ES, NQ, ...)
+            resolution: Risoluzione in minuti
+            from_ts: Timestamp di inizio (Unix)
+            to_ts: Timestamp di fine (Unix)
+            symbol_hint: Simbolo già validato nei cicli precedenti (evita i tentativi multipli)
+            
+        Returns:
+            DataFrame con le nuove barre OHLCV
+        """
+        config = FUTURES_INSTRUMENTS[instrument]
+        raw_data = None
+        
+        if symbol_hint and not symbol_hint.startswith('MT5:'):
+            raw_data = self.get_forex_candles(symbol_hint, resolution, from_ts, to_ts)
+            if raw_data:
+                raw_data = {**raw_data, 'symbol_used': symbol_hint}
+        
+        if not raw_data:
+            raw_data = self.bar_source.fetch_bars(config, resolution, from_ts, to_ts)
+        
+        if not raw_data:
+            return pd.DataFrame()
+        
+        with self.metrics.timer('parse_seconds'):
+            return self._candles_to_dataframe(raw_data, instrument, resolution, from_ts, to_ts)
+    
+    def _candles_to_dataframe(self, raw_data: Dict, instrument: str, resolution: str, from_ts: int, to_ts: int) -> pd.DataFrame:
+        """
+        Converte la risposta candle di Finnhub nel DataFrame standard della pipeline
+        
+        Args:
+            raw_data: Dati OHLCV grezzi ('t', 'o', 'h', 'l', 'c', 'v')
+            instrument: Codice strumento
+            resolution: Risoluzione in minuti
+            from_ts: Timestamp di inizio della finestra richiesta
+            to_ts: Timestamp di fine della finestra richiesta
+            
+        Returns:
+            DataFrame con i dati OHLCV
+        """
         try:
             df_data = {
                 'timestamp': raw_data['t'],
@@ -414,10 +514,8 @@ class FinnhubDataFetcher:
             # Converte timestamp in datetime
             df['datetime'] = pd.to_datetime(df['timestamp'], unit='s')
             
-            # Filtra solo i dati del giorno target per sicurezza
-            target_date_str = target_date.strftime('%Y-%m-%d')
-            df['date'] = df['datetime'].dt.date.astype(str)
-            df = df[df['date'] == target_date_str].copy()
+            # Filtra solo le barre della finestra richiesta per sicurezza
+            df = df[(df['timestamp'] >= from_ts) & (df['timestamp'] <= to_ts)].copy()
             
             # Aggiunge metadati
             df['instrument'] = instrument
@@ -425,11 +523,7 @@ class FinnhubDataFetcher:
             df['symbol_used'] = raw_data.get('symbol_used', 'unknown')
             
             # Riordina le colonne
-            columns_order = [
-                'datetime', 'timestamp', 'instrument', 'symbol_used', 
-                'open', 'high', 'low', 'close', 'volume', 'resolution_minutes'
-            ]
-            df = df.reindex(columns=columns_order)
+            df = df.reindex(columns=FUTURES_COLUMNS_ORDER)
             
             logger.info(f"✅ Processati {len(df)} record per {instrument}")
             return df
@@ -444,7 +538,8 @@ def ensure_data_lake_exists():
         os.makedirs(DATA_LAKE_DIR)
         logger.info(f"📁 Creata directory: {DATA_LAKE_DIR}")
 
-def save_futures_data(df: pd.DataFrame, instrument: str, target_date: datetime, resolution: str) -> str:
+def save_futures_data(df: pd.DataFrame, instrument: str, target_date: datetime, resolution: str,
+                      metrics: Optional[PipelineMetrics] = None) -> str:
     """
     Salva i dati dei futures in formato CSV standardizzato
     
@@ -453,6 +548,7 @@ def save_futures_data(df: pd.DataFrame, instrument: str, target_date: datetime,
         instrument: Codice strumento (ES, NQ)
         target_date: Data di riferimento
         resolution: Risoluzione temporale usata
+        metrics: Metriche della pipeline (opzionale)
         
     Returns:
         Path del file salvato
@@ -465,18 +561,203 @@ def save_futures_data(df: pd.DataFrame, instrument: str, target_date: datetime,
     filename = f"{date_str}_{instrument}_intraday_{resolution}m.csv"
     filepath = os.path.join(DATA_LAKE_DIR, filename)
     
-    df.to_csv(filepath, index=False)
+    # Lock esclusivo: il file può essere aggiornato sul posto da upsert_futures_bars
+    with lake_lock(filepath):
+        write_csv_atomic(df, filepath, index=False)
     logger.info(f"💾 Dati {instrument} salvati: {filepath} ({len(df)} record)")
     
+    if metrics:
+        metrics.add('rows_written', len(df))
+    
     return filepath
 
-def generate_summary_report(results: Dict[str, str], target_date: datetime) -> str:
+def _read_last_bar(filepath: str) -> Tuple[Optional[int], Optional[int]]:
     """
-    Genera un report riassuntivo dell'acquisizione
+    Legge timestamp e offset in byte dell'ultima barra di un file intraday
+    senza caricare l'intero file
+    
+    Args:
+        filepath: Path del file CSV intraday
+        
+    Returns:
+        Tupla (timestamp ultima barra, offset di inizio riga) o (None, None)
+        se il file contiene solo l'header
+        
+    Raises:
+        ValueError: Header o ultima riga non interpretabili (o senza newline finale)
+    """
+    with open(filepath, 'rb') as f:
+        header = f.readline().decode('utf-8', errors='replace').strip().split(',')
+        if 'timestamp' not in header:
+            raise ValueError(f"Header senza colonna timestamp: {filepath}")
+        ts_index = header.index('timestamp')
+        
+        f.seek(0, os.SEEK_END)
+        file_size = f.tell()
+        tail_size = min(file_size, 64 * 1024)
+        f.seek(file_size - tail_size)
+        tail = f.read()
+    
+    if not tail.endswith(b'\n'):
+        raise ValueError(f"Ultima riga incompleta: {filepath}")
+    
+    lines = tail.rstrip(b'\r\n').split(b'\n')
+    if len(lines) < 2 and tail_size == file_size:
+        return None, None  # Solo header
+    
+    last_line = lines[-1]
+    last_offset = file_size - len(tail) + len(tail.rstrip(b'\r\n')) - len(last_line)
+    
+    try:
+        last_ts = int(float(last_line.decode('utf-8').strip().split(',')[ts_index]))
+    except (UnicodeDecodeError, ValueError, IndexError):
+        raise ValueError(f"Ultima riga non interpretabile: {filepath}")
+    
+    return last_ts, last_offset
+
+def _rewrite_merged_bars(filepath: str, df: pd.DataFrame) -> int:
+    """
+    Fallback dell'upsert quando la coda del file non è interpretabile (riga
+    troncata da un crash, header corrotto): rilegge tutto il file scartando
+    le righe illeggibili, unisce le nuove barre deduplicando per timestamp
+    e riscrive il file in modo atomico. Va chiamata sotto lake_lock.
+    
+    Args:
+        filepath: Path del file CSV intraday
+        df: Nuove barre (colonne FUTURES_COLUMNS_ORDER)
+        
+    Returns:
+        Numero di barre scritte (nuove o aggiornate)
+    """
+    try:
+        existing = pd.read_csv(filepath, on_bad_lines='skip', encoding_errors='replace')
+    except (pd.errors.EmptyDataError, pd.errors.ParserError):
+        existing = pd.DataFrame(columns=FUTURES_COLUMNS_ORDER)
+    
+    existing = existing.reindex(columns=FUTURES_COLUMNS_ORDER)
+    existing['timestamp'] = pd.to_numeric(existing['timestamp'], errors='coerce')
+    existing = existing.dropna(subset=['timestamp'])
+    existing['timestamp'] = existing['timestamp'].astype('int64')
+    
+    new_timestamps = set(df['timestamp'].astype('int64'))
+    existing = existing[~existing['timestamp'].isin(new_timestamps)]
+    merged = (pd.concat([existing, df], ignore_index=True)
+              .sort_values('timestamp')
+              .drop_duplicates(subset='timestamp', keep='last'))
+    
+    write_csv_atomic(merged, filepath, index=False)
+    return len(df)
+
+def upsert_futures_bars(df: pd.DataFrame, instrument: str, target_date: datetime, resolution: str) -> int:
+    """
+    Aggiunge nuove barre al file intraday della trade date senza riscriverlo.
+    L'ultima barra già salvata (potenzialmente incompleta) viene sostituita
+    troncando il file al suo inizio prima dell'append. Troncamento e append
+    avvengono sotto lock esclusivo: i lettori con lock condiviso
+    (load_futures_data) non vedono mai il file senza l'ultima barra.
+    Se l'ultima riga non è interpretabile il file viene riletto per intero,
+    deduplicato e riscritto in modo atomico.
+    
+    Args:
+        df: DataFrame con le barre più recenti
+        instrument: Codice strumento
+        target_date: Trade date di riferimento
+        resolution: Risoluzione temporale usata
+        
+    Returns:
+        Numero di barre scritte (nuove o aggiornate)
+    """
+    if df.empty:
+        return 0
+    
+    date_str = target_date.strftime('%Y-%m-%d')
+    filename = f"{date_str}_{instrument}_intraday_{resolution}m.csv"
+    filepath = os.path.join(DATA_LAKE_DIR, filename)
+    
+    df = df.reindex(columns=FUTURES_COLUMNS_ORDER).sort_values('timestamp')
+    
+    with lake_lock(filepath):
+        if not os.path.exists(filepath):
+            write_csv_atomic(df, filepath, index=False)
+            return len(df)
+        
+        try:
+            last_ts, last_offset = _read_last_bar(filepath)
+        except ValueError as e:
+            logger.warning("⚠️ Coda di %s non interpretabile (%s): riscrittura completa", filepath, e)
+            written = _rewrite_merged_bars(filepath, df)
+            logger.info("💾 Upsert %s: %d barre in %s (riscrittura)", instrument, written, filepath)
+            return written
+        
+        if last_ts is not None:
+            df = df[df['timestamp'] >= last_ts]
+            if df.empty:
+                return 0
+        
+        # Barre serializzate prima del troncamento: lock tenuto solo per la scrittura
+        payload = df.to_csv(index=False, header=False).encode('utf-8')
+        
+        with open(filepath, 'r+b') as f:
+            # La barra più recente sul disco viene aggiornata con quella nuova
+            if last_ts is not None and int(df.iloc[0]['timestamp']) == last_ts:
+                f.truncate(last_offset)
+            f.seek(0, os.SEEK_END)
+            f.write(payload)
+            f.flush()
+            if LAKE_FSYNC:
+                os.fsync(f.fileno())
+    
+    logger.info(f"💾 Upsert {instrument}: {len(df)} barre in {filepath}")
+    return len(df)
+
+# Callback registrate per la notifica "data updated"
+DATA_UPDATE_LISTENERS = []
+
+def register_update_listener(callback):
+    """Registra una callback invocata ad ogni aggiornamento dei dati intraday"""
+    DATA_UPDATE_LISTENERS.append(callback)
+
+def notify_data_updated(instrument: str, target_date: datetime, resolution: str, rows: int, last_timestamp: int):
+    """
+    Emette la notifica "data updated" per l'analytics a valle: una riga JSON
+    nel file eventi della data lake e le callback registrate in-process
+    
+    Args:
+        instrument: Codice strumento aggiornato
+        target_date: Trade date aggiornata
+        resolution: Risoluzione del file aggiornato
+        rows: Numero di barre scritte
+        last_timestamp: Timestamp dell'ultima barra disponibile
+    """
+    event = {
+        'event': 'data_updated',
+        'dataset': 'futures_intraday',
+        'instrument': instrument,
+        'trade_date': target_date.strftime('%Y-%m-%d'),
+        'resolution_minutes': int(resolution),
+        'rows_upserted': rows,
+        'last_timestamp': last_timestamp,
+        'emitted_at': datetime.now().isoformat()
+    }
+    
+    events_path = os.path.join(DATA_LAKE_DIR, INGESTION_EVENTS_FILE)
+    append_line(events_path, json.dumps(event))
+    
+    for callback in DATA_UPDATE_LISTENERS:
+        try:
+            callback(event)
+        except Exception as e:
+            logger.error(f"❌ Errore listener data updated: {e}")
+
+def generate_summary_report(results: Dict[str, str], target_date: datetime,
+                            metrics: Optional[PipelineMetrics] = None) -> str:
+    """
+    Genera un report riassuntivo dell'acquisizione con le metriche per stage
     
     Args:
         results: Dizionario con i risultati per strumento
         target_date: Data di riferimento
+        metrics: Metriche della pipeline (incluse nel report e nel textfile Prometheus)
         
     Returns:
         Path del file di report
@@ -494,83 +775,103 @@ def generate_summary_report(results: Dict[str, str], target_date: datetime) -> s
         'total_instruments': len(FUTURES_INSTRUMENTS)
     }
     
-    with open(report_path, 'w') as f:
-        json.dump(report_data, f, indent=2)
+    if metrics:
+        report_data['metrics'] = metrics.to_dict()
+        metrics.write_prometheus_textfile()
+    
+    write_json_atomic(report_path, report_data, indent=2)
     
     logger.info(f"📊 Report salvato: {report_path}")
     return report_path
 
+def _acquire_instrument(fetcher: FinnhubDataFetcher, instrument_code: str, instrument_config: Dict,
+                       target_date: datetime, metrics: PipelineMetrics) -> Optional[str]:
+    """
+    Acquisisce e salva i dati intraday di uno strumento (5m con fallback 15m)
+    
+    Returns:
+        Path del file salvato o None
+    """
+    logger.info(f"📈 Acquisizione dati per {instrument_config['name']}")
+    
+    # Prova prima con risoluzione 5 minuti
+    df = fetcher.get_intraday_data(instrument_code, target_date, '5')
+    
+    if df.empty:
+        # Fallback a 15 minuti se 5 minuti non disponibile
+        logger.info(f"🔄 Tentativo con risoluzione 15 minuti per {instrument_code}")
+        df = fetcher.get_intraday_data(instrument_code, target_date, '15')
+    
+    if df.empty:
+        logger.error(f"❌ Nessun dato disponibile per {instrument_code}")
+        return None
+    
+    # Salva i dati
+    resolution_used = str(df.iloc[0]['resolution_minutes'])
+    saved_path = save_futures_data(df, instrument_code, target_date, resolution_used, metrics)
+    
+    if not saved_path:
+        logger.error(f"❌ Errore salvataggio dati {instrument_code}")
+        return None
+    
+    logger.info(f"✅ Dati {instrument_code} acquisiti con successo")
+    return saved_path
+
 def main():
     """Funzione principale per l'acquisizione giornaliera dei dati futures"""
     logger.info("🚀 Avvio acquisizione dati volumetrici futures")
     
-    # Determina la data target (sessione di trading precedente)
-    today = datetime.now()
-    
-    # Se oggi è lunedì, prendi i dati di venerdì
-    if today.weekday() == 0:  # Lunedì
-        target_date = today - timedelta(days=3)
-    # Se oggi è fine settimana, prendi i dati di venerdì  
-    elif today.weekday() >= 5:  # Sabato o domenica
-        days_back = today.weekday() - 4
-        target_date = today - timedelta(days=days_back)
-    else:
-        # Altrimenti prendi i dati del giorno precedente
-        target_date = today - timedelta(days=1)
+    # Data target per categoria (sessione di trading precedente, festività escluse):
+    # il giorno dopo una festività solo USA FX e metalli hanno la festività come trade date
+    categories = [config.get('category', 'equity_index') for config in FUTURES_INSTRUMENTS.values()]
+    target_dates = previous_trading_days(datetime.now(), categories)
     
-    logger.info(f"📅 Data target per acquisizione: {target_date.strftime('%Y-%m-%d')}")
+    for target_date, date_categories in target_dates.items():
+        logger.info(f"📅 Data target per acquisizione: {target_date.strftime('%Y-%m-%d')} ({', '.join(date_categories)})")
     
     ensure_data_lake_exists()
     
     # Inizializza fetcher
-    fetcher = FinnhubDataFetcher()
+    metrics = PipelineMetrics('futures')
+    fetcher = FinnhubDataFetcher(metrics=metrics)
     
     # Testa la connessione API
-    if not fetcher.test_api_connection():
+    with metrics.stage('connection_test'):
+        connected = fetcher.test_api_connection()
+    
+    if not connected:
         logger.error("💥 Impossibile connettersi all'API Finnhub")
         return 2
     
-    results = {}
     success_count = 0
+    total_instruments = 0
     
-    # Acquisisce dati per ogni strumento
-    for instrument_code, instrument_config in FUTURES_INSTRUMENTS.items():
-        try:
-            logger.info(f"📈 Acquisizione dati per {instrument_config['name']}")
-            
-            # Prova prima con risoluzione 5 minuti
-            df = fetcher.get_intraday_data(instrument_code, target_date, '5')
-            
-            if df.empty:
-                # Fallback a 15 minuti se 5 minuti non disponibile
-                logger.info(f"🔄 Tentativo con risoluzione 15 minuti per {instrument_code}")
-                df = fetcher.get_intraday_data(instrument_code, target_date, '15')
-            
-            if not df.empty:
-                # Salva i dati
-                resolution_used = str(df.iloc[0]['resolution_minutes'])
-                saved_path = save_futures_data(df, instrument_code, target_date, resolution_used)
+    for target_date, date_categories in target_dates.items():
+        instruments = {
+            code: config for code, config in FUTURES_INSTRUMENTS.items()
+            if config.get('category', 'equity_index') in date_categories
+        }
+        results = {}
+        
+        # Acquisisce dati per ogni strumento
+        for instrument_code, instrument_config in instruments.items():
+            try:
+                with metrics.stage(f"instrument_{instrument_code}"):
+                    saved_path = _acquire_instrument(fetcher, instrument_code, instrument_config, target_date, metrics)
                 
+                results[instrument_code] = saved_path
                 if saved_path:
-                    results[instrument_code] = saved_path
                     success_count += 1
-                    logger.info(f"✅ Dati {instrument_code} acquisiti con successo")
-                else:
-                    results[instrument_code] = None
-                    logger.error(f"❌ Errore salvataggio dati {instrument_code}")
-            else:
+                    
+            except Exception as e:
+                logger.error(f"❌ Errore acquisizione {instrument_code}: {e}")
                 results[instrument_code] = None
-                logger.error(f"❌ Nessun dato disponibile per {instrument_code}")
-                
-        except Exception as e:
-            logger.error(f"❌ Errore acquisizione {instrument_code}: {e}")
-            results[instrument_code] = None
-    
-    # Genera report riassuntivo
-    report_path = generate_summary_report(results, target_date)
+        
+        # Genera report riassuntivo della data
+        generate_summary_report(results, target_date, metrics)
+        total_instruments += len(instruments)
     
     # Report finale
-    total_instruments = len(FUTURES_INSTRUMENTS)
     logger.info(f"📊 Acquisizione completata: {success_count}/{total_instruments} strumenti")
     
     if success_count == total_instruments:
@@ -583,7 +884,109 @@ def main():
         logger.error("💥 Acquisizione fallita completamente")
         return 2
 
+def run_ingestion_daemon(interval_minutes: float = DAEMON_POLL_MINUTES, resolution: str = '5',
+                         max_cycles: Optional[int] = None) -> int:
+    """
+    Modalità daemon: interroga periodicamente solo le barre più recenti di
+    ogni strumento e le aggiunge al dataset della trade date corrente
+    
+    Args:
+        interval_minutes: Intervallo tra i cicli di polling
+        resolution: Risoluzione in minuti delle barre
+        max_cycles: Numero massimo di cicli (None = infinito)
+        
+    Returns:
+        Exit code (0 = terminato regolarmente)
+    """
+    logger.info(f"🔁 Avvio daemon ingestione intraday (ogni {interval_minutes} min, {resolution}m)")
+    
+    ensure_data_lake_exists()
+    fetcher = FinnhubDataFetcher()
+    
+    # Budget di chiamate per ciclo entro il rate limit del piano
+    calls_budget = max(1, int(RATE_LIMIT_CALLS_PER_MINUTE * interval_minutes * DAEMON_RATE_BUDGET_SHARE))
+    symbol_hints = {}
+    instruments = list(FUTURES_INSTRUMENTS.keys())
+    cycle = 0
+    
+    try:
+        while max_cycles is None or cycle < max_cycles:
+            cycle_start = time.time()
+            calls_at_start = fetcher.request_count
+            now = datetime.now(timezone.utc)
+            
+            # Ruota l'ordine per non penalizzare sempre gli ultimi strumenti
+            offset = cycle % len(instruments)
+            
+            for instrument in instruments[offset:] + instruments[:offset]:
+                if fetcher.request_count - calls_at_start >= calls_budget:
+                    logger.warning("⚠️ Budget chiamate del ciclo esaurito, strumenti rimanenti al prossimo ciclo")
+                    break
+                
+                try:
+                    category = FUTURES_INSTRUMENTS[instrument].get('category', 'equity_index')
+                    trade_date = trade_date_for(now, category)
+                    session_start, session_end = get_session_window(trade_date, category)
+                    
+                    if now < session_start:
+                        continue  # Sessione non ancora aperta: nessuna chiamata
+                    
+                    filepath = os.path.join(
+                        DATA_LAKE_DIR, f"{trade_date.strftime('%Y-%m-%d')}_{instrument}_intraday_{resolution}m.csv"
+                    )
+                    last_ts = None
+                    if os.path.exists(filepath):
+                        try:
+                            with lake_lock(filepath, shared=True):
+                                last_ts = _read_last_bar(filepath)[0]
+                        except ValueError as e:
+                            # Coda non interpretabile: l'upsert riscrive il file dall'inizio sessione
+                            logger.warning("⚠️ Coda di %s non interpretabile (%s): richiesta dall'inizio sessione",
+                                           filepath, e)
+                    
+                    # Richiede dall'ultima barra salvata (inclusa, per aggiornarla)
+                    from_ts = last_ts if last_ts else int(session_start.timestamp())
+                    to_ts = int(min(now, session_end).timestamp())
+                    
+                    df = fetcher.get_latest_bars(instrument, resolution, from_ts, to_ts, symbol_hints.get(instrument))
+                    
+                    if df.empty:
+                        continue
+                    
+                    symbol_hints[instrument] = df.iloc[0]['symbol_used']
+                    rows = upsert_futures_bars(df, instrument, trade_date, resolution)
+                    
+                    if rows:
+                        notify_data_updated(instrument, trade_date, resolution, rows, int(df['timestamp'].max()))
+                except Exception as e:
+                    logger.error("❌ Errore ingestione %s: %s", instrument, e)
+            
+            cycle += 1
+            logger.info(f"✅ Ciclo {cycle} completato: {fetcher.request_count - calls_at_start} chiamate API")
+            
+            if max_cycles is not None and cycle >= max_cycles:
+                break
+            
+            elapsed = time.time() - cycle_start
+            time.sleep(max(0.0, interval_minutes * 60 - elapsed))
+            
+    except KeyboardInterrupt:
+        logger.info("🛑 Daemon ingestione interrotto dall'utente")
+    
+    return 0
+
+def parse_args():
+    """Parsing degli argomenti da linea di comando"""
+    parser = argparse.ArgumentParser(description='Acquisizione dati volumetrici futures da Finnhub')
+    parser.add_argument('--daemon', action='store_true', help='Ingestione intraday continua delle barre più recenti')
+    parser.add_argument('--interval', type=float, default=DAEMON_POLL_MINUTES, help='Minuti tra i cicli del daemon')
+    parser.add_argument('--resolution', choices=list(TIMEFRAME_CONFIG.keys()), default='5', help='Risoluzione barre del daemon')
+    return parser.parse_args()
+
 if __name__ == "__main__":
+    args = parse_args()
+    setup_logging()
+    
     # Controlla se è presente la variabile d'ambiente per l'API key
     if not os.environ.get('FINNHUB_API_KEY'):
         print("⚠️ AVVISO: Variabile d'ambiente FINNHUB_API_KEY non impostata")
@@ -596,5 +999,8 @@ if __name__ == "__main__":
         print("🧪 Procedendo con modalità demo (limitata)...")
         print("")
     
-    exit_code = main()
+    if args.daemon:
+        exit_code = run_ingestion_daemon(args.interval, args.resolution)
+    else:
+        exit_code = main()
     sys.exit(exit_code)
\ No newline at end of file
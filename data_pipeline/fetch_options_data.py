@@ -16,20 +16,31 @@ import pandas as pd
 import os
 import sys
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 import re
 import time
+import json
+import argparse
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 
-# Configurazione logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('data_pipeline.log'),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+try:
+    import pypdfium2
+    PDFIUM_AVAILABLE = True
+except ImportError:
+    PDFIUM_AVAILABLE = False
+
+from exchange_calendar import is_trading_day, previous_trading_day
+from http_client import HTTP_RETRY_TOTAL, create_session as create_http_session
+from lake_io import write_csv_atomic, write_json_atomic
+from pipeline_metrics import PipelineMetrics
+from pipeline_logging import init_worker_logging, setup_logging, worker_log_queue
+from bulletin_store import (BulletinStore, file_sha256, materialized_bulletin, raw_name,
+                            read_json_compressed, write_json_compressed)
+from option_records import OPTIONS_COLUMNS_ORDER, OptionColumnBuffer, days_to_expiry
+from settlement_parser import read_settlement_buffer
+
+# Configurazione logging (handler installati da setup_logging nell'entry point)
 logger = logging.getLogger(__name__)
 
 # Directory di destinazione per i dati
@@ -40,15 +51,61 @@ FUTURES_SYMBOLS = {
     'ES': {  # E-mini S&P 500
         'name': 'E-mini S&P 500',
         'cme_product_code': 'ES',
+        'section_headers': ['E-MINI S&P 500', 'EMINI S&P 500', 'S&P 500 E-MINI'],
         'option_patterns': [r'ES[0-9]+', r'E1A[0-9]+', r'E2A[0-9]+']
     },
     'NQ': {  # E-mini Nasdaq 100
         'name': 'E-mini Nasdaq 100', 
         'cme_product_code': 'NQ',
+        'section_headers': ['E-MINI NASDAQ', 'EMINI NASDAQ', 'NASDAQ-100 E-MINI', 'NASDAQ 100 E-MINI'],
         'option_patterns': [r'NQ[0-9]+', r'N1A[0-9]+', r'N2A[0-9]+']
     }
 }
 
+# Estrazione parallela del PDF: worker di processo e shard di pagine per worker
+PDF_EXTRACTION_WORKERS = int(os.environ.get('PDF_EXTRACTION_WORKERS', os.cpu_count() or 1))
+PDF_SHARDS_PER_WORKER = 2
+PDF_MIN_PAGES_PER_WORKER = 8  # Sotto questa soglia l'overhead dei processi non conviene
+
+# Pre-scan delle sezioni del bulletin (cache accanto al PDF, invalidata al cambio di versione/configurazione)
+SECTION_SCAN_VERSION = 1
+SECTION_SCAN_SUFFIX = '.sections.json'
+
+# Cache compressa del testo estratto per pagina (accanto al bulletin), invalidata
+# al cambio del contenuto del bulletin o della versione dell'estrattore
+PAGE_TEXT_CACHE_ENABLED = os.environ.get('PDF_TEXT_CACHE', '1') != '0'
+PAGE_TEXT_VERSION = 1
+PAGE_TEXT_SUFFIX = '.text.json'
+
+# Crop opzionale delle colonne della tabella: "x0,top,x1,bottom" in frazioni della pagina
+PDF_TABLE_CROP = tuple(float(v) for v in os.environ['PDF_TABLE_CROP'].split(',')) if os.environ.get('PDF_TABLE_CROP') else None
+
+# Daily Bulletin CME: pattern dei nomi file candidati ({date} = YYYYMMDD)
+CME_SETTLE_BASE_URL = "https://www.cmegroup.com/ftp/pub/settle/"
+BULLETIN_FILENAME_PATTERNS = [
+    'stl_{date}.txt',
+    'stl_{date}.pdf',
+    'settle_{date}.txt',
+    'daily_bulletin_{date}.pdf'
+]
+BULLETIN_SOURCE_FILE = os.path.join(DATA_LAKE_DIR, '.cme_bulletin_source.json')
+BULLETIN_HEDGE_DELAY = 2.0  # Secondi concessi al pattern ricordato prima di provare gli altri
+BULLETIN_CONNECT_TIMEOUT = 10
+BULLETIN_READ_TIMEOUT = 30
+
+# Put/Call Ratio CBOE: endpoint candidati ({date} = YYYY-MM-DD, {compact_date} = YYYYMMDD)
+CBOE_BASE_URL = "https://cdn.cboe.com/api/global/us_indices/market_statistics/"
+CBOE_ENDPOINTS = [
+    'pc_ratio_data.json?date={date}',
+    'daily_market_statistics_{compact_date}.csv',
+    'current_market_statistics.json'
+]
+CBOE_SOURCE_FILE = os.path.join(DATA_LAKE_DIR, '.cboe_endpoint_source.json')
+CBOE_HEDGE_DELAY = 1.0  # Secondi concessi all'endpoint ricordato prima di provare gli altri
+CBOE_CONNECT_TIMEOUT = 5
+CBOE_READ_TIMEOUT = 15
+CBOE_DEADLINE = float(os.environ.get('CBOE_DEADLINE', 20))  # Latenza massima complessiva prima del fallback
+
 # Headers per simulare un browser
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
@@ -59,13 +116,516 @@ HEADERS = {
     'Upgrade-Insecure-Requests': '1',
 }
 
+# Riga di opzione, formato tipico: SYMBOL STRIKE C/P VOLUME OPEN_INTEREST
+OPTION_LINE_PATTERN = re.compile(r'([A-Z0-9]+)\s+([0-9]+(?:\.[0-9]+)?)\s+([CP])\s+([0-9]+)\s+([0-9]+)')
+
+class BulletinLineParser:
+    """
+    Parser a passata singola del testo del bulletin per tutti i prodotti configurati.
+    I pattern dei simboli di opzione di ogni prodotto sono compilati in un'unica
+    alternanza con gruppi nominati: ogni riga viene estratta e classificata con
+    una ricerca ciascuno, indipendentemente dal numero di prodotti.
+    """
+    
+    def __init__(self, products: Optional[Dict[str, Dict]] = None):
+        products = FUTURES_SYMBOLS if products is None else products
+        
+        self.group_symbols = {}
+        alternatives = []
+        section_alternatives = []
+        for index, (symbol, config) in enumerate(products.items()):
+            group = f"p{index}"
+            self.group_symbols[group] = symbol
+            alternatives.append(f"(?P<{group}>{'|'.join(config['option_patterns'])})")
+            
+            headers = [r'\s*'.join(re.escape(word) for word in header.split()) for header in config.get('section_headers', [])]
+            if headers:
+                section_alternatives.append(f"(?P<{group}>{'|'.join(headers)})")
+        
+        self.product_pattern = re.compile('|'.join(alternatives)) if alternatives else None
+        self.section_pattern = re.compile('|'.join(section_alternatives), re.IGNORECASE) if section_alternatives else None
+    
+    def classify(self, line: str) -> Optional[str]:
+        """Prodotto a cui appartiene la riga (None se nessun pattern corrisponde)"""
+        if self.product_pattern is None:
+            return None
+        match = self.product_pattern.search(line)
+        return self.group_symbols[match.lastgroup] if match else None
+    
+    def section_of(self, line: str) -> Optional[str]:
+        """Prodotto della sezione se la riga ne contiene l'intestazione"""
+        if self.section_pattern is None:
+            return None
+        match = self.section_pattern.search(line)
+        return self.group_symbols[match.lastgroup] if match else None
+    
+    def parse_line(self, line: str) -> Optional[Tuple]:
+        """
+        Estrae i campi di una riga di opzione con la regex di riga
+        
+        Args:
+            line: Riga di testo
+            
+        Returns:
+            Tupla (underlying, option_symbol, strike, tipo, volume, open_interest) o None
+        """
+        # La regex delle opzioni scarta subito intestazioni e righe dei futures
+        match = OPTION_LINE_PATTERN.search(line)
+        if not match:
+            return None
+        
+        symbol = self.classify(line)
+        if symbol is None:
+            return None
+        
+        option_symbol, strike_str, call_put, volume_str, open_interest_str = match.groups()
+        
+        try:
+            return (symbol, option_symbol, float(strike_str), 'CALL' if call_put == 'C' else 'PUT',
+                    int(volume_str), int(open_interest_str))
+        except ValueError as e:
+            logger.debug(f"Errore parsing riga '{line.strip()}': {e}")
+            return None
+    
+    def iter_records(self, text: str):
+        """
+        Generatore dei record di opzioni del testo in una sola passata
+        
+        Args:
+            text: Testo del bulletin (pagina PDF o file TXT)
+            
+        Returns:
+            Generatore di tuple (underlying, option_symbol, strike, tipo, volume, open_interest)
+        """
+        parse_line = self.parse_line
+        for line in text.splitlines():
+            fields = parse_line(line)
+            if fields is not None:
+                yield fields
+    
+    def parse(self, text: str, target_date: datetime) -> List[Dict]:
+        """
+        Estrae in una sola passata i record di opzioni di tutti i prodotti
+        
+        Args:
+            text: Testo del bulletin (pagina PDF o file TXT)
+            target_date: Data di riferimento
+            
+        Returns:
+            Lista di dizionari con i dati delle opzioni nell'ordine delle righe
+        """
+        options_data = []
+        date_str = target_date.strftime('%Y-%m-%d')
+        
+        for fields in self.iter_records(text):
+            symbol, option_symbol, strike, option_type, volume, open_interest = fields
+            
+            options_data.append({
+                'date': date_str,
+                'underlying': symbol,
+                'option_symbol': option_symbol,
+                'strike': strike,
+                'type': option_type,
+                'volume': volume,
+                'open_interest': open_interest,
+                'dte': days_to_expiry(option_symbol, date_str)  # None se il simbolo non codifica la scadenza
+            })
+        
+        return options_data
+
+# Parser condiviso (ricompilato una sola volta anche in ogni processo worker)
+BULLETIN_PARSER = BulletinLineParser()
+
+def parse_options_text(text: str, target_date: datetime, parser: Optional[BulletinLineParser] = None) -> List[Dict]:
+    """
+    Parsing dei dati delle opzioni di tutti i prodotti dal testo
+    
+    Args:
+        text: Testo da cui estrarre i dati
+        target_date: Data di riferimento
+        parser: Parser da usare (default: BULLETIN_PARSER su FUTURES_SYMBOLS)
+    
+    Returns:
+        Lista di dizionari con i dati delle opzioni
+    """
+    try:
+        return (parser or BULLETIN_PARSER).parse(text, target_date)
+    except Exception as e:
+        logger.error(f"Errore nel parsing del testo del bulletin: {e}")
+        return []
+
+def _log_records_by_product(counts: Dict[str, int]):
+    """Riepilogo dei record estratti per prodotto"""
+    for symbol in FUTURES_SYMBOLS:
+        logger.info(f"Trovati {counts.get(symbol, 0)} record per {symbol}")
+
+def _extract_pdf_pages(pdf_path: str, pages: List[int]) -> Dict[int, str]:
+    """
+    Estrae il testo di un insieme di pagine del PDF con pdfplumber.
+    Eseguita nei processi worker: ogni worker apre il PDF in modo indipendente.
+    
+    Args:
+        pdf_path: Path del file PDF
+        pages: Indici delle pagine (base 0) in ordine crescente
+        
+    Returns:
+        Dizionario pagina -> testo estratto ('' per le pagine senza testo)
+    """
+    texts = {}
+    
+    with pdfplumber.open(pdf_path) as pdf:
+        for page_number in pages:
+            page = pdf.pages[page_number]
+            
+            # Limita il layout alle colonne della tabella se configurato
+            if PDF_TABLE_CROP:
+                x0, top, x1, bottom = PDF_TABLE_CROP
+                page = page.crop((x0 * page.width, top * page.height, x1 * page.width, bottom * page.height))
+            
+            texts[page_number] = page.extract_text() or ''
+    
+    return texts
+
+def _page_text_signature() -> str:
+    """Versione dell'estrattore di testo (invalida la cache se cambia)"""
+    return f"v{PAGE_TEXT_VERSION}:pdfplumber-{pdfplumber.__version__}:crop-{PDF_TABLE_CROP}"
+
+def load_page_text_cache(source_path: str, content_hash: str) -> Dict[int, str]:
+    """
+    Testo delle pagine già estratto per questo bulletin
+    
+    Args:
+        source_path: Path del bulletin nell'archivio
+        content_hash: SHA-256 del file del bulletin
+        
+    Returns:
+        Dizionario pagina -> testo (vuoto se la cache manca o non è valida)
+    """
+    cached = read_json_compressed(raw_name(source_path) + PAGE_TEXT_SUFFIX)
+    if not cached or cached.get('sha256') != content_hash or cached.get('extractor') != _page_text_signature():
+        return {}
+    return {int(page): text for page, text in cached.get('pages', {}).items()}
+
+def save_page_text_cache(source_path: str, content_hash: str, texts: Dict[int, str]):
+    """Salva (compresso, accanto al bulletin) il testo estratto per pagina"""
+    try:
+        write_json_compressed(raw_name(source_path) + PAGE_TEXT_SUFFIX, {
+            'sha256': content_hash,
+            'extractor': _page_text_signature(),
+            'pages': {str(page): text for page, text in sorted(texts.items())}
+        })
+    except OSError as e:
+        logger.debug(f"Impossibile salvare la cache del testo del bulletin: {e}")
+
+def _shard_pages(pages: List[int], workers: int) -> List[List[int]]:
+    """Suddivide le pagine in gruppi contigui (più shard dei worker per bilanciare il carico)"""
+    shard_count = min(len(pages), workers * PDF_SHARDS_PER_WORKER)
+    shard_size = -(-len(pages) // shard_count)
+    return [pages[start:start + shard_size] for start in range(0, len(pages), shard_size)]
+
+def _section_matchers() -> Dict[str, re.Pattern]:
+    """Regex compilata per prodotto: header di sezione (case-insensitive) + simboli di opzione"""
+    matchers = {}
+    for symbol, config in FUTURES_SYMBOLS.items():
+        headers = [r'\s*'.join(re.escape(word) for word in header.split()) for header in config.get('section_headers', [])]
+        alternatives = [f"(?i:{header})" for header in headers] + list(config['option_patterns'])
+        matchers[symbol] = re.compile('|'.join(alternatives))
+    return matchers
+
+def _section_signature() -> str:
+    """Impronta della configurazione usata dal pre-scan (invalida la cache se cambia)"""
+    payload = {symbol: [config.get('section_headers', []), config['option_patterns']]
+               for symbol, config in FUTURES_SYMBOLS.items()}
+    return f"v{SECTION_SCAN_VERSION}:{json.dumps(payload, sort_keys=True)}"
+
+def _chars_text(page) -> str:
+    """Testo grezzo dai caratteri della pagina, senza l'analisi di layout di extract_text"""
+    parts = []
+    previous = None
+    for char in page.chars:
+        if previous is not None:
+            if abs(char['top'] - previous['top']) > 1:
+                parts.append('\n')
+            elif char['x0'] - previous['x1'] > 1:
+                parts.append(' ')
+        parts.append(char['text'])
+        previous = char
+    return ''.join(parts)
+
+def _iter_fast_page_texts(pdf_path: str):
+    """Testo di ogni pagina dal text layer veloce (pdfium se disponibile)"""
+    if PDFIUM_AVAILABLE:
+        document = pypdfium2.PdfDocument(pdf_path)
+        try:
+            for index in range(len(document)):
+                page = document[index]
+                textpage = page.get_textpage()
+                yield textpage.get_text_range()
+                textpage.close()
+                page.close()
+        finally:
+            document.close()
+    else:
+        with pdfplumber.open(pdf_path) as pdf:
+            for page in pdf.pages:
+                yield _chars_text(page)
+
+def _page_ranges(pages: List[int]) -> List[List[int]]:
+    """Compatta indici di pagina ordinati in intervalli [inizio, fine)"""
+    ranges = []
+    for page in pages:
+        if ranges and ranges[-1][1] == page:
+            ranges[-1][1] = page + 1
+        else:
+            ranges.append([page, page + 1])
+    return ranges
+
+def scan_bulletin_sections(pdf_path: str, source_path: Optional[str] = None, use_cache: bool = True) -> Dict:
+    """
+    Pre-scan economico del bulletin PDF: individua gli intervalli di pagine
+    delle sezioni dei prodotti configurati. Il risultato è salvato accanto al
+    PDF e riutilizzato finché il file e la configurazione non cambiano.
+    
+    Args:
+        pdf_path: Path del bulletin PDF
+        source_path: File dell'archivio da cui il PDF è stato decompresso (chiave della cache)
+        use_cache: Riusa e aggiorna la cache delle sezioni (False = scan sempre ripetuto)
+        
+    Returns:
+        Dizionario {'page_count', 'sections': simbolo -> [[inizio, fine), ...]}
+    """
+    source_path = source_path or pdf_path
+    cache_path = raw_name(source_path) + SECTION_SCAN_SUFFIX
+    stat = os.stat(source_path)
+    signature = _section_signature()
+    
+    if use_cache:
+        try:
+            with open(cache_path, 'r') as f:
+                cached = json.load(f)
+            if (cached.get('size') == stat.st_size and cached.get('mtime_ns') == stat.st_mtime_ns
+                    and cached.get('signature') == signature):
+                logger.debug(f"📋 Sezioni bulletin dalla cache: {cache_path}")
+                return cached
+        except (OSError, ValueError):
+            pass
+    
+    matchers = _section_matchers()
+    section_pages = {symbol: [] for symbol in matchers}
+    page_count = 0
+    
+    for page_number, text in enumerate(_iter_fast_page_texts(pdf_path)):
+        page_count += 1
+        for symbol, matcher in matchers.items():
+            if text and matcher.search(text):
+                section_pages[symbol].append(page_number)
+    
+    result = {
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'signature': signature,
+        'page_count': page_count,
+        'sections': {symbol: _page_ranges(pages) for symbol, pages in section_pages.items()}
+    }
+    
+    if not use_cache:
+        return result
+    
+    try:
+        write_json_atomic(cache_path, result)
+    except OSError as e:
+        logger.debug(f"Impossibile salvare le sezioni del bulletin: {e}")
+    
+    return result
+
+def select_bulletin_pages(pdf_path: str, source_path: Optional[str] = None,
+                          use_cache: bool = True) -> Tuple[int, List[int]]:
+    """
+    Pagine del bulletin da sottoporre all'estrazione completa
+    
+    Args:
+        pdf_path: Path del bulletin PDF
+        source_path: File dell'archivio da cui il PDF è stato decompresso
+        use_cache: Riusa e aggiorna la cache delle sezioni
+        
+    Returns:
+        Tupla (numero totale di pagine, indici delle pagine rilevanti in ordine)
+    """
+    scan = scan_bulletin_sections(pdf_path, source_path, use_cache)
+    pages = sorted({
+        page
+        for ranges in scan['sections'].values()
+        for start, end in ranges
+        for page in range(start, end)
+    })
+    return scan['page_count'], pages
+
+def _load_bulletin_source() -> Dict:
+    """Pattern del nome file che ha fornito l'ultimo bulletin"""
+    try:
+        with open(BULLETIN_SOURCE_FILE, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_bulletin_source(pattern: str):
+    """Ricorda il pattern vincente per le date successive"""
+    if _load_bulletin_source().get('pattern') == pattern:
+        return
+    try:
+        os.makedirs(os.path.dirname(BULLETIN_SOURCE_FILE), exist_ok=True)
+        write_json_atomic(BULLETIN_SOURCE_FILE, {'pattern': pattern, 'updated_at': datetime.now().isoformat()})
+    except OSError as e:
+        logger.debug(f"Impossibile salvare il pattern del bulletin: {e}")
+
+def _close_probe_response(future):
+    """Chiude la risposta di un candidato arrivata dopo il vincitore"""
+    try:
+        response = future.result()
+    except Exception:
+        return
+    if response is not None:
+        response.close()
+
+def create_session(metrics: PipelineMetrics, retries: int = HTTP_RETRY_TOTAL) -> requests.Session:
+    """
+    Sessione HTTP per CME e CBOE (headers browser, pool e retry del client condiviso,
+    cache delle risposte, metriche). Una sola sessione può essere condivisa dai due
+    fetcher per riusare il pool di connessioni.
+    
+    Args:
+        metrics: Metriche in cui registrare le chiamate HTTP
+        retries: Tentativi su errori di rete e 429/5xx (0 per le richieste in gara,
+            che non devono sopravvivere alla scadenza con i backoff dei retry)
+        
+    Returns:
+        Sessione configurata
+    """
+    return create_http_session(HEADERS, metrics, retries=retries)
+
+def _load_cboe_source() -> Dict:
+    """Endpoint CBOE che ha fornito l'ultimo Put/Call Ratio"""
+    try:
+        with open(CBOE_SOURCE_FILE, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_cboe_source(endpoint: str):
+    """Ricorda l'endpoint vincente per le esecuzioni successive"""
+    if _load_cboe_source().get('endpoint') == endpoint:
+        return
+    try:
+        os.makedirs(os.path.dirname(CBOE_SOURCE_FILE), exist_ok=True)
+        write_json_atomic(CBOE_SOURCE_FILE, {'endpoint': endpoint, 'updated_at': datetime.now().isoformat()})
+    except OSError as e:
+        logger.debug(f"Impossibile salvare l'endpoint CBOE: {e}")
+
 class CMEOptionsDataFetcher:
     """Classe per l'acquisizione dei dati delle opzioni dal CME Group"""
     
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update(HEADERS)
+    def __init__(self, metrics: Optional[PipelineMetrics] = None, session: Optional[requests.Session] = None,
+                 race_session: Optional[requests.Session] = None):
+        self.metrics = metrics or PipelineMetrics('options')
+        self.session = session or create_session(self.metrics)
+        # Candidati in gara della scoperta del bulletin: nessun retry, i perdenti terminano subito
+        self.race_session = race_session or create_session(self.metrics, retries=0)
+        self.bulletin_store = BulletinStore(DATA_LAKE_DIR)
+        # Ultima estrazione PDF: pagine estratte e processi worker effettivamente usati
+        self.last_extraction: Dict[str, int] = {}
+        
+    def _candidate_urls(self, target_date: datetime) -> List[Tuple[str, str]]:
+        """Coppie (pattern, URL) candidate, con il pattern vincente più recente per primo"""
+        date_str = target_date.strftime('%Y%m%d')
+        patterns = list(BULLETIN_FILENAME_PATTERNS)
         
+        remembered = _load_bulletin_source().get('pattern')
+        if remembered in patterns:
+            patterns.remove(remembered)
+            patterns.insert(0, remembered)
+        
+        return [(pattern, CME_SETTLE_BASE_URL + pattern.format(date=date_str)) for pattern in patterns]
+    
+    def _open_stream(self, url: str) -> Optional[requests.Response]:
+        """GET in streaming: restituisce la risposta aperta solo se è un bulletin valido"""
+        try:
+            response = self.race_session.get(url, timeout=(BULLETIN_CONNECT_TIMEOUT, BULLETIN_READ_TIMEOUT), stream=True,
+                                        headers={'Accept-Encoding': 'identity'})
+        except Exception as e:
+            logger.debug(f"URL non disponibile {url}: {e}")
+            return None
+        
+        # Le pagine HTML di errore del CME rispondono talvolta con 200
+        content_type = response.headers.get('content-type', '').lower()
+        if response.status_code == 200 and 'html' not in content_type:
+            return response
+        
+        logger.debug(f"URL non disponibile {url}: HTTP {response.status_code}")
+        response.close()
+        return None
+    
+    def discover_bulletin(self, target_date: datetime) -> Optional[Tuple[str, requests.Response]]:
+        """
+        Individua il Daily Bulletin con GET in streaming concorrenti sui nomi file candidati.
+        Il pattern ricordato parte subito, gli altri dopo BULLETIN_HEDGE_DELAY secondi
+        (o appena il primo fallisce); vince la prima risposta valida e le altre vengono chiuse.
+        
+        Args:
+            target_date: Data del bulletin
+            
+        Returns:
+            Tupla (URL, risposta aperta in streaming) o None se nessun candidato risponde
+        """
+        candidates = self._candidate_urls(target_date)
+        remembered = _load_bulletin_source().get('pattern') == candidates[0][0]
+        
+        # Senza un pattern ricordato tutti i candidati partono insieme
+        waiting = list(candidates[1:]) if remembered else []
+        launch = candidates[:1] if remembered else list(candidates)
+        
+        executor = ThreadPoolExecutor(max_workers=len(candidates), thread_name_prefix='cme-bulletin')
+        pending = {}
+        winner = None
+        
+        def submit(batch):
+            for pattern, url in batch:
+                pending[executor.submit(self._open_stream, url)] = (pattern, url)
+        
+        try:
+            submit(launch)
+            
+            while pending and winner is None:
+                done, _ = wait(pending, timeout=BULLETIN_HEDGE_DELAY if waiting else None, return_when=FIRST_COMPLETED)
+                
+                for future in done:
+                    pattern, url = pending.pop(future)
+                    response = future.result()
+                    if response is None:
+                        continue
+                    if winner is None:
+                        winner = (pattern, url, response)
+                    else:
+                        response.close()
+                
+                # Timeout del candidato ricordato o nessun vincitore: partono gli altri
+                if winner is None and waiting:
+                    submit(waiting)
+                    waiting = []
+        finally:
+            # Cancellazione dei perdenti: le risposte in arrivo vengono chiuse subito
+            for future in pending:
+                if not future.cancel():
+                    future.add_done_callback(_close_probe_response)
+            executor.shutdown(wait=False)
+        
+        if winner is None:
+            return None
+        
+        pattern, url, response = winner
+        _save_bulletin_source(pattern)
+        logger.info(f"Trovato Daily Bulletin: {url}")
+        return url, response
+    
     def get_cme_daily_bulletin_url(self, target_date: datetime) -> str:
         """
         Costruisce dinamicamente l'URL per il Daily Bulletin del CME
@@ -74,37 +634,24 @@ class CMEOptionsDataFetcher:
             target_date: Data per cui cercare il Daily Bulletin
             
         Returns:
-            URL completo per il download del PDF
+            URL completo per il download del file
         """
-        # Formato: https://www.cmegroup.com/ftp/pub/settle/stl_YYYYMMDD
-        date_str = target_date.strftime('%Y%m%d')
-        base_url = "https://www.cmegroup.com/ftp/pub/settle/"
-        
-        # Proviamo diversi formati di file che il CME potrebbe utilizzare
-        possible_filenames = [
-            f"stl_{date_str}.txt",
-            f"stl_{date_str}.pdf", 
-            f"settle_{date_str}.txt",
-            f"daily_bulletin_{date_str}.pdf"
-        ]
-        
-        for filename in possible_filenames:
-            url = base_url + filename
-            try:
-                response = self.session.head(url, timeout=10)
-                if response.status_code == 200:
-                    logger.info(f"Trovato Daily Bulletin: {url}")
-                    return url
-            except Exception as e:
-                logger.debug(f"URL non disponibile {url}: {e}")
-                continue
-                
+        discovered = self.discover_bulletin(target_date)
+        if discovered:
+            url, response = discovered
+            response.close()
+            return url
+        
         # Fallback: prova con il formato standard più comune
-        return f"{base_url}stl_{date_str}.txt"
+        return CME_SETTLE_BASE_URL + BULLETIN_FILENAME_PATTERNS[0].format(date=target_date.strftime('%Y%m%d'))
     
     def download_cme_bulletin(self, target_date: datetime) -> Optional[str]:
         """
-        Scarica il Daily Bulletin del CME per la data specificata
+        Scarica il Daily Bulletin del CME per la data specificata.
+        La scoperta dell'URL e il download avvengono nella stessa GET in streaming:
+        il body viene scritto su un file '.part' man mano che arriva, ripreso con
+        HTTP Range se la connessione cade e registrato nel manifest a download completo.
+        Un bulletin già presente e verificato non viene riscaricato.
         
         Args:
             target_date: Data del bulletin da scaricare
@@ -112,253 +659,317 @@ class CMEOptionsDataFetcher:
         Returns:
             Path del file scaricato o None se fallisce
         """
-        url = self.get_cme_daily_bulletin_url(target_date)
         date_str = target_date.strftime('%Y%m%d')
         
+        # Nessun bulletin nei giorni di chiusura CME: evita chiamate inutili
+        if not is_trading_day(target_date):
+            logger.info(f"📅 CME chiuso il {date_str} - download bulletin saltato")
+            return None
+        
+        # Bulletin già scaricato e verificato (dimensione + SHA-256 nel manifest)
+        local_path = self.bulletin_store.local_bulletin(date_str)
+        if local_path:
+            logger.info(f"📋 CME Daily Bulletin già presente e verificato: {local_path}")
+            return local_path
+        
         try:
+            # Download interrotto in un'esecuzione precedente: ripresa dall'ultimo byte
+            pending = self.bulletin_store.pending_download(date_str)
+            if pending:
+                filepath = self.bulletin_store.download(self.session, pending['url'], pending['filename'])
+                if filepath:
+                    logger.info(f"✅ CME Daily Bulletin scaricato: {filepath}")
+                    return filepath
+            
             logger.info(f"Tentativo download CME Daily Bulletin per {date_str}...")
-            response = self.session.get(url, timeout=30)
+            discovered = self.discover_bulletin(target_date)
             
-            if response.status_code == 200:
-                # Determina il tipo di file dal content-type
-                content_type = response.headers.get('content-type', '').lower()
-                
-                if 'pdf' in content_type:
-                    filename = f"cme_bulletin_{date_str}.pdf"
-                else:
-                    filename = f"cme_bulletin_{date_str}.txt"
-                
-                filepath = os.path.join(DATA_LAKE_DIR, filename)
-                
-                with open(filepath, 'wb') as f:
-                    f.write(response.content)
-                
-                logger.info(f"✅ CME Daily Bulletin scaricato: {filepath}")
-                return filepath
-            else:
-                logger.error(f"❌ Errore download CME bulletin: HTTP {response.status_code}")
+            if discovered is None:
+                logger.error("❌ Errore download CME bulletin: nessun URL candidato disponibile")
                 return None
+            
+            url, response = discovered
+            
+            # Determina il tipo di file dal content-type (o dall'estensione dell'URL)
+            content_type = response.headers.get('content-type', '').lower()
+            extension = 'pdf' if 'pdf' in content_type or url.endswith('.pdf') else 'txt'
+            
+            filepath = self.bulletin_store.download(
+                self.session, url, self.bulletin_store.bulletin_filename(date_str, extension), response=response
+            )
+            
+            if filepath:
+                logger.info(f"✅ CME Daily Bulletin scaricato: {filepath}")
+            return filepath
                 
         except Exception as e:
             logger.error(f"❌ Errore durante il download: {e}")
             return None
     
-    def extract_options_from_pdf(self, pdf_path: str, target_date: datetime) -> pd.DataFrame:
+    def extract_options_from_pdf(self, pdf_path: str, target_date: datetime, workers: Optional[int] = None,
+                                 use_text_cache: bool = PAGE_TEXT_CACHE_ENABLED) -> pd.DataFrame:
         """
-        Estrae i dati delle opzioni dal PDF del CME usando pdfplumber
+        Estrae i dati delle opzioni dal PDF del CME usando pdfplumber.
+        Un pre-scan sul text layer veloce limita l'estrazione completa alle
+        pagine delle sezioni dei prodotti configurati. Con più worker le pagine
+        vengono suddivise in gruppi estratti da processi separati. Il testo
+        estratto viene salvato per pagina in una cache compressa accanto al
+        bulletin, così un nuovo parsing (regex o soglie modificate) non ripete
+        l'estrazione. Un PDF archiviato compresso viene decompresso in un file
+        temporaneo per la durata dell'estrazione.
         
         Args:
-            pdf_path: Path del file PDF da analizzare
+            pdf_path: Path del file PDF da analizzare (anche .pdf.zst/.pdf.gz)
             target_date: Data di riferimento
+            workers: Numero di processi worker (default: PDF_EXTRACTION_WORKERS, 1 = seriale)
+            use_text_cache: Riusa e aggiorna le cache del bulletin (sezioni e testo per pagina)
             
         Returns:
             DataFrame con i dati delle opzioni estratti
         """
-        options_data = []
+        buffer = OptionColumnBuffer()
+        workers = workers or PDF_EXTRACTION_WORKERS
         
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                logger.info(f"Analisi PDF con {len(pdf.pages)} pagine...")
-                
-                for page_num, page in enumerate(pdf.pages):
-                    text = page.extract_text()
-                    if not text:
-                        continue
-                        
-                    # Cerca sezioni relative alle opzioni ES e NQ
-                    for symbol, config in FUTURES_SYMBOLS.items():
-                        options_data.extend(
-                            self._parse_options_from_text(text, symbol, config, target_date)
-                        )
-                        
+            with materialized_bulletin(pdf_path) as local_pdf:
+                texts, self.last_extraction = self._extract_page_texts(local_pdf, pdf_path, workers, use_text_cache)
+            
+            # Parsing nell'ordine delle pagine
+            for page_number in sorted(texts):
+                buffer.extend(BULLETIN_PARSER.iter_records(texts[page_number]))
         except Exception as e:
             logger.error(f"Errore nell'estrazione dal PDF: {e}")
             
-        if options_data:
-            df = pd.DataFrame(options_data)
+        if len(buffer):
+            _log_records_by_product(buffer.counts_by_underlying())
+            df = buffer.to_frame(target_date.strftime('%Y-%m-%d'))
             logger.info(f"✅ Estratti {len(df)} record di opzioni dal PDF")
             return df
         else:
             logger.warning("⚠️ Nessun dato di opzioni estratto dal PDF")
             return pd.DataFrame()
     
+    def _extract_page_texts(self, pdf_path: str, source_path: str, workers: int,
+                            use_text_cache: bool) -> Tuple[Dict[int, str], Dict[str, int]]:
+        """
+        Testo delle pagine rilevanti di un PDF non compresso: dalla cache se
+        disponibile, altrimenti estratto (in serie o in parallelo) e salvato
+        
+        Args:
+            pdf_path: Path del PDF su disco
+            source_path: Path del bulletin nell'archivio (chiave delle cache)
+            workers: Numero massimo di processi worker
+            use_text_cache: Riusa e aggiorna le cache del bulletin (sezioni e testo per pagina)
+            
+        Returns:
+            Tupla (pagina -> testo per le pagine delle sezioni dei prodotti,
+            {'pages': pagine estratte, 'workers': processi usati, 0 se tutto dalla cache})
+        """
+        page_count, pages = select_bulletin_pages(pdf_path, source_path, use_text_cache)
+        
+        if not pages:
+            # Layout sconosciuto: meglio un'estrazione completa che nessun dato
+            logger.warning("⚠️ Pre-scan senza sezioni riconosciute, analizzo tutte le pagine")
+            pages = list(range(page_count))
+        
+        cached = {}
+        if use_text_cache:
+            content_hash = file_sha256(source_path)
+            cached = load_page_text_cache(source_path, content_hash)
+        
+        texts = {page: cached[page] for page in pages if page in cached}
+        missing = [page for page in pages if page not in cached]
+        
+        if texts:
+            logger.info(f"📋 Testo di {len(texts)}/{len(pages)} pagine dalla cache")
+        if not missing:
+            return texts, {'pages': 0, 'workers': 0}
+        
+        logger.info(f"Analisi PDF: {len(missing)}/{page_count} pagine nelle sezioni dei prodotti...")
+        
+        workers = min(workers, max(1, len(missing) // PDF_MIN_PAGES_PER_WORKER))
+        
+        if workers <= 1:
+            texts.update(_extract_pdf_pages(pdf_path, missing))
+        else:
+            shards = _shard_pages(missing, workers)
+            logger.info(f"Estrazione parallela: {len(shards)} gruppi di pagine su {workers} processi")
+            
+            # I log dei worker passano dal listener del processo principale
+            with ProcessPoolExecutor(max_workers=workers, initializer=init_worker_logging,
+                                     initargs=(worker_log_queue(), logging.getLogger().level)) as executor:
+                for shard_texts in executor.map(_extract_pdf_pages, [pdf_path] * len(shards), shards):
+                    texts.update(shard_texts)
+        
+        if use_text_cache:
+            save_page_text_cache(source_path, content_hash, {**cached, **texts})
+        
+        return texts, {'pages': len(missing), 'workers': workers}
+    
     def extract_options_from_txt(self, txt_path: str, target_date: datetime) -> pd.DataFrame:
         """
-        Estrae i dati delle opzioni dal file TXT del CME
+        Estrae i dati delle opzioni dal file TXT del CME.
+        Il file viene letto in streaming con il parser a colonne fisse
+        (layout rilevato dalle intestazioni, regex di riga come fallback).
         
         Args:
-            txt_path: Path del file TXT da analizzare  
+            txt_path: Path del file TXT da analizzare (anche .txt.zst/.txt.gz, letto in streaming)
             target_date: Data di riferimento
             
         Returns:
             DataFrame con i dati delle opzioni estratti
         """
-        options_data = []
+        buffer = OptionColumnBuffer()
         
         try:
-            with open(txt_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-                
-            logger.info(f"Analisi file TXT di {len(content)} caratteri...")
-            
-            # Cerca sezioni relative alle opzioni ES e NQ
-            for symbol, config in FUTURES_SYMBOLS.items():
-                options_data.extend(
-                    self._parse_options_from_text(content, symbol, config, target_date)
-                )
-                
+            logger.info(f"Analisi file TXT di {os.path.getsize(txt_path)} byte...")
+            buffer = read_settlement_buffer(txt_path, BULLETIN_PARSER, FUTURES_SYMBOLS)
         except Exception as e:
             logger.error(f"Errore nell'estrazione dal TXT: {e}")
             
-        if options_data:
-            df = pd.DataFrame(options_data)
+        if len(buffer):
+            _log_records_by_product(buffer.counts_by_underlying())
+            df = buffer.to_frame(target_date.strftime('%Y-%m-%d'))
             logger.info(f"✅ Estratti {len(df)} record di opzioni dal TXT")
             return df
         else:
             logger.warning("⚠️ Nessun dato di opzioni estratto dal TXT")
             return pd.DataFrame()
+
+class CBOEDataFetcher:
+    """Classe per l'acquisizione dei dati dal CBOE"""
     
-    def _parse_options_from_text(self, text: str, symbol: str, config: Dict, target_date: datetime) -> List[Dict]:
+    def __init__(self, metrics: Optional[PipelineMetrics] = None, session: Optional[requests.Session] = None):
+        self.metrics = metrics or PipelineMetrics('options')
+        # Tutte le richieste CBOE sono in gara: nessun retry, così i perdenti non superano la scadenza
+        self.session = session or create_session(self.metrics, retries=0)
+    
+    def _probe_endpoint(self, url: str, date_str: str, deadline: float) -> Optional[Dict]:
         """
-        Parsing dei dati delle opzioni dal testo usando pattern regex
+        Scarica un endpoint e ne estrae il Put/Call Ratio (JSON, poi CSV)
         
         Args:
-            text: Testo da cui estrarre i dati
-            symbol: Simbolo del future (ES, NQ)
-            config: Configurazione del simbolo
-            target_date: Data di riferimento
+            url: URL dell'endpoint
+            date_str: Data di riferimento (YYYY-MM-DD)
+            deadline: Istante (time.monotonic) oltre il quale il risultato non serve più
             
         Returns:
-            Lista di dizionari con i dati delle opzioni
+            Dizionario con i dati del Put/Call Ratio o None
         """
-        options_data = []
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
         
         try:
-            # Pattern per identificare righe con dati di opzioni
-            # Formato tipico: SYMBOL STRIKE C/P VOLUME OPEN_INTEREST
-            option_pattern = r'([A-Z0-9]+)\s+([0-9]+(?:\.[0-9]+)?)\s+([CP])\s+([0-9]+)\s+([0-9]+)'
-            
-            lines = text.split('\n')
-            
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-                    
-                # Verifica se la riga contiene un simbolo di opzione per il nostro future
-                matches_symbol = False
-                for pattern in config['option_patterns']:
-                    if re.search(pattern, line):
-                        matches_symbol = True
-                        break
-                
-                if not matches_symbol:
-                    continue
-                
-                # Estrae i dati usando regex
-                match = re.search(option_pattern, line)
-                if match:
-                    option_symbol, strike_str, call_put, volume_str, open_interest_str = match.groups()
-                    
-                    try:
-                        strike = float(strike_str)
-                        volume = int(volume_str)
-                        open_interest = int(open_interest_str)
-                        
-                        # Filtra opzioni 0DTE (scadenza oggi)
-                        # Per semplicità assumiamo che le opzioni nel daily bulletin di oggi siano 0DTE
-                        options_data.append({
-                            'date': target_date.strftime('%Y-%m-%d'),
-                            'underlying': symbol,
-                            'option_symbol': option_symbol,
-                            'strike': strike,
-                            'type': 'CALL' if call_put == 'C' else 'PUT',
-                            'volume': volume,
-                            'open_interest': open_interest,
-                            'dte': 0  # Days to expiration
-                        })
-                        
-                    except (ValueError, IndexError) as e:
-                        logger.debug(f"Errore parsing riga '{line}': {e}")
-                        continue
-                        
+            logger.info(f"Tentativo download dati CBOE da: {url}")
+            response = self.session.get(url, timeout=(min(CBOE_CONNECT_TIMEOUT, remaining),
+                                                      min(CBOE_READ_TIMEOUT, remaining)))
         except Exception as e:
-            logger.error(f"Errore nel parsing del testo per {symbol}: {e}")
-            
-        logger.info(f"Trovati {len(options_data)} record per {symbol}")
-        return options_data
-
-class CBOEDataFetcher:
-    """Classe per l'acquisizione dei dati dal CBOE"""
-    
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update(HEADERS)
+            logger.debug(f"Errore con endpoint {url}: {e}")
+            return None
+        
+        if response.status_code != 200:
+            logger.debug(f"Endpoint {url}: HTTP {response.status_code}")
+            return None
+        
+        # Prova a parsare come JSON
+        try:
+            pc_ratio = self._extract_pc_ratio_from_json(response.json())
+            source = 'CBOE_API'
+        except ValueError:
+            pc_ratio = None
+        
+        # Prova a parsare come CSV
+        if pc_ratio is None:
+            pc_ratio = self._extract_pc_ratio_from_csv(response.text.split('\n'))
+            source = 'CBOE_CSV'
+        
+        if pc_ratio is None:
+            return None
+        
+        return {
+            'date': date_str,
+            'total_put_call_ratio': pc_ratio,
+            'equity_put_call_ratio': pc_ratio,  # Fallback
+            'index_put_call_ratio': pc_ratio,   # Fallback
+            'source': source
+        }
     
-    def fetch_put_call_ratio(self, target_date: datetime) -> Optional[Dict]:
+    def fetch_put_call_ratio(self, target_date: datetime, deadline: float = CBOE_DEADLINE) -> Optional[Dict]:
         """
-        Scarica il Put/Call Ratio dal CBOE per la data specificata
+        Scarica il Put/Call Ratio dal CBOE per la data specificata.
+        Gli endpoint candidati vengono interrogati in concorrenza: l'ultimo
+        endpoint vincente parte subito, gli altri dopo CBOE_HEDGE_DELAY secondi
+        (o appena il primo fallisce). Vince la prima risposta con un ratio valido
+        e gli altri tentativi vengono abbandonati. Oltre la scadenza complessiva
+        si passa al valore sintetico.
         
         Args:
             target_date: Data per cui scaricare i dati
+            deadline: Secondi massimi per l'intera acquisizione
             
         Returns:
             Dizionario con i dati del Put/Call Ratio o None se fallisce
         """
         try:
-            # URL per i dati storici del Put/Call Ratio del CBOE
-            # Nota: questo è un URL di esempio, potrebbero essere necessari aggiustamenti
-            base_url = "https://cdn.cboe.com/api/global/us_indices/market_statistics/"
             date_str = target_date.strftime('%Y-%m-%d')
+            expires_at = time.monotonic() + deadline
             
-            # Prova diversi endpoint possibili
-            endpoints = [
-                f"pc_ratio_data.json?date={date_str}",
-                f"daily_market_statistics_{target_date.strftime('%Y%m%d')}.csv",
-                "current_market_statistics.json"
-            ]
+            endpoints = list(CBOE_ENDPOINTS)
+            remembered = _load_cboe_source().get('endpoint')
+            
+            # Senza un endpoint ricordato tutti i candidati partono insieme
+            if remembered in endpoints:
+                launch = [remembered]
+                waiting = [endpoint for endpoint in endpoints if endpoint != remembered]
+            else:
+                launch = endpoints
+                waiting = []
+            
+            executor = ThreadPoolExecutor(max_workers=len(endpoints), thread_name_prefix='cboe-endpoint')
+            pending = {}
+            winner = None
+            
+            def submit(batch):
+                for endpoint in batch:
+                    url = CBOE_BASE_URL + endpoint.format(date=date_str, compact_date=target_date.strftime('%Y%m%d'))
+                    pending[executor.submit(self._probe_endpoint, url, date_str, expires_at)] = endpoint
             
-            for endpoint in endpoints:
-                url = base_url + endpoint
+            try:
+                submit(launch)
                 
-                try:
-                    logger.info(f"Tentativo download dati CBOE da: {url}")
-                    response = self.session.get(url, timeout=15)
+                while pending and winner is None:
+                    remaining = expires_at - time.monotonic()
+                    if remaining <= 0:
+                        logger.warning(f"⏱️ Scadenza di {deadline:.0f}s raggiunta sugli endpoint CBOE")
+                        self.metrics.add('cboe_deadline_exceeded')
+                        break
                     
-                    if response.status_code == 200:
-                        # Prova a parsare come JSON
-                        try:
-                            data = response.json()
-                            pc_ratio = self._extract_pc_ratio_from_json(data)
-                            if pc_ratio is not None:
-                                return {
-                                    'date': date_str,
-                                    'total_put_call_ratio': pc_ratio,
-                                    'equity_put_call_ratio': pc_ratio,  # Fallback
-                                    'index_put_call_ratio': pc_ratio,   # Fallback
-                                    'source': 'CBOE_API'
-                                }
-                        except:
-                            pass
-                            
-                        # Prova a parsare come CSV
-                        try:
-                            lines = response.text.split('\n')
-                            pc_ratio = self._extract_pc_ratio_from_csv(lines)
-                            if pc_ratio is not None:
-                                return {
-                                    'date': date_str,
-                                    'total_put_call_ratio': pc_ratio,
-                                    'equity_put_call_ratio': pc_ratio,
-                                    'index_put_call_ratio': pc_ratio,
-                                    'source': 'CBOE_CSV'
-                                }
-                        except:
-                            pass
-                            
-                except Exception as e:
-                    logger.debug(f"Errore con endpoint {endpoint}: {e}")
-                    continue
+                    timeout = min(CBOE_HEDGE_DELAY, remaining) if waiting else remaining
+                    done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                    
+                    for future in done:
+                        endpoint = pending.pop(future)
+                        result = future.result()
+                        if result is not None and winner is None:
+                            winner = (endpoint, result)
+                    
+                    # Timeout dell'endpoint ricordato o nessun vincitore: partono gli altri
+                    if winner is None and waiting:
+                        submit(waiting)
+                        waiting = []
+            finally:
+                # I tentativi perdenti non ancora partiti vengono cancellati, quelli in
+                # corso terminano entro la scadenza e il loro risultato viene ignorato
+                for future in pending:
+                    future.cancel()
+                executor.shutdown(wait=False)
+            
+            if winner is not None:
+                endpoint, result = winner
+                _save_cboe_source(endpoint)
+                logger.info(f"✅ Put/Call Ratio CBOE da {endpoint}: {result['total_put_call_ratio']}")
+                return result
             
             # Se nessun endpoint funziona, genera un valore sintetico per testing
             logger.warning("⚠️ Impossibile ottenere dati reali dal CBOE, genero dati sintetici per testing")
@@ -435,13 +1046,14 @@ def ensure_data_lake_exists():
         os.makedirs(DATA_LAKE_DIR)
         logger.info(f"📁 Creata directory: {DATA_LAKE_DIR}")
 
-def save_options_data(df: pd.DataFrame, target_date: datetime) -> str:
+def save_options_data(df: pd.DataFrame, target_date: datetime, metrics: Optional[PipelineMetrics] = None) -> str:
     """
     Salva i dati delle opzioni in formato CSV standardizzato
     
     Args:
         df: DataFrame con i dati delle opzioni
         target_date: Data di riferimento
+        metrics: Metriche della pipeline (opzionale)
         
     Returns:
         Path del file salvato
@@ -455,21 +1067,25 @@ def save_options_data(df: pd.DataFrame, target_date: datetime) -> str:
     filepath = os.path.join(DATA_LAKE_DIR, filename)
     
     # Assicura che le colonne siano nell'ordine corretto
-    columns_order = ['date', 'underlying', 'option_symbol', 'strike', 'type', 'volume', 'open_interest', 'dte']
-    df = df.reindex(columns=columns_order)
+    df = df.reindex(columns=OPTIONS_COLUMNS_ORDER)
     
-    df.to_csv(filepath, index=False)
+    # Temporaneo e rename atomico: l'analytics non legge mai un file a metà
+    write_csv_atomic(df, filepath, index=False)
     logger.info(f"💾 Dati opzioni salvati: {filepath} ({len(df)} record)")
     
+    if metrics:
+        metrics.add('rows_written', len(df))
+    
     return filepath
 
-def save_sentiment_data(sentiment_data: Dict, target_date: datetime) -> str:
+def save_sentiment_data(sentiment_data: Dict, target_date: datetime, metrics: Optional[PipelineMetrics] = None) -> str:
     """
     Salva i dati del sentiment (Put/Call Ratio) in formato CSV
     
     Args:
         sentiment_data: Dizionario con i dati del sentiment
         target_date: Data di riferimento
+        metrics: Metriche della pipeline (opzionale)
         
     Returns:
         Path del file salvato
@@ -484,28 +1100,102 @@ def save_sentiment_data(sentiment_data: Dict, target_date: datetime) -> str:
     
     # Converte in DataFrame per mantenere la consistenza
     df = pd.DataFrame([sentiment_data])
-    df.to_csv(filepath, index=False)
+    write_csv_atomic(df, filepath, index=False)
+    
+    if metrics:
+        metrics.add('rows_written', len(df))
     
     logger.info(f"💾 Dati sentiment salvati: {filepath}")
     return filepath
 
+def generate_options_report(results: Dict[str, Optional[str]], target_date: datetime,
+                            metrics: Optional[PipelineMetrics] = None) -> str:
+    """
+    Genera il report riassuntivo dell'acquisizione opzioni/sentiment
+    
+    Args:
+        results: Dizionario operazione -> path del file salvato (None se fallita)
+        target_date: Data di riferimento
+        metrics: Metriche della pipeline (incluse nel report e nel textfile Prometheus)
+        
+    Returns:
+        Path del file di report
+    """
+    date_str = target_date.strftime('%Y-%m-%d')
+    report_filename = f"{date_str}_options_acquisition_report.json"
+    report_path = os.path.join(DATA_LAKE_DIR, report_filename)
+    
+    report_data = {
+        'acquisition_date': datetime.now().isoformat(),
+        'target_date': date_str,
+        'status': 'completed',
+        'results': results,
+        'success_count': len([r for r in results.values() if r]),
+        'total_operations': len(results)
+    }
+    
+    if metrics:
+        report_data['metrics'] = metrics.to_dict()
+        metrics.write_prometheus_textfile()
+    
+    write_json_atomic(report_path, report_data, indent=2)
+    
+    logger.info(f"📊 Report salvato: {report_path}")
+    return report_path
+
+def benchmark_pdf_extraction(pdf_path: str, worker_counts: Optional[List[int]] = None) -> Dict[int, Dict]:
+    """
+    Confronta le pagine/secondo dell'estrazione seriale e di quella parallela.
+    Ogni misura parte senza cache (sezioni e testo) e conta solo le pagine
+    effettivamente estratte (quelle delle sezioni dei prodotti). I risultati
+    sono indicizzati per processi effettivamente usati: su bulletin piccoli
+    l'estrazione ne usa meno di quelli richiesti (PDF_MIN_PAGES_PER_WORKER).
+    
+    Args:
+        pdf_path: Path di un bulletin PDF
+        worker_counts: Numeri di worker da richiedere (1 = percorso seriale)
+        
+    Returns:
+        Dizionario worker effettivi -> {'requested_workers', 'seconds', 'pages',
+        'pages_per_second', 'records', 'speedup'}
+    """
+    worker_counts = worker_counts or sorted({1, 2, 4, PDF_EXTRACTION_WORKERS})
+    target_date = datetime.now()
+    fetcher = CMEOptionsDataFetcher()
+    
+    results = {}
+    for requested in worker_counts:
+        start = time.perf_counter()
+        df = fetcher.extract_options_from_pdf(pdf_path, target_date, workers=requested, use_text_cache=False)
+        elapsed = time.perf_counter() - start
+        
+        pages = fetcher.last_extraction.get('pages', 0)
+        workers = fetcher.last_extraction.get('workers', 0)
+        if workers in results:
+            logger.info("⏱️ %d worker richiesti: eseguiti con %d, già misurato", requested, workers)
+            continue
+        
+        results[workers] = {
+            'requested_workers': requested,
+            'seconds': round(elapsed, 3),
+            'pages': pages,
+            'pages_per_second': round(pages / elapsed, 2) if elapsed > 0 else None,
+            'records': len(df)
+        }
+    
+    serial_seconds = results.get(1, {}).get('seconds')
+    for workers, stats in results.items():
+        stats['speedup'] = round(serial_seconds / stats['seconds'], 2) if serial_seconds and stats['seconds'] else None
+        logger.info(f"⏱️ {workers} worker: {stats['pages_per_second']} pagine/s (speedup {stats['speedup']}x)")
+    
+    return results
+
 def main():
     """Funzione principale per l'acquisizione giornaliera dei dati"""
     logger.info("🚀 Avvio acquisizione dati opzioni giornaliera")
     
-    # Determina la data target (sessione di trading precedente)
-    today = datetime.now()
-    
-    # Se oggi è lunedì, prendi i dati di venerdì
-    if today.weekday() == 0:  # Lunedì
-        target_date = today - timedelta(days=3)
-    # Se oggi è fine settimana, prendi i dati di venerdì
-    elif today.weekday() >= 5:  # Sabato o domenica
-        days_back = today.weekday() - 4
-        target_date = today - timedelta(days=days_back)
-    else:
-        # Altrimenti prendi i dati del giorno precedente
-        target_date = today - timedelta(days=1)
+    # Determina la data target (sessione di trading precedente, festività escluse)
+    target_date = previous_trading_day(datetime.now())
     
     logger.info(f"📅 Data target per acquisizione dati: {target_date.strftime('%Y-%m-%d')}")
     
@@ -513,26 +1203,31 @@ def main():
     
     success_count = 0
     total_operations = 2
+    metrics = PipelineMetrics('options')
+    results = {'cme_options': None, 'cboe_sentiment': None}
     
     # 1. Acquisizione dati CME Options
     try:
         logger.info("1️⃣ Avvio acquisizione dati opzioni CME...")
-        cme_fetcher = CMEOptionsDataFetcher()
+        cme_fetcher = CMEOptionsDataFetcher(metrics)
         
         # Scarica il bulletin
-        bulletin_path = cme_fetcher.download_cme_bulletin(target_date)
+        with metrics.stage('cme_download'):
+            bulletin_path = cme_fetcher.download_cme_bulletin(target_date)
         
         if bulletin_path:
             # Estrae i dati in base al tipo di file
-            if bulletin_path.endswith('.pdf'):
-                options_df = cme_fetcher.extract_options_from_pdf(bulletin_path, target_date)
-            else:
-                options_df = cme_fetcher.extract_options_from_txt(bulletin_path, target_date)
+            with metrics.stage('cme_parse'), metrics.timer('parse_seconds'):
+                if raw_name(bulletin_path).endswith('.pdf'):
+                    options_df = cme_fetcher.extract_options_from_pdf(bulletin_path, target_date)
+                else:
+                    options_df = cme_fetcher.extract_options_from_txt(bulletin_path, target_date)
             
             # Salva i dati
             if not options_df.empty:
-                saved_path = save_options_data(options_df, target_date)
+                saved_path = save_options_data(options_df, target_date, metrics)
                 if saved_path:
+                    results['cme_options'] = saved_path
                     success_count += 1
                     logger.info("✅ Acquisizione dati CME completata con successo")
                 else:
@@ -548,13 +1243,15 @@ def main():
     # 2. Acquisizione dati CBOE Sentiment
     try:
         logger.info("2️⃣ Avvio acquisizione dati sentiment CBOE...")
-        cboe_fetcher = CBOEDataFetcher()
+        cboe_fetcher = CBOEDataFetcher(metrics)
         
-        sentiment_data = cboe_fetcher.fetch_put_call_ratio(target_date)
+        with metrics.stage('cboe_sentiment'):
+            sentiment_data = cboe_fetcher.fetch_put_call_ratio(target_date)
         
         if sentiment_data:
-            saved_path = save_sentiment_data(sentiment_data, target_date)
+            saved_path = save_sentiment_data(sentiment_data, target_date, metrics)
             if saved_path:
+                results['cboe_sentiment'] = saved_path
                 success_count += 1
                 logger.info("✅ Acquisizione dati CBOE completata con successo")
             else:
@@ -565,6 +1262,9 @@ def main():
     except Exception as e:
         logger.error(f"❌ Errore nell'acquisizione dati CBOE: {e}")
     
+    # Genera report riassuntivo
+    generate_options_report(results, target_date, metrics)
+    
     # Report finale
     logger.info(f"📊 Acquisizione completata: {success_count}/{total_operations} operazioni riuscite")
     
@@ -578,6 +1278,27 @@ def main():
         logger.error("💥 Acquisizione fallita completamente")
         return 2
 
+def parse_args():
+    """Parsing degli argomenti da linea di comando"""
+    parser = argparse.ArgumentParser(description='Acquisizione dati opzioni CME e sentiment CBOE')
+    parser.add_argument('--benchmark-pdf', metavar='PDF', help='Misura pagine/s seriale vs parallelo su un bulletin PDF')
+    parser.add_argument('--workers', type=int, nargs='+', help='Numeri di worker da misurare nel benchmark')
+    parser.add_argument('--compress-archive', action='store_true',
+                        help='Comprime i bulletin già scaricati ancora non compressi nella data lake')
+    return parser.parse_args()
+
 if __name__ == "__main__":
+    args = parse_args()
+    setup_logging()
+    
+    if args.benchmark_pdf:
+        print(json.dumps(benchmark_pdf_extraction(args.benchmark_pdf, args.workers), indent=2))
+        sys.exit(0)
+    
+    if args.compress_archive:
+        compacted = BulletinStore(DATA_LAKE_DIR).compact()
+        logger.info(f"🗜️ {compacted} bulletin compressi nell'archivio")
+        sys.exit(0)
+    
     exit_code = main()
     sys.exit(exit_code)
\ No newline at end of file
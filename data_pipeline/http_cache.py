@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Cache su disco delle risposte HTTP grezze per la data pipeline.
+Si installa in modo trasparente sotto la requests.Session dei fetcher
+(Finnhub, CME, CBOE) come transport adapter.
+
+Funzionalità principali:
+- Chiave per metodo + URL con parametri normalizzati (gli header di autenticazione sono esclusi)
+- Body compresso gzip con metadati di risposta
+- Regole di immutabilità: le risposte riferite a date/finestre passate non scadono mai
+- Pulizia periodica: rimozione delle voci scadute e limite di dimensione su disco
+- Modalità replay: nessun accesso alla rete, la pipeline gira offline sulle risposte registrate
+
+Modalità (variabile d'ambiente PIPELINE_HTTP_CACHE):
+- off:    cache disattivata
+- on:     legge le voci valide e registra le risposte 200 (default)
+- record: come 'on', registra anche le risposte in streaming
+- replay: serve solo dalla cache, i miss restituiscono HTTP 504
+"""
+
+import gzip
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from lake_io import atomic_write
+
+logger = logging.getLogger(__name__)
+
+# Directory della cache (dentro la data lake)
+HTTP_CACHE_DIR = os.path.join(os.path.dirname(__file__), '..', 'data_lake', '.http_cache')
+
+HTTP_CACHE_MODE = os.environ.get('PIPELINE_HTTP_CACHE', 'on').lower()
+HTTP_CACHE_MODES = ('off', 'on', 'record', 'replay')
+
+# Validità delle risposte che possono ancora cambiare (secondi)
+HTTP_CACHE_TTL = 900
+
+# Dimensione massima della cache su disco (MB): oltre il limite si eliminano le voci più vecchie
+HTTP_CACHE_MAX_MB = float(os.environ.get('PIPELINE_HTTP_CACHE_MAX_MB', 1024))
+
+# Intervallo minimo tra due pulizie della cache (secondi)
+HTTP_CACHE_PRUNE_INTERVAL = 300
+
+# Una finestra temporale è considerata definitiva dopo questo margine (secondi)
+IMMUTABLE_GRACE_SECONDS = 3600
+
+# Header marcatore delle risposte servite dalla cache
+CACHE_STATUS_HEADER = 'X-Pipeline-Cache'
+
+# Header non riutilizzabili: il body salvato è già decodificato
+_DROPPED_HEADERS = ('content-encoding', 'transfer-encoding', 'content-length', 'connection')
+
+_DATE_PATTERN = re.compile(r'(?<!\d)(20\d{2})-?(\d{2})-?(\d{2})(?!\d)')
+
+def _normalize_url(url: str) -> str:
+    """URL con query string ordinata per una chiave stabile"""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, query, ''))
+
+def cache_key(method: str, url: str) -> str:
+    """Chiave di cache per metodo e URL"""
+    return hashlib.sha256(f"{method.upper()} {_normalize_url(url)}".encode('utf-8')).hexdigest()
+
+def is_immutable(url: str, now: Optional[float] = None) -> bool:
+    """
+    Determina se la risposta di un URL non può più cambiare
+
+    Args:
+        url: URL completo della richiesta
+        now: Timestamp corrente (default: time.time())
+
+    Returns:
+        True se la richiesta si riferisce solo a date/finestre passate
+    """
+    now = now or time.time()
+    parts = urlsplit(url)
+    params = dict(parse_qsl(parts.query))
+
+    # Finestre candle Finnhub: definitive quando 'to' è nel passato
+    if params.get('to', '').isdigit():
+        return int(params['to']) < now - IMMUTABLE_GRACE_SECONDS
+
+    # Date nell'URL (stl_YYYYMMDD, date=YYYY-MM-DD, ...): definitive se precedenti ad oggi
+    today = datetime.fromtimestamp(now, tz=timezone.utc).date()
+    dates = []
+    for year, month, day in _DATE_PATTERN.findall(parts.path + '?' + parts.query):
+        try:
+            dates.append(datetime(int(year), int(month), int(day)).date())
+        except ValueError:
+            continue
+
+    return bool(dates) and all(d < today for d in dates)
+
+class CachingHTTPAdapter(HTTPAdapter):
+    """Transport adapter con cache su disco delle risposte HTTP"""
+
+    def __init__(self, cache_dir: str = HTTP_CACHE_DIR, mode: str = HTTP_CACHE_MODE,
+                 ttl: int = HTTP_CACHE_TTL, max_bytes: Optional[int] = None, **kwargs):
+        super().__init__(**kwargs)
+        if mode not in HTTP_CACHE_MODES:
+            logger.warning("⚠️ Modalità cache HTTP sconosciuta '%s', uso 'on'", mode)
+            mode = 'on'
+        self.cache_dir = cache_dir
+        self.mode = mode
+        self.ttl = ttl
+        self.max_bytes = int(HTTP_CACHE_MAX_MB * 1024 * 1024) if max_bytes is None else max_bytes
+        self._prune_lock = threading.Lock()
+        self._last_prune = 0.0
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.gz")
+
+    def _load(self, key: str) -> Optional[Dict]:
+        """Carica una voce di cache (metadati + body) o None"""
+        path = self._entry_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with gzip.open(path, 'rb') as f:
+                meta = json.loads(f.readline().decode('utf-8'))
+                meta['body'] = f.read()
+            return meta
+        except (OSError, ValueError) as e:
+            logger.debug("Voce cache HTTP illeggibile %s: %s", path, e)
+            return None
+
+    def _store(self, key: str, response: requests.Response, body: bytes):
+        """Salva la risposta in cache (scrittura atomica)"""
+        path = self._entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        meta = {
+            'method': response.request.method,
+            'url': response.request.url,
+            'status': response.status_code,
+            'reason': response.reason,
+            'headers': {k: v for k, v in response.headers.items() if k.lower() not in _DROPPED_HEADERS},
+            'stored_at': time.time(),
+            'immutable': is_immutable(response.request.url)
+        }
+
+        # Cache rigenerabile: rename atomico senza fsync
+        with atomic_write(path, 'wb', fsync=False) as target:
+            with gzip.GzipFile(fileobj=target, mode='wb') as f:
+                f.write(json.dumps(meta).encode('utf-8') + b'\n')
+                f.write(body)
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """
+        Elimina le voci non immutabili scadute e, oltre max_bytes, le voci
+        meno recenti. Solo i metadati delle voci più vecchie del TTL vengono letti.
+
+        Args:
+            now: Timestamp corrente (default: time.time())
+
+        Returns:
+            Numero di voci eliminate
+        """
+        now = now or time.time()
+        entries = []
+        removed = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith('.gz'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                    if now - stat.st_mtime > self.ttl:
+                        with gzip.open(path, 'rb') as f:
+                            immutable = json.loads(f.readline().decode('utf-8')).get('immutable')
+                        if not immutable:
+                            os.remove(path)
+                            removed += 1
+                            continue
+                except (OSError, ValueError):
+                    # Voce illeggibile: non più servibile, si elimina
+                    try:
+                        os.remove(path)
+                        removed += 1
+                    except OSError:
+                        pass
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                continue
+            total -= size
+
+        if removed:
+            logger.debug("🧹 Cache HTTP: %d voci eliminate (%.1f MB residui)", removed, total / 1024 / 1024)
+        return removed
+
+    def _maybe_prune(self):
+        """Pulizia throttled dopo le scritture (mai in record/replay: le registrazioni vanno conservate)"""
+        if self.mode != 'on' or time.time() - self._last_prune < HTTP_CACHE_PRUNE_INTERVAL:
+            return
+        if not self._prune_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_prune = time.time()
+            self.prune()
+        except OSError as e:
+            logger.debug("Pulizia cache HTTP non riuscita: %s", e)
+        finally:
+            self._prune_lock.release()
+
+    def _is_fresh(self, entry: Dict) -> bool:
+        if self.mode == 'replay' or entry.get('immutable'):
+            return True
+        return time.time() - entry.get('stored_at', 0) <= self.ttl
+
+    def _build_response(self, request, entry: Optional[Dict], cache_status: str, stream: bool) -> requests.Response:
+        """Costruisce una Response a partire da una voce di cache"""
+        response = requests.Response()
+        response.request = request
+        response.url = request.url
+        response.connection = self
+
+        if entry is None:
+            # Miss in modalità replay: nessun accesso alla rete
+            response.status_code = 504
+            response.reason = 'Replay cache miss'
+            response.headers = CaseInsensitiveDict({CACHE_STATUS_HEADER: cache_status})
+            body = b''
+        else:
+            response.status_code = entry['status']
+            response.reason = entry.get('reason', '')
+            response.headers = CaseInsensitiveDict(entry.get('headers', {}))
+            response.headers[CACHE_STATUS_HEADER] = cache_status
+            body = b'' if request.method == 'HEAD' else entry['body']
+
+        response.headers['Content-Length'] = str(len(body))
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.raw = io.BytesIO(body)
+        if not stream:
+            response.content  # Precarica il body come una risposta non in streaming
+        return response
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        if self.mode == 'off' or request.method not in ('GET', 'HEAD'):
+            return super().send(request, stream=stream, timeout=timeout, verify=verify, cert=cert, proxies=proxies)
+
+        key = cache_key(request.method, request.url)
+        entry = self._load(key)
+
+        # Una HEAD può essere servita dalla GET registrata dello stesso URL
+        if entry is None and request.method == 'HEAD':
+            entry = self._load(cache_key('GET', request.url))
+
+        if entry is not None and self._is_fresh(entry):
+            logger.debug("📋 Cache HTTP hit: %s", request.url)
+            return self._build_response(request, entry, 'replay' if self.mode == 'replay' else 'hit', stream)
+
+        if self.mode == 'replay':
+            logger.warning("⚠️ Replay: risposta non registrata per %s", request.url)
+            return self._build_response(request, None, 'miss', stream)
+
+        response = super().send(request, stream=stream, timeout=timeout, verify=verify, cert=cert, proxies=proxies)
+
+        if response.status_code != 200:
+            return response
+
+        # Le risposte in streaming si registrano solo in modalità 'record'
+        if stream and self.mode != 'record':
+            return response
+
+        body = b'' if request.method == 'HEAD' else response.content
+        try:
+            self._store(key, response, body)
+        except OSError as e:
+            logger.debug("Impossibile salvare la risposta in cache: %s", e)
+        self._maybe_prune()
+
+        if stream:
+            # Il body è stato consumato: restituisce una copia rileggibile
+            return self._build_response(request, self._load(key), 'stored', stream)
+        return response
+
+def install_response_cache(session: requests.Session, mode: str = HTTP_CACHE_MODE,
+                           cache_dir: str = HTTP_CACHE_DIR, adapter_class: type = CachingHTTPAdapter,
+                           **adapter_options) -> CachingHTTPAdapter:
+    """
+    Monta la cache delle risposte HTTP su una sessione esistente
+
+    Args:
+        session: Sessione requests da instrumentare
+        mode: Modalità della cache (off, on, record, replay)
+        cache_dir: Directory della cache
+        adapter_class: CachingHTTPAdapter o una sua sottoclasse
+        **adapter_options: Opzioni di HTTPAdapter (pool_connections, pool_maxsize, max_retries)
+
+    Returns:
+        L'adapter montato sulla sessione
+    """
+    adapter = adapter_class(cache_dir=cache_dir, mode=mode, **adapter_options)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return adapter
+
+def is_replay_mode() -> bool:
+    """True se la pipeline gira offline sulle risposte registrate"""
+    return HTTP_CACHE_MODE == 'replay'
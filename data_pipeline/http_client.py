@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Client HTTP condiviso dai fetcher della pipeline e dell'analytics engine
+(Finnhub, CME, CBOE, bridge MT5).
+Tutte le sessioni nascono da create_session, che monta un unico adapter con
+pool di connessioni dimensionati, keep-alive, retry e cache delle risposte.
+
+Funzionalità principali:
+- Pool di connessioni per host dimensionati per i thread della pipeline (keep-alive)
+- Retry con backoff esponenziale e jitter su errori di connessione e 429/5xx,
+  rispettando l'header Retry-After (con un tetto)
+- Limite di richieste in volo per host condiviso da tutte le sessioni del processo,
+  occupato solo per il singolo tentativo (non durante backoff e redirect)
+- Timeout di default (connect, read) per le chiamate che non ne indicano uno
+- Load test locale che misura il riuso delle connessioni (--load-test)
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+import requests
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+from http_cache import HTTP_CACHE_MODE, CachingHTTPAdapter, install_response_cache
+from pipeline_logging import setup_logging
+
+logger = logging.getLogger(__name__)
+
+# Pool di connessioni: host distinti tenuti in cache e connessioni keep-alive per host
+HTTP_POOL_CONNECTIONS = 16
+HTTP_POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', 16))
+
+# Timeout di default (connect, read) in secondi
+HTTP_DEFAULT_TIMEOUT = (5, 30)
+
+# Retry: tentativi, backoff esponenziale (0.5, 1, 2, ... s) con jitter e tetto
+HTTP_RETRY_TOTAL = int(os.environ.get('HTTP_RETRY_TOTAL', 3))
+HTTP_BACKOFF_FACTOR = 0.5
+HTTP_BACKOFF_MAX = 30.0
+HTTP_RETRY_AFTER_MAX = 60.0
+HTTP_RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Richieste in volo per host (tutte le sessioni del processo)
+HTTP_HOST_CONCURRENCY = int(os.environ.get('HTTP_HOST_CONCURRENCY', 8))
+HOST_CONCURRENCY_OVERRIDES = {
+    'finnhub.io': 4
+}
+
+_host_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+_host_semaphores_lock = threading.Lock()
+
+def host_limit(host: str) -> int:
+    """Richieste contemporanee consentite verso un host"""
+    return HOST_CONCURRENCY_OVERRIDES.get(host, HTTP_HOST_CONCURRENCY)
+
+def _host_semaphore(host: str) -> threading.BoundedSemaphore:
+    with _host_semaphores_lock:
+        semaphore = _host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(host_limit(host))
+            _host_semaphores[host] = semaphore
+        return semaphore
+
+class JitteredRetry(Retry):
+    """Retry di urllib3 con jitter sul backoff e tetto sull'attesa da Retry-After"""
+
+    def get_backoff_time(self) -> float:
+        # "Equal jitter": metà del backoff fissa, metà casuale, così i client non si sincronizzano
+        backoff = min(super().get_backoff_time(), HTTP_BACKOFF_MAX)
+        return backoff / 2 + random.uniform(0, backoff / 2) if backoff > 0 else 0
+
+    def get_retry_after(self, response) -> Optional[float]:
+        retry_after = super().get_retry_after(response)
+        return None if retry_after is None else min(retry_after, HTTP_RETRY_AFTER_MAX)
+
+def build_retry(total: int = HTTP_RETRY_TOTAL) -> JitteredRetry:
+    """Politica di retry condivisa (solo metodi idempotenti, risposta finale restituita al chiamante)"""
+    return JitteredRetry(
+        total=total,
+        connect=total,
+        read=total,
+        status=total,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        status_forcelist=HTTP_RETRY_STATUSES,
+        allowed_methods=frozenset(['GET', 'HEAD', 'OPTIONS']),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+
+class _HostLimitedPoolMixin:
+    """
+    Pool di connessioni urllib3 che occupa il permesso dell'host per un singolo
+    tentativo (connessione, invio e header della risposta). Le attese di backoff
+    dei retry e i redirect, che ripassano da Session.send, non tengono il permesso.
+    """
+
+    def _make_request(self, *args, **kwargs):
+        with _host_semaphore(self.host or ''):
+            return super()._make_request(*args, **kwargs)
+
+class HostLimitedHTTPConnectionPool(_HostLimitedPoolMixin, HTTPConnectionPool):
+    pass
+
+class HostLimitedHTTPSConnectionPool(_HostLimitedPoolMixin, HTTPSConnectionPool):
+    pass
+
+HOST_LIMITED_POOL_CLASSES = {
+    'http': HostLimitedHTTPConnectionPool,
+    'https': HostLimitedHTTPSConnectionPool
+}
+
+class HostLimitedAdapter(CachingHTTPAdapter):
+    """Adapter con cache le cui connessioni rispettano il limite di richieste in volo per host"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = HOST_LIMITED_POOL_CLASSES
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        manager = super().proxy_manager_for(proxy, **proxy_kwargs)
+        # I proxy SOCKS usano pool propri di urllib3
+        if not proxy.lower().startswith('socks'):
+            manager.pool_classes_by_scheme = HOST_LIMITED_POOL_CLASSES
+        return manager
+
+class PooledSession(requests.Session):
+    """Sessione con timeout di default (il limite per host è applicato dall'adapter)"""
+
+    def __init__(self, timeout=HTTP_DEFAULT_TIMEOUT):
+        super().__init__()
+        self.default_timeout = timeout
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.default_timeout
+        return super().send(request, **kwargs)
+
+def create_session(headers: Optional[Dict[str, str]] = None, metrics=None, cache: bool = True,
+                   retries: int = HTTP_RETRY_TOTAL, timeout=HTTP_DEFAULT_TIMEOUT) -> requests.Session:
+    """
+    Crea una sessione HTTP con pool, retry, limiti per host ed eventuale cache
+
+    Args:
+        headers: Header di default della sessione
+        metrics: PipelineMetrics in cui registrare le chiamate (opzionale)
+        cache: Monta la cache su disco delle risposte (da evitare per prezzi real-time)
+        retries: Tentativi su errori di connessione e 429/5xx (0 = nessun retry)
+        timeout: Timeout di default (connect, read)
+
+    Returns:
+        Sessione configurata
+    """
+    session = PooledSession(timeout)
+    if headers:
+        session.headers.update(headers)
+
+    adapter_options = {
+        'pool_connections': HTTP_POOL_CONNECTIONS,
+        'pool_maxsize': HTTP_POOL_MAXSIZE,
+        'max_retries': build_retry(retries)
+    }
+    install_response_cache(session, mode=HTTP_CACHE_MODE if cache else 'off',
+                           adapter_class=HostLimitedAdapter, **adapter_options)
+
+    if metrics is not None:
+        metrics.instrument_session(session)
+    return session
+
+# ----------------------------------------------------------------------
+# Load test locale
+
+class _LoadTestHandler(BaseHTTPRequestHandler):
+    """Endpoint locale keep-alive che conta le connessioni TCP aperte dai client"""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True  # Come i server reali: niente attese di ACK tra header e body
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with _LoadTestHandler.lock:
+            _LoadTestHandler.connections += 1
+
+    def do_GET(self):
+        body = b'{"c": 5000.25}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def run_load_test(requests_count: int = 500, concurrency: int = 8) -> Dict[str, Dict]:
+    """
+    Confronta richieste senza sessione e con la sessione condivisa su un server locale
+
+    Args:
+        requests_count: Richieste per scenario
+        concurrency: Thread client
+
+    Returns:
+        Per scenario: richieste, connessioni TCP aperte, durata e richieste/s
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _LoadTestHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/quote"
+
+    session = create_session(cache=False)
+    scenarios = {
+        'no_session': lambda: requests.get(url, timeout=HTTP_DEFAULT_TIMEOUT).content,
+        'shared_session': lambda: session.get(url).content
+    }
+
+    results = {}
+    try:
+        for name, call in scenarios.items():
+            _LoadTestHandler.connections = 0
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                list(executor.map(lambda _: call(), range(requests_count)))
+            elapsed = time.perf_counter() - start
+            results[name] = {
+                'requests': requests_count,
+                'tcp_connections': _LoadTestHandler.connections,
+                'seconds': round(elapsed, 3),
+                'requests_per_second': round(requests_count / elapsed, 1)
+            }
+            logger.info(f"🔌 {name}: {requests_count} richieste su {_LoadTestHandler.connections} connessioni, "
+                        f"{requests_count / elapsed:.0f} req/s")
+    finally:
+        session.close()
+        server.shutdown()
+        server.server_close()
+
+    return results
+
+def parse_args():
+    """Parsing degli argomenti da linea di comando"""
+    parser = argparse.ArgumentParser(description='Client HTTP condiviso della pipeline')
+    parser.add_argument('--load-test', action='store_true', help='Misura il riuso delle connessioni su un server locale')
+    parser.add_argument('--requests', type=int, default=500, help='Richieste per scenario')
+    parser.add_argument('--concurrency', type=int, default=8, help='Thread client')
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.load_test:
+        setup_logging(log_file=None)
+        print(json.dumps(run_load_test(args.requests, args.concurrency), indent=2))
+    sys.exit(0)
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Scritture sicure nella data lake condivisa tra ingestion e analytics.
+Ogni file viene scritto in un temporaneo nella stessa directory, sincronizzato
+su disco e rinominato in modo atomico sul path finale: un lettore concorrente
+vede sempre la versione precedente completa o quella nuova completa, mai un
+file a metà. I file aggiornati sul posto (append/upsert delle barre intraday,
+manifest letti e riscritti) sono protetti da lock advisory.
+
+Funzionalità principali:
+- atomic_write: temporaneo, flush + fsync, rename atomico e fsync della directory
+- Helper per CSV (pandas), JSON, testo e byte
+- lake_lock: lock advisory condiviso/esclusivo per file (fcntl.flock, msvcrt su Windows)
+  su un file sidecar nella sottodirectory .locks, con timeout
+- append_line: append di una riga sotto lock esclusivo (file eventi JSONL)
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+try:
+    import msvcrt
+    MSVCRT_AVAILABLE = True
+except ImportError:
+    MSVCRT_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Sottodirectory (accanto ai file protetti) dei file di lock
+LOCKS_DIRNAME = '.locks'
+LOCK_SUFFIX = '.lock'
+TMP_SUFFIX = '.tmp'
+
+# Attesa massima di un lock in secondi (None = attesa illimitata)
+LAKE_LOCK_TIMEOUT = float(os.environ.get('LAKE_LOCK_TIMEOUT', 30))
+LOCK_POLL_INTERVAL = 0.05
+
+# fsync di file e directory ad ogni scrittura (LAKE_FSYNC=0 per dischi lenti o test)
+LAKE_FSYNC = os.environ.get('LAKE_FSYNC', '1') != '0'
+
+# Su Windows il rename fallisce finché un lettore ha il file di destinazione aperto
+REPLACE_RETRIES = 20
+REPLACE_RETRY_DELAY = 0.05
+
+class LakeLockTimeout(TimeoutError):
+    """Lock di un file della data lake non ottenuto entro il timeout"""
+
+def _fsync_directory(directory: str):
+    """Rende persistente il rename (voce di directory); non supportato su Windows"""
+    if not LAKE_FSYNC or os.name == 'nt':
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def replace_file(tmp_path: str, path: str, fsync: bool = LAKE_FSYNC):
+    """
+    Rinomina in modo atomico un file temporaneo già scritto sul path finale
+
+    Args:
+        tmp_path: File temporaneo completo (nella stessa directory di path)
+        path: Path finale
+        fsync: Sincronizza su disco il contenuto e la directory
+    """
+    if fsync:
+        fd = os.open(tmp_path, os.O_RDWR)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    for attempt in range(REPLACE_RETRIES):
+        try:
+            os.replace(tmp_path, path)
+            break
+        except PermissionError:
+            if os.name != 'nt' or attempt == REPLACE_RETRIES - 1:
+                raise
+            time.sleep(REPLACE_RETRY_DELAY)
+
+    if fsync:
+        _fsync_directory(os.path.dirname(os.path.abspath(path)))
+
+@contextmanager
+def atomic_write(path: str, mode: str = 'w', fsync: bool = LAKE_FSYNC, **open_kwargs) -> Iterator:
+    """
+    File temporaneo che sostituisce path in modo atomico all'uscita senza errori.
+    In caso di eccezione il temporaneo viene rimosso e path resta invariato.
+
+    Args:
+        path: Path finale
+        mode: 'w' (testo) o 'wb' (binario)
+        fsync: Sincronizza su disco prima del rename
+        **open_kwargs: Argomenti aggiuntivi di open (encoding, newline, ...)
+
+    Yields:
+        File aperto sul temporaneo
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    # Un temporaneo per processo e thread: scrittori concorrenti non si sovrascrivono
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}{TMP_SUFFIX}"
+
+    try:
+        with open(tmp_path, mode, **open_kwargs) as f:
+            yield f
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+        replace_file(tmp_path, path, fsync=False)
+        if fsync:
+            _fsync_directory(directory)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def write_text_atomic(path: str, text: str, fsync: bool = LAKE_FSYNC) -> str:
+    """Scrive un file di testo in modo atomico"""
+    with atomic_write(path, 'w', fsync=fsync, encoding='utf-8') as f:
+        f.write(text)
+    return path
+
+def write_bytes_atomic(path: str, payload: bytes, fsync: bool = LAKE_FSYNC) -> str:
+    """Scrive un file binario in modo atomico"""
+    with atomic_write(path, 'wb', fsync=fsync) as f:
+        f.write(payload)
+    return path
+
+def write_json_atomic(path: str, data, fsync: bool = LAKE_FSYNC, **dump_kwargs) -> str:
+    """
+    Scrive un file JSON in modo atomico
+
+    Args:
+        path: Path finale
+        data: Contenuto serializzabile in JSON
+        fsync: Sincronizza su disco prima del rename
+        **dump_kwargs: Argomenti di json.dump (indent, default, ...)
+
+    Returns:
+        Path del file scritto
+    """
+    with atomic_write(path, 'w', fsync=fsync, encoding='utf-8') as f:
+        json.dump(data, f, **dump_kwargs)
+    return path
+
+def write_csv_atomic(df, path: str, fsync: bool = LAKE_FSYNC, **to_csv_kwargs) -> str:
+    """
+    Scrive un DataFrame in CSV in modo atomico
+
+    Args:
+        df: DataFrame pandas
+        path: Path finale
+        fsync: Sincronizza su disco prima del rename
+        **to_csv_kwargs: Argomenti di DataFrame.to_csv (index, header, ...)
+
+    Returns:
+        Path del file scritto
+    """
+    with atomic_write(path, 'w', fsync=fsync, encoding='utf-8', newline='') as f:
+        df.to_csv(f, **to_csv_kwargs)
+    return path
+
+def lock_path(path: str) -> str:
+    """File di lock associato a un file della data lake"""
+    directory, name = os.path.split(os.path.abspath(path))
+    return os.path.join(directory, LOCKS_DIRNAME, name + LOCK_SUFFIX)
+
+def _try_lock(fd: int, shared: bool) -> bool:
+    if FCNTL_AVAILABLE:
+        try:
+            fcntl.flock(fd, (fcntl.LOCK_SH if shared else fcntl.LOCK_EX) | fcntl.LOCK_NB)
+            return True
+        except (BlockingIOError, PermissionError):
+            return False
+    if MSVCRT_AVAILABLE:
+        # msvcrt non ha lock condivisi: anche i lettori prendono il lock esclusivo
+        try:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+    return True
+
+def _unlock(fd: int):
+    if FCNTL_AVAILABLE:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    elif MSVCRT_AVAILABLE:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+@contextmanager
+def lake_lock(path: str, shared: bool = False, timeout: Optional[float] = LAKE_LOCK_TIMEOUT) -> Iterator[None]:
+    """
+    Lock advisory su un file della data lake, tra processi e tra thread.
+    Serve solo dove un file viene letto e riscritto o modificato sul posto:
+    i file sostituiti con atomic_write si leggono senza lock.
+
+    Args:
+        path: File da proteggere (il lock è su un sidecar in .locks/)
+        shared: Lock condiviso (lettori) invece che esclusivo (scrittori)
+        timeout: Attesa massima in secondi (None = illimitata)
+
+    Raises:
+        LakeLockTimeout: Se il lock non è ottenuto entro il timeout
+    """
+    sidecar = lock_path(path)
+    os.makedirs(os.path.dirname(sidecar), exist_ok=True)
+    # Ogni acquisizione apre il proprio descrittore: flock esclude anche i thread dello stesso processo
+    fd = os.open(sidecar, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        waited = False
+        while not _try_lock(fd, shared):
+            if deadline is not None and time.monotonic() >= deadline:
+                raise LakeLockTimeout(f"Lock {'condiviso' if shared else 'esclusivo'} su "
+                                      f"{os.path.basename(path)} non ottenuto in {timeout:.0f}s")
+            if not waited:
+                logger.debug(f"🔒 In attesa del lock su {os.path.basename(path)}")
+                waited = True
+            time.sleep(LOCK_POLL_INTERVAL)
+
+        try:
+            yield
+        finally:
+            _unlock(fd)
+    finally:
+        os.close(fd)
+
+def append_line(path: str, line: str, fsync: bool = LAKE_FSYNC, timeout: Optional[float] = LAKE_LOCK_TIMEOUT):
+    """
+    Aggiunge una riga a un file (es. eventi JSONL) sotto lock esclusivo,
+    con una sola write per riga
+
+    Args:
+        path: File di destinazione
+        line: Riga senza terminatore
+        fsync: Sincronizza su disco dopo la scrittura
+        timeout: Attesa massima del lock
+    """
+    with lake_lock(path, timeout=timeout):
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
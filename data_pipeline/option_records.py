@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Buffer colonnare dei record di opzioni estratti dai bulletin CME.
+I parser emettono tuple tramite generatori; il buffer le scrive in blocchi
+numpy preallocati e il DataFrame (o la tabella Arrow) viene costruito una
+sola volta alla fine, senza dizionari per riga.
+
+Funzionalità principali:
+- Blocchi preallocati di dimensione fissa, concatenati una sola volta
+- Codifica categoriale di underlying, simbolo e tipo (CALL/PUT)
+- Volume e open interest in int32
+- Giorni alla scadenza dalla data codificata nel simbolo (vuoti se la scadenza non è nota)
+- Uscita come pandas DataFrame o pyarrow Table (se disponibile)
+"""
+
+import re
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Record per blocco preallocato
+RECORD_CHUNK_SIZE = 65536
+
+# Ordine delle colonne del formato standard *_cme_options.csv
+OPTIONS_COLUMNS_ORDER = ['date', 'underlying', 'option_symbol', 'strike', 'type', 'volume', 'open_interest', 'dte']
+
+OPTION_TYPE_CATEGORIES = ['CALL', 'PUT']
+
+# Scadenza YYMMDD in coda al simbolo di opzione (es. ES250117, E1A250110)
+OPTION_EXPIRY_PATTERN = re.compile(r'[A-Z](\d{6})$')
+
+def days_to_expiry(option_symbol: str, date_str: str) -> Optional[int]:
+    """
+    Giorni di calendario dalla data del bulletin alla scadenza codificata nel simbolo
+
+    Args:
+        option_symbol: Simbolo del contratto di opzione
+        date_str: Data di riferimento (YYYY-MM-DD)
+
+    Returns:
+        Giorni alla scadenza o None se il simbolo non codifica una scadenza valida
+    """
+    match = OPTION_EXPIRY_PATTERN.search(option_symbol)
+    if not match:
+        return None
+    try:
+        expiry = datetime.strptime(match.group(1), '%y%m%d')
+    except ValueError:
+        return None
+    days = (expiry - datetime.strptime(date_str, '%Y-%m-%d')).days
+    return days if days >= 0 else None
+
+# Layout di un blocco: colonna -> dtype
+_CHUNK_DTYPES = {
+    'underlying': np.int16,
+    'option_symbol': np.int32,
+    'strike': np.float64,
+    'is_put': np.bool_,
+    'volume': np.int32,
+    'open_interest': np.int32
+}
+
+class OptionColumnBuffer:
+    """
+    Accumulatore colonnare di record (underlying, option_symbol, strike, tipo, volume, open_interest).
+    Volume e open interest sono int32 (massimo 2.1 miliardi per strike).
+    """
+
+    def __init__(self, chunk_size: int = RECORD_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self._chunks: List[Dict[str, np.ndarray]] = []
+        self._current = None
+        self._position = 0
+        self._underlyings: Dict[str, int] = {}
+        self._symbols: Dict[str, int] = {}
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getstate__(self):
+        # Nel pickle (ritorno dai processi worker) solo la parte scritta dei blocchi
+        self._close_chunk()
+        return self.__dict__
+
+    def _close_chunk(self):
+        """Chiude il blocco corrente conservandone solo la parte scritta"""
+        if self._current is not None and self._position:
+            self._chunks.append({column: values[:self._position] for column, values in self._current.items()})
+        self._current = None
+        self._position = 0
+
+    def _new_chunk(self):
+        self._close_chunk()
+        self._current = {column: np.empty(self.chunk_size, dtype=dtype) for column, dtype in _CHUNK_DTYPES.items()}
+
+    def append(self, underlying: str, option_symbol: str, strike: float, option_type: str,
+               volume: int, open_interest: int):
+        """Scrive un record nel blocco corrente (ne alloca uno nuovo quando è pieno)"""
+        if self._current is None or self._position == self.chunk_size:
+            self._new_chunk()
+
+        chunk = self._current
+        position = self._position
+        chunk['underlying'][position] = self._underlyings.setdefault(underlying, len(self._underlyings))
+        chunk['option_symbol'][position] = self._symbols.setdefault(option_symbol, len(self._symbols))
+        chunk['strike'][position] = strike
+        chunk['is_put'][position] = option_type == 'PUT'
+        chunk['volume'][position] = volume
+        chunk['open_interest'][position] = open_interest
+
+        self._position = position + 1
+        self._count += 1
+
+    def extend(self, records: Iterable[Tuple]) -> 'OptionColumnBuffer':
+        """Consuma un generatore di record"""
+        append = self.append
+        for record in records:
+            append(*record)
+        return self
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Colonne codificate concatenate (una sola copia per colonna)"""
+        parts = list(self._chunks)
+        if self._current is not None and self._position:
+            parts.append({column: values[:self._position] for column, values in self._current.items()})
+
+        if not parts:
+            return {column: np.empty(0, dtype=dtype) for column, dtype in _CHUNK_DTYPES.items()}
+
+        return {column: np.concatenate([part[column] for part in parts]) for column in _CHUNK_DTYPES}
+
+    def counts_by_underlying(self) -> Dict[str, int]:
+        """Numero di record per underlying"""
+        counts = np.bincount(self.columns()['underlying'], minlength=len(self._underlyings))
+        return {name: int(counts[code]) for name, code in self._underlyings.items()}
+
+    def _days_to_expiry(self, codes: np.ndarray, date_str: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Giorni alla scadenza per riga (calcolati una volta per simbolo) e maschera delle scadenze ignote"""
+        days = [days_to_expiry(symbol, date_str) for symbol in self._symbols]
+        known = np.array([day is not None for day in days], dtype=np.bool_)
+        values = np.array([day or 0 for day in days], dtype=np.int16)
+        return values[codes], ~known[codes]
+
+    def to_frame(self, date_str: str) -> pd.DataFrame:
+        """
+        DataFrame nel formato standard *_cme_options.csv, costruito una sola volta
+
+        Args:
+            date_str: Data di riferimento (YYYY-MM-DD)
+
+        Returns:
+            DataFrame con colonne categoriali per date, underlying, option_symbol e type
+            e 'dte' nullable (vuoto se il simbolo non codifica la scadenza)
+        """
+        columns = self.columns()
+        count = len(self)
+        dte, unknown = self._days_to_expiry(columns['option_symbol'], date_str)
+
+        return pd.DataFrame({
+            'date': pd.Categorical.from_codes(np.zeros(count, dtype=np.int8), [date_str]),
+            'underlying': pd.Categorical.from_codes(columns['underlying'], list(self._underlyings)),
+            'option_symbol': pd.Categorical.from_codes(columns['option_symbol'], list(self._symbols)),
+            'strike': columns['strike'],
+            'type': pd.Categorical.from_codes(columns['is_put'].astype(np.int8), OPTION_TYPE_CATEGORIES),
+            'volume': columns['volume'],
+            'open_interest': columns['open_interest'],
+            'dte': pd.arrays.IntegerArray(dte, unknown)  # Days to expiration
+        }, columns=OPTIONS_COLUMNS_ORDER)
+
+    def to_arrow(self, date_str: str) -> Optional['pa.Table']:
+        """
+        Tabella Arrow con colonne dictionary-encoded (None se pyarrow non è installato)
+
+        Args:
+            date_str: Data di riferimento (YYYY-MM-DD)
+        """
+        if not PYARROW_AVAILABLE:
+            return None
+
+        columns = self.columns()
+        count = len(self)
+        dte, unknown = self._days_to_expiry(columns['option_symbol'], date_str)
+
+        def dictionary(codes: np.ndarray, categories: List[str]) -> 'pa.DictionaryArray':
+            return pa.DictionaryArray.from_arrays(pa.array(codes), pa.array(categories, type=pa.string()))
+
+        return pa.table({
+            'date': dictionary(np.zeros(count, dtype=np.int8), [date_str]),
+            'underlying': dictionary(columns['underlying'], list(self._underlyings)),
+            'option_symbol': dictionary(columns['option_symbol'], list(self._symbols)),
+            'strike': pa.array(columns['strike']),
+            'type': dictionary(columns['is_put'].astype(np.int8), OPTION_TYPE_CATEGORIES),
+            'volume': pa.array(columns['volume']),
+            'open_interest': pa.array(columns['open_interest']),
+            'dte': pa.array(dte, mask=unknown)
+        })
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Configurazione condivisa del logging per data pipeline, analytics engine e server.
+I moduli si limitano a logging.getLogger(__name__): gli handler sono installati
+solo dall'entry point (__main__, CLI, scheduler) con setup_logging, quindi
+importare un modulo non apre file di log e non tocca il logger root.
+
+Funzionalità principali:
+- QueueHandler sul logger root: il thread che logga interpola il messaggio, accoda
+  il record e prosegue; formattazione della riga e scrittura su file/console
+  avvengono nel thread del QueueListener
+- Livello globale e livelli per modulo da argomenti o variabili d'ambiente
+  (PIPELINE_LOG_LEVEL, PIPELINE_LOG_LEVELS="structural_levels=WARNING,http_client=DEBUG")
+- Inoltro dei log dei processi worker (ProcessPoolExecutor) allo stesso listener
+- Flush e chiusura degli handler all'uscita del processo
+"""
+
+import atexit
+import logging
+import logging.handlers
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+from typing import Dict, List, Optional, Union
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+LOG_FILE = os.environ.get('PIPELINE_LOG_FILE', 'data_pipeline.log')
+LOG_LEVEL = os.environ.get('PIPELINE_LOG_LEVEL', 'INFO')
+
+# Livelli per modulo: "modulo=LIVELLO" separati da virgola
+LOG_LEVELS = os.environ.get('PIPELINE_LOG_LEVELS', '')
+
+_setup_lock = threading.Lock()
+_listeners: List[logging.handlers.QueueListener] = []
+_handlers: List[logging.Handler] = []
+_worker_queue = None
+
+def _resolve_level(level: Union[int, str]) -> int:
+    if isinstance(level, int):
+        return level
+    resolved = logging.getLevelName(str(level).strip().upper())
+    if not isinstance(resolved, int):
+        raise ValueError(f"Livello di log non valido: {level}")
+    return resolved
+
+def parse_module_levels(spec: str) -> Dict[str, int]:
+    """
+    Interpreta una specifica di livelli per modulo
+
+    Args:
+        spec: Stringa "modulo=LIVELLO,altro_modulo=LIVELLO"
+
+    Returns:
+        Dizionario nome logger -> livello numerico
+    """
+    levels = {}
+    for item in (spec or '').split(','):
+        if not item.strip():
+            continue
+        name, sep, level = item.partition('=')
+        if not sep:
+            raise ValueError(f"Specifica livello non valida (atteso modulo=LIVELLO): {item.strip()}")
+        levels[name.strip()] = _resolve_level(level)
+    return levels
+
+def setup_logging(log_file: Optional[str] = LOG_FILE, level: Union[int, str] = LOG_LEVEL,
+                  module_levels: Optional[Dict[str, Union[int, str]]] = None,
+                  stream=sys.stdout, console: bool = True) -> logging.handlers.QueueListener:
+    """
+    Configura il logging del processo (idempotente: le chiamate successive
+    aggiornano solo i livelli)
+
+    Args:
+        log_file: File di log (None = nessun file)
+        level: Livello del logger root
+        module_levels: Livelli per modulo, in aggiunta a PIPELINE_LOG_LEVELS
+        stream: Stream della console (stderr per le CLI che scrivono JSON su stdout)
+        console: Abilita l'handler su console
+
+    Returns:
+        QueueListener attivo
+    """
+    levels = parse_module_levels(LOG_LEVELS)
+    levels.update({name: _resolve_level(value) for name, value in (module_levels or {}).items()})
+
+    root = logging.getLogger()
+    with _setup_lock:
+        root.setLevel(_resolve_level(level))
+        for name, value in levels.items():
+            logging.getLogger(name).setLevel(value)
+
+        if _listeners:
+            return _listeners[0]
+
+        formatter = logging.Formatter(LOG_FORMAT)
+        if log_file:
+            # delay=True: il file è aperto dal listener alla prima scrittura
+            _handlers.append(logging.FileHandler(log_file, encoding='utf-8', delay=True))
+        if console:
+            _handlers.append(logging.StreamHandler(stream))
+        for handler in _handlers:
+            handler.setFormatter(formatter)
+
+        log_queue = queue.SimpleQueue()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        # QueueHandler standard: il messaggio è interpolato nel thread chiamante (gli
+        # argomenti mutabili non cambiano prima della scrittura e non restano in coda)
+        root.addHandler(logging.handlers.QueueHandler(log_queue))
+
+        listener = logging.handlers.QueueListener(log_queue, *_handlers, respect_handler_level=True)
+        listener.start()
+        _listeners.append(listener)
+        atexit.register(shutdown_logging)
+        return listener
+
+def shutdown_logging():
+    """Svuota le code, ferma i listener e chiude gli handler"""
+    global _worker_queue
+    with _setup_lock:
+        while _listeners:
+            _listeners.pop().stop()
+        for handler in _handlers:
+            handler.close()
+        _handlers.clear()
+        _worker_queue = None
+
+def worker_log_queue():
+    """
+    Coda tra processi su cui i worker di un ProcessPoolExecutor inoltrano i log
+    al listener del processo principale
+
+    Returns:
+        multiprocessing.Queue, o None se setup_logging non è stato chiamato
+    """
+    global _worker_queue
+    with _setup_lock:
+        if not _listeners:
+            return None
+        if _worker_queue is None:
+            _worker_queue = multiprocessing.Queue()
+            listener = logging.handlers.QueueListener(_worker_queue, *_handlers, respect_handler_level=True)
+            listener.start()
+            _listeners.append(listener)
+        return _worker_queue
+
+def init_worker_logging(log_queue, level: Union[int, str] = logging.INFO):
+    """
+    Initializer dei processi worker: i record vanno sulla coda del processo
+    principale invece che su handler propri
+
+    Args:
+        log_queue: Coda restituita da worker_log_queue (None = log del worker scartati)
+        level: Livello del logger root nel worker
+    """
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.setLevel(_resolve_level(level))
+    for name, value in parse_module_levels(LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(value)
+    if log_queue is None:
+        root.addHandler(logging.NullHandler())
+    else:
+        # QueueHandler standard: il record va serializzato con il messaggio già formattato
+        root.addHandler(logging.handlers.QueueHandler(log_queue))
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Strumentazione della data pipeline: metriche per stage e per endpoint HTTP.
+Le metriche vengono incluse nei report JSON di acquisizione ed esportate in
+un textfile Prometheus (formato del textfile collector di node_exporter).
+
+Funzionalità principali:
+- Chiamate HTTP per endpoint, percentili di latenza, byte scaricati, cache hit, retry
+- Tempo trascorso in attesa per il rate limiting e tentativi di simbolo a vuoto
+- Durata degli stage della pipeline e tempo di parsing
+- Righe scritte nella data lake e picco di memoria (RSS) del processo
+"""
+
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+from http_cache import CACHE_STATUS_HEADER
+from lake_io import write_text_atomic
+
+logger = logging.getLogger(__name__)
+
+# Directory dei textfile Prometheus
+METRICS_DIR = os.path.join(os.path.dirname(__file__), '..', 'data_lake', 'metrics')
+
+# Percentili di latenza esportati
+LATENCY_QUANTILES = (0.5, 0.9, 0.99)
+
+_DIGITS_PATTERN = re.compile(r'\d{6,}')
+
+def _endpoint_label(url: str) -> str:
+    """Etichetta endpoint stabile: host + path con date/numeri lunghi normalizzati"""
+    parts = urlsplit(url)
+    return _DIGITS_PATTERN.sub('{n}', f"{parts.netloc}{parts.path}")
+
+def _percentile(sorted_values: List[float], quantile: float) -> float:
+    """Percentile con interpolazione lineare su valori già ordinati"""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * quantile
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+def peak_rss_bytes() -> Optional[int]:
+    """Picco di memoria residente del processo in byte (None se non disponibile)"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux riporta KB, macOS byte
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except ImportError:
+        pass
+
+    try:
+        import psutil
+        memory = psutil.Process().memory_info()
+        return getattr(memory, 'peak_wset', memory.rss)
+    except ImportError:
+        return None
+
+class PipelineMetrics:
+    """Raccoglitore thread-safe delle metriche di una esecuzione della pipeline"""
+
+    def __init__(self, pipeline: str):
+        self.pipeline = pipeline
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self.http = defaultdict(lambda: {
+            'calls': 0, 'errors': 0, 'cache_hits': 0, 'bytes': 0, 'latencies': []
+        })
+        self.stages = defaultdict(float)
+        self.counters = defaultdict(float)
+
+    def record_http(self, endpoint: str, latency: float, nbytes: int, status: int, cache_status: Optional[str] = None):
+        """Registra una chiamata HTTP completata"""
+        with self._lock:
+            stats = self.http[endpoint]
+            stats['calls'] += 1
+            stats['bytes'] += nbytes
+            stats['latencies'].append(latency)
+            if status >= 400:
+                stats['errors'] += 1
+            if cache_status in ('hit', 'replay'):
+                stats['cache_hits'] += 1
+
+    def add(self, counter: str, value: float = 1):
+        """Incrementa un contatore (rate_limit_sleep_seconds, rows_written, ...)"""
+        with self._lock:
+            self.counters[counter] += value
+
+    @contextmanager
+    def stage(self, name: str):
+        """Misura la durata di uno stage della pipeline"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.stages[name] += time.perf_counter() - start
+
+    @contextmanager
+    def timer(self, counter: str):
+        """Accumula il tempo trascorso in un contatore in secondi (es. parse_seconds)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(counter, time.perf_counter() - start)
+
+    def sleep(self, seconds: float):
+        """time.sleep contabilizzato come attesa per rate limiting"""
+        if seconds > 0:
+            time.sleep(seconds)
+            self.add('rate_limit_sleep_seconds', seconds)
+
+    def instrument_session(self, session: requests.Session):
+        """Aggiunge un hook alla sessione per registrare ogni risposta HTTP"""
+        def _record_response(response, *args, **kwargs):
+            if kwargs.get('stream'):
+                nbytes = int(response.headers.get('Content-Length', 0) or 0)
+            else:
+                nbytes = len(response.content or b'')
+            self.record_http(
+                _endpoint_label(response.url),
+                response.elapsed.total_seconds() if response.elapsed else 0.0,
+                nbytes,
+                response.status_code,
+                response.headers.get(CACHE_STATUS_HEADER)
+            )
+            # Tentativi ripetuti dall'adapter (retry del client condiviso) prima della risposta finale
+            retries = getattr(response.raw, 'retries', None)
+            if retries is not None and retries.history:
+                self.add('http_retries', len(retries.history))
+            return response
+
+        session.hooks['response'].append(_record_response)
+
+    def to_dict(self) -> Dict:
+        """Snapshot delle metriche in formato serializzabile JSON"""
+        with self._lock:
+            endpoints = {}
+            for endpoint, stats in self.http.items():
+                latencies = sorted(stats['latencies'])
+                endpoints[endpoint] = {
+                    'calls': stats['calls'],
+                    'errors': stats['errors'],
+                    'cache_hits': stats['cache_hits'],
+                    'bytes': stats['bytes'],
+                    'latency_seconds': {
+                        f"p{int(q * 100)}": round(_percentile(latencies, q), 4) for q in LATENCY_QUANTILES
+                    }
+                }
+
+            return {
+                'pipeline': self.pipeline,
+                'wall_time_seconds': round(time.time() - self.started_at, 3),
+                'stages_seconds': {name: round(value, 3) for name, value in self.stages.items()},
+                'http': {
+                    'total_calls': sum(s['calls'] for s in self.http.values()),
+                    'total_bytes': sum(s['bytes'] for s in self.http.values()),
+                    'retries': int(self.counters['http_retries']),
+                    'endpoints': endpoints
+                },
+                'rate_limit_sleep_seconds': round(self.counters['rate_limit_sleep_seconds'], 3),
+                'symbol_probes_wasted': int(self.counters['symbol_probes_wasted']),
+                'parse_seconds': round(self.counters['parse_seconds'], 3),
+                'rows_written': int(self.counters['rows_written']),
+                'peak_rss_bytes': peak_rss_bytes()
+            }
+
+    def write_prometheus_textfile(self, metrics_dir: str = METRICS_DIR) -> str:
+        """
+        Esporta le metriche in un textfile Prometheus (scrittura atomica)
+
+        Args:
+            metrics_dir: Directory dei textfile
+
+        Returns:
+            Path del file scritto
+        """
+        os.makedirs(metrics_dir, exist_ok=True)
+        path = os.path.join(metrics_dir, f"{self.pipeline}_pipeline.prom")
+        snapshot = self.to_dict()
+        base = f'pipeline="{self.pipeline}"'
+
+        lines = []
+
+        def metric(name: str, metric_type: str, help_text: str, samples: List):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels, value in samples:
+                label_str = base + ''.join(f',{k}="{v}"' for k, v in labels.items())
+                lines.append(f"{name}{{{label_str}}} {value}")
+
+        endpoints = snapshot['http']['endpoints']
+        metric('pipeline_http_requests_total', 'counter', 'Chiamate HTTP per endpoint',
+               [({'endpoint': e}, s['calls']) for e, s in endpoints.items()])
+        metric('pipeline_http_errors_total', 'counter', 'Risposte HTTP con status >= 400',
+               [({'endpoint': e}, s['errors']) for e, s in endpoints.items()])
+        metric('pipeline_http_cache_hits_total', 'counter', 'Risposte servite dalla cache HTTP',
+               [({'endpoint': e}, s['cache_hits']) for e, s in endpoints.items()])
+        metric('pipeline_http_bytes_total', 'counter', 'Byte scaricati per endpoint',
+               [({'endpoint': e}, s['bytes']) for e, s in endpoints.items()])
+        metric('pipeline_http_latency_seconds', 'gauge', 'Percentili di latenza HTTP',
+               [({'endpoint': e, 'quantile': key[1:]}, value)
+                for e, s in endpoints.items() for key, value in s['latency_seconds'].items()])
+        metric('pipeline_stage_duration_seconds', 'gauge', 'Durata degli stage della pipeline',
+               [({'stage': name}, value) for name, value in snapshot['stages_seconds'].items()])
+        metric('pipeline_rate_limit_sleep_seconds', 'gauge', 'Tempo di attesa per rate limiting', [({}, snapshot['rate_limit_sleep_seconds'])])
+        metric('pipeline_symbol_probes_wasted', 'gauge', 'Tentativi di simbolo senza dati', [({}, snapshot['symbol_probes_wasted'])])
+        metric('pipeline_parse_seconds', 'gauge', 'Tempo di parsing dei dati', [({}, snapshot['parse_seconds'])])
+        metric('pipeline_rows_written', 'gauge', 'Righe scritte nella data lake', [({}, snapshot['rows_written'])])
+        metric('pipeline_wall_time_seconds', 'gauge', 'Durata complessiva della esecuzione', [({}, snapshot['wall_time_seconds'])])
+        if snapshot['peak_rss_bytes'] is not None:
+            metric('pipeline_peak_rss_bytes', 'gauge', 'Picco di memoria residente', [({}, snapshot['peak_rss_bytes'])])
+        metric('pipeline_last_run_timestamp_seconds', 'gauge', 'Timestamp di fine esecuzione', [({}, int(time.time()))])
+
+        write_text_atomic(path, '\n'.join(lines) + '\n')
+
+        logger.info(f"📈 Metriche Prometheus salvate: {path}")
+        return path
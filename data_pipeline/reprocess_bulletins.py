@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Rielaborazione storica dei Daily Bulletin CME archiviati nella data lake.
+Ricostruisce i file *_cme_options.csv di un intervallo di date distribuendo
+i bulletin su un pool di processi (una data per task) e consolida il risultato
+nell'archivio colonnare delle catene di opzioni.
+
+Funzionalità principali:
+- Pool di processi con un fetcher per worker: pattern del parser compilati una volta per processo
+- Parsing e scrittura del file giornaliero nel worker, al parent solo l'esito
+- Manifest delle date completate: un'esecuzione interrotta riparte dalle date mancanti
+- Consolidamento in option_chain_store (Parquet se pyarrow è installato)
+- Throughput in bulletin/minuto durante e al termine dell'esecuzione
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import fetch_options_data as options_job
+from bulletin_store import BulletinStore, raw_name
+from exchange_calendar import is_trading_day
+from lake_io import write_json_atomic
+from pipeline_logging import init_worker_logging, setup_logging, worker_log_queue
+
+ANALYTICS_ENGINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'analytics_engine')
+if ANALYTICS_ENGINE_DIR not in sys.path:
+    sys.path.append(ANALYTICS_ENGINE_DIR)
+
+try:
+    from option_chain_store import OptionChainStore
+    CHAIN_STORE_AVAILABLE = True
+except ImportError:
+    CHAIN_STORE_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+REPROCESS_MANIFEST_FILENAME = 'reprocess_manifest.json'
+REPROCESS_WORKERS = int(os.environ.get('REPROCESS_WORKERS', os.cpu_count() or 1))
+
+# Date completate tra due salvataggi del manifest
+MANIFEST_SAVE_EVERY = 10
+
+COMPLETED = 'completed'
+MISSING = 'missing'
+FAILED = 'failed'
+
+# Fetcher del processo worker (creato una volta dall'initializer)
+_worker_fetcher = None
+
+def _init_worker(log_queue, log_level: int):
+    """Initializer del pool: log inoltrati al processo principale, un fetcher (e un parser compilato) per processo"""
+    global _worker_fetcher
+    init_worker_logging(log_queue, log_level)
+    _worker_fetcher = options_job.CMEOptionsDataFetcher()
+
+def reprocess_date(date_str: str) -> Dict:
+    """
+    Rielabora il bulletin archiviato di una data e riscrive il file giornaliero
+
+    Args:
+        date_str: Data del bulletin (YYYY-MM-DD)
+
+    Returns:
+        Esito {'date', 'status', 'rows', 'output', 'bulletin', 'sha256', 'seconds'}
+    """
+    fetcher = _worker_fetcher or options_job.CMEOptionsDataFetcher()
+    target_date = datetime.strptime(date_str, '%Y-%m-%d')
+    start = time.perf_counter()
+
+    bulletin_path = fetcher.bulletin_store.local_bulletin(target_date.strftime('%Y%m%d'))
+    if bulletin_path is None:
+        return {'date': date_str, 'status': MISSING, 'seconds': round(time.perf_counter() - start, 3)}
+
+    # Un solo processo per data: l'estrazione PDF non apre un pool annidato
+    if raw_name(bulletin_path).endswith('.pdf'):
+        options_df = fetcher.extract_options_from_pdf(bulletin_path, target_date, workers=1)
+    else:
+        options_df = fetcher.extract_options_from_txt(bulletin_path, target_date)
+
+    output = options_job.save_options_data(options_df, target_date) if not options_df.empty else ''
+    bulletin_name = os.path.basename(raw_name(bulletin_path))
+    return {
+        'date': date_str,
+        'status': COMPLETED if output else FAILED,
+        'rows': len(options_df),
+        'output': os.path.basename(output) if output else None,
+        'bulletin': bulletin_name,
+        'sha256': fetcher.bulletin_store.load_manifest().get(bulletin_name, {}).get('sha256'),
+        'seconds': round(time.perf_counter() - start, 3)
+    }
+
+def trading_dates(start: datetime, end: datetime) -> List[str]:
+    """Trade date (equity index) dell'intervallo, estremi inclusi"""
+    dates = []
+    day = start
+    while day <= end:
+        if is_trading_day(day):
+            dates.append(day.strftime('%Y-%m-%d'))
+        day += timedelta(days=1)
+    return dates
+
+class BulletinReprocessor:
+    """Rielaborazione parallela e riprendibile di un intervallo di bulletin"""
+
+    def __init__(self, workers: int = REPROCESS_WORKERS):
+        # Stessa data lake dei worker (bulletin e file giornalieri di fetch_options_data)
+        self.data_lake_dir = options_job.DATA_LAKE_DIR
+        self.workers = max(1, workers)
+        self.manifest_path = os.path.join(self.data_lake_dir, REPROCESS_MANIFEST_FILENAME)
+
+    def load_manifest(self) -> Dict[str, Dict]:
+        """Manifest data -> esito dell'ultima rielaborazione"""
+        try:
+            with open(self.manifest_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_manifest(self, manifest: Dict[str, Dict]):
+        write_json_atomic(self.manifest_path, dict(sorted(manifest.items())), indent=2)
+
+    def _is_done(self, entry: Optional[Dict], bulletins: Dict[str, Dict]) -> bool:
+        """Data completata, bulletin invariato nell'archivio e file giornaliero ancora presente"""
+        if not entry or entry.get('status') != COMPLETED:
+            return False
+        if bulletins.get(entry.get('bulletin'), {}).get('sha256') != entry.get('sha256'):
+            return False
+        return os.path.exists(os.path.join(self.data_lake_dir, entry['output']))
+
+    def run(self, start: datetime, end: datetime, force: bool = False, update_store: bool = True) -> Dict:
+        """
+        Rielabora i bulletin delle trade date tra start e end
+
+        Args:
+            start: Prima data (inclusa)
+            end: Ultima data (inclusa)
+            force: Rielabora anche le date già completate nel manifest
+            update_store: Consolida le date rielaborate nell'archivio delle catene
+
+        Returns:
+            Riepilogo con conteggi per esito, durata e bulletin/minuto
+        """
+        manifest = self.load_manifest()
+        bulletins = BulletinStore(self.data_lake_dir).load_manifest()
+        dates = trading_dates(start, end)
+        pending = [date_str for date_str in dates
+                   if force or not self._is_done(manifest.get(date_str), bulletins)]
+        skipped = len(dates) - len(pending)
+
+        logger.info(f"🔁 Rielaborazione bulletin {start.strftime('%Y-%m-%d')} → {end.strftime('%Y-%m-%d')}: "
+                    f"{len(pending)} date da elaborare, {skipped} già completate, {self.workers} worker")
+
+        counts = {COMPLETED: 0, MISSING: 0, FAILED: 0}
+        rows = 0
+        completed_dates = []
+        started = time.perf_counter()
+
+        if pending:
+            workers = min(self.workers, len(pending))
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(worker_log_queue(), logging.WARNING)) as executor:
+                futures = {executor.submit(reprocess_date, date_str): date_str for date_str in pending}
+
+                for done, future in enumerate(as_completed(futures), start=1):
+                    date_str = futures[future]
+                    try:
+                        outcome = future.result()
+                    except Exception as e:
+                        outcome = {'date': date_str, 'status': FAILED, 'error': f"{type(e).__name__}: {e}"}
+
+                    outcome['processed_at'] = datetime.now().isoformat()
+                    manifest[date_str] = outcome
+                    counts[outcome['status']] += 1
+                    rows += outcome.get('rows', 0)
+                    if outcome['status'] == COMPLETED:
+                        completed_dates.append(date_str)
+                    else:
+                        logger.warning(f"⚠️ {date_str}: {outcome['status']} {outcome.get('error', '')}".rstrip())
+
+                    if done % MANIFEST_SAVE_EVERY == 0 or done == len(pending):
+                        self._save_manifest(manifest)
+                        elapsed = time.perf_counter() - started
+                        logger.info(f"📈 {done}/{len(pending)} date, "
+                                    f"{done / elapsed * 60:.1f} bulletin/min")
+
+        elapsed = time.perf_counter() - started
+        processed = counts[COMPLETED] + counts[FAILED]
+
+        if update_store and completed_dates and CHAIN_STORE_AVAILABLE:
+            store = OptionChainStore(self.data_lake_dir)
+            store.ingest(refresh_dates=[datetime.strptime(d, '%Y-%m-%d') for d in completed_dates])
+
+        summary = {
+            'start': start.strftime('%Y-%m-%d'),
+            'end': end.strftime('%Y-%m-%d'),
+            'workers': self.workers,
+            'dates': len(dates),
+            'already_completed': skipped,
+            'completed': counts[COMPLETED],
+            'missing': counts[MISSING],
+            'failed': counts[FAILED],
+            'rows': rows,
+            'elapsed_seconds': round(elapsed, 3),
+            'bulletins_per_minute': round(processed / elapsed * 60, 1) if elapsed > 0 and processed else 0.0
+        }
+        logger.info(f"✅ Rielaborazione completata: {summary['completed']} date, {rows} record, "
+                    f"{summary['bulletins_per_minute']} bulletin/min")
+        return summary
+
+def parse_args():
+    """Parsing degli argomenti da linea di comando"""
+    parser = argparse.ArgumentParser(description='Rielaborazione parallela dei bulletin CME archiviati')
+    parser.add_argument('--start', required=True, help='Prima data YYYY-MM-DD')
+    parser.add_argument('--end', help='Ultima data YYYY-MM-DD (default: --start)')
+    parser.add_argument('--workers', type=int, default=REPROCESS_WORKERS, help='Processi worker')
+    parser.add_argument('--force', action='store_true', help='Rielabora anche le date già completate')
+    parser.add_argument('--no-store', action='store_true', help="Non aggiorna l'archivio delle catene di opzioni")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    setup_logging()
+    start_date = datetime.strptime(args.start, '%Y-%m-%d')
+    end_date = datetime.strptime(args.end, '%Y-%m-%d') if args.end else start_date
+
+    summary = BulletinReprocessor(workers=args.workers).run(start_date, end_date, args.force, not args.no_store)
+    print(json.dumps(summary, indent=2))
+    sys.exit(0 if summary['failed'] == 0 else 1)
@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+Orchestratore unico dei job giornalieri della data pipeline.
+Download e parsing del bulletin CME, sentiment CBOE e barre Finnhub dei futures
+sono nodi di un grafo di dipendenze: i rami indipendenti girano in concorrenza
+e, a dati acquisiti, viene calcolato il file dei livelli strutturali.
+
+Funzionalità principali:
+- Grafo dei job con esecuzione concorrente dei rami indipendenti
+- Sessione HTTP CME/CBOE e fetcher Finnhub (con il suo rate limiter) condivisi tra i nodi
+- Calcolo dei livelli strutturali e delle confluenze al termine delle acquisizioni
+- Tempi per nodo nel report di esecuzione e nel textfile Prometheus
+- Stato persistito per data: --retry-failed riesegue solo i nodi falliti e i loro dipendenti
+- Data target di default per categoria: il giorno dopo una festività solo USA la sessione
+  festiva di FX e metalli ha un proprio grafo, con i soli nodi futures
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import fetch_futures_volume as futures_job
+import fetch_options_data as options_job
+from bulletin_store import raw_name
+from exchange_calendar import DEFAULT_CATEGORY, is_trading_day, previous_trading_days
+from lake_io import write_json_atomic
+from pipeline_logging import setup_logging
+from pipeline_metrics import PipelineMetrics
+
+ANALYTICS_ENGINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'analytics_engine')
+if ANALYTICS_ENGINE_DIR not in sys.path:
+    sys.path.append(ANALYTICS_ENGINE_DIR)
+
+try:
+    from structural_levels import (INSTRUMENT_CONFIG, StructuralLevelsCalculator, get_combined_structural_levels,
+                                   publish_structural_levels)
+    STRUCTURAL_LEVELS_AVAILABLE = True
+except ImportError:
+    STRUCTURAL_LEVELS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DATA_LAKE_DIR = os.path.join(os.path.dirname(__file__), '..', 'data_lake')
+
+# Nodi eseguiti contemporaneamente (le chiamate Finnhub restano serializzate dal rate limiter)
+PIPELINE_MAX_WORKERS = int(os.environ.get('PIPELINE_MAX_WORKERS', 4))
+
+RUN_STATE_SUFFIX = '_pipeline_run.json'
+
+SUCCESS = 'success'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+class PipelineNode:
+    """Job del grafo: un'azione che riceve i risultati dei nodi da cui dipende"""
+
+    def __init__(self, name: str, action: Callable[[Dict], object], depends_on: Optional[List[str]] = None):
+        self.name = name
+        self.action = action
+        self.depends_on = list(depends_on or [])
+
+class DailyPipeline:
+    """Grafo dei job di acquisizione giornaliera di una data target"""
+
+    def __init__(self, target_date: datetime, max_workers: int = PIPELINE_MAX_WORKERS,
+                 data_lake_dir: str = DATA_LAKE_DIR, categories: Optional[List[str]] = None):
+        self.target_date = target_date
+        self.categories = categories
+        self.max_workers = max(1, max_workers)
+        self.data_lake_dir = data_lake_dir
+        self.state_path = os.path.join(data_lake_dir, f"{target_date.strftime('%Y-%m-%d')}{RUN_STATE_SUFFIX}")
+
+        # Metriche separate per job (report esistenti) e per nodo (orchestratore)
+        self.metrics = PipelineMetrics('daily')
+        self.options_metrics = PipelineMetrics('options')
+        self.futures_metrics = PipelineMetrics('futures')
+
+        # Risorse condivise tra i nodi: una sessione CME/CBOE (più una senza retry per
+        # le richieste in gara), un fetcher Finnhub
+        self.session = options_job.create_session(self.options_metrics)
+        self.race_session = options_job.create_session(self.options_metrics, retries=0)
+        self.cme_fetcher = options_job.CMEOptionsDataFetcher(self.options_metrics, self.session, self.race_session)
+        self.cboe_fetcher = options_job.CBOEDataFetcher(self.options_metrics, self.race_session)
+        self._finnhub_fetcher = None
+
+        self.open_instruments = {
+            code: config for code, config in futures_job.FUTURES_INSTRUMENTS.items()
+            if self._includes(config.get('category', 'equity_index'))
+        }
+        # Bulletin CME e sentiment CBOE seguono il calendario equity
+        self.include_options = self._includes(DEFAULT_CATEGORY)
+        self.nodes = self._build_graph()
+
+    def _includes(self, category: str) -> bool:
+        """La categoria è negoziata nella data target ed è tra quelle del grafo"""
+        selected = self.categories is None or category in self.categories
+        return selected and is_trading_day(self.target_date, category)
+
+    @property
+    def finnhub_fetcher(self) -> 'futures_job.FinnhubDataFetcher':
+        """Fetcher Finnhub condiviso (creato al primo nodo futures)"""
+        if self._finnhub_fetcher is None:
+            self._finnhub_fetcher = futures_job.FinnhubDataFetcher(metrics=self.futures_metrics)
+        return self._finnhub_fetcher
+
+    def _build_graph(self) -> Dict[str, PipelineNode]:
+        nodes = []
+        if self.include_options:
+            nodes += [
+                PipelineNode('cme_bulletin', self._download_bulletin),
+                PipelineNode('cme_options', self._parse_bulletin, ['cme_bulletin']),
+                PipelineNode('cboe_sentiment', self._fetch_sentiment)
+            ]
+
+        if self.open_instruments:
+            nodes.append(PipelineNode('finnhub_connection', self._test_finnhub))
+            for code in self.open_instruments:
+                nodes.append(PipelineNode(f"futures_{code}", self._futures_action(code), ['finnhub_connection']))
+
+        if STRUCTURAL_LEVELS_AVAILABLE and self.include_options:
+            dependencies = ['cme_options'] + [f"futures_{code}" for code in INSTRUMENT_CONFIG
+                                              if code in self.open_instruments]
+            nodes.append(PipelineNode('structural_levels', self._compute_structural_levels, dependencies))
+
+        return {node.name: node for node in nodes}
+
+    # ------------------------------------------------------------------
+    # Azioni dei nodi: restituiscono il risultato (path, valore) o None se falliscono
+
+    def _download_bulletin(self, results: Dict) -> Optional[str]:
+        with self.options_metrics.stage('cme_download'):
+            return self.cme_fetcher.download_cme_bulletin(self.target_date)
+
+    def _parse_bulletin(self, results: Dict) -> Optional[str]:
+        bulletin_path = results['cme_bulletin']
+        with self.options_metrics.stage('cme_parse'), self.options_metrics.timer('parse_seconds'):
+            if raw_name(bulletin_path).endswith('.pdf'):
+                options_df = self.cme_fetcher.extract_options_from_pdf(bulletin_path, self.target_date)
+            else:
+                options_df = self.cme_fetcher.extract_options_from_txt(bulletin_path, self.target_date)
+
+        if options_df.empty:
+            logger.warning("⚠️ Nessun dato opzioni estratto dal CME")
+            return None
+        return options_job.save_options_data(options_df, self.target_date, self.options_metrics)
+
+    def _fetch_sentiment(self, results: Dict) -> Optional[str]:
+        with self.options_metrics.stage('cboe_sentiment'):
+            sentiment_data = self.cboe_fetcher.fetch_put_call_ratio(self.target_date)
+        if not sentiment_data:
+            return None
+        return options_job.save_sentiment_data(sentiment_data, self.target_date, self.options_metrics)
+
+    def _test_finnhub(self, results: Dict) -> Optional[bool]:
+        with self.futures_metrics.stage('connection_test'):
+            return self.finnhub_fetcher.test_api_connection() or None
+
+    def _futures_action(self, code: str) -> Callable[[Dict], Optional[str]]:
+        def acquire(results: Dict) -> Optional[str]:
+            with self.futures_metrics.stage(f"instrument_{code}"):
+                return futures_job._acquire_instrument(self.finnhub_fetcher, code, self.open_instruments[code],
+                                                       self.target_date, self.futures_metrics)
+        return acquire
+
+    def _compute_structural_levels(self, results: Dict) -> Optional[str]:
+        calculator = StructuralLevelsCalculator(self.data_lake_dir)
+        levels = get_combined_structural_levels(self.target_date, list(INSTRUMENT_CONFIG), calculator=calculator)
+        if not levels:
+            return None
+        return publish_structural_levels(self.target_date, levels, data_lake_dir=self.data_lake_dir)
+
+    # ------------------------------------------------------------------
+    # Stato persistito
+
+    def load_state(self) -> Dict:
+        """Stato dell'ultima esecuzione per la data target (vuoto se assente)"""
+        try:
+            with open(self.state_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self, node_states: Dict[str, Dict]):
+        state = {
+            'target_date': self.target_date.strftime('%Y-%m-%d'),
+            'updated_at': datetime.now().isoformat(),
+            'nodes': node_states,
+            'metrics': self.metrics.to_dict()
+        }
+        write_json_atomic(self.state_path, state, indent=2, default=str)
+
+    def _run_node(self, node: PipelineNode, results: Dict) -> Dict:
+        """Esegue un nodo e ne restituisce lo stato (eseguito nei thread del pool)"""
+        started_at = datetime.now().isoformat()
+        start = time.perf_counter()
+        error = None
+
+        logger.info(f"▶️ Nodo {node.name} avviato")
+        try:
+            with self.metrics.stage(node.name):
+                result = node.action(results)
+        except Exception as e:
+            result = None
+            error = f"{type(e).__name__}: {e}"
+            logger.debug(traceback.format_exc())
+
+        seconds = time.perf_counter() - start
+        status = SUCCESS if result is not None else FAILED
+        if status == SUCCESS:
+            logger.info(f"✅ Nodo {node.name} completato in {seconds:.2f}s")
+        else:
+            logger.error(f"❌ Nodo {node.name} fallito in {seconds:.2f}s{': ' + error if error else ''}")
+
+        return {
+            'status': status,
+            'result': result if status == SUCCESS else None,
+            'error': error,
+            'started_at': started_at,
+            'seconds': round(seconds, 3)
+        }
+
+    # ------------------------------------------------------------------
+
+    def run(self, retry_failed: bool = False, nodes: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """
+        Esegue il grafo
+
+        Un nodo parte appena tutte le sue dipendenze sono riuscite; se una
+        dipendenza fallisce il nodo viene marcato 'skipped'. Lo stato viene
+        salvato dopo ogni nodo, così un'esecuzione interrotta è recuperabile.
+
+        Args:
+            retry_failed: Riusa i nodi riusciti nell'ultima esecuzione della data
+                e riesegue solo gli altri
+            nodes: Esegue (di nuovo) solo questi nodi e i loro dipendenti; gli
+                altri riusano l'ultimo risultato salvato
+
+        Returns:
+            Stato per nodo (status, result, error, started_at, seconds, attempts)
+        """
+        previous = self.load_state().get('nodes', {}) if (retry_failed or nodes) else {}
+        unknown = set(nodes or []) - set(self.nodes)
+        if unknown:
+            raise ValueError(f"Nodi sconosciuti: {', '.join(sorted(unknown))}")
+
+        rerun = self._dependents(nodes) if nodes else None
+        node_states: Dict[str, Dict] = {}
+        results: Dict[str, object] = {}
+
+        for name in self.nodes:
+            old = previous.get(name)
+            keep = old and old.get('status') == SUCCESS and (rerun is None or name not in rerun)
+            if keep:
+                node_states[name] = dict(old, reused=True)
+                results[name] = old.get('result')
+
+        if node_states:
+            logger.info(f"♻️ Nodi riusati dall'esecuzione precedente: {', '.join(node_states)}")
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='pipeline-node')
+        running = {}
+        try:
+            while True:
+                progress = False
+                for name, node in self.nodes.items():
+                    if name in node_states or name in running.values():
+                        continue
+
+                    dependency_status = [node_states.get(dep, {}).get('status') for dep in node.depends_on]
+                    if any(status in (FAILED, SKIPPED) for status in dependency_status):
+                        node_states[name] = {'status': SKIPPED, 'result': None,
+                                             'error': 'dipendenza non riuscita', 'seconds': 0.0}
+                        logger.warning(f"⏭️ Nodo {name} saltato: dipendenza non riuscita")
+                        progress = True
+                    elif all(status == SUCCESS for status in dependency_status):
+                        # Snapshot dei risultati: i thread non vedono le scritture successive
+                        running[executor.submit(self._run_node, node, dict(results))] = name
+                        progress = True
+
+                if not running:
+                    if progress:
+                        # I nodi saltati in questo giro possono far saltare i loro dipendenti
+                        continue
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    node_state = future.result()
+                    node_state['attempts'] = previous.get(name, {}).get('attempts', 0) + 1
+                    node_states[name] = node_state
+                    if node_state['status'] == SUCCESS:
+                        results[name] = node_state['result']
+                    self._save_state(node_states)
+        finally:
+            executor.shutdown(wait=True)
+
+        node_states = {name: node_states[name] for name in self.nodes if name in node_states}
+        self._save_state(node_states)
+        self._write_reports(node_states)
+        return node_states
+
+    def _dependents(self, names: List[str]) -> set:
+        """Nodi indicati più tutti quelli che ne dipendono (transitivamente)"""
+        selected = set(names)
+        changed = True
+        while changed:
+            changed = False
+            for name, node in self.nodes.items():
+                if name not in selected and selected.intersection(node.depends_on):
+                    selected.add(name)
+                    changed = True
+        return selected
+
+    def _write_reports(self, node_states: Dict[str, Dict]):
+        """Report dei job esistenti e textfile Prometheus dei tempi per nodo"""
+        def result_of(name):
+            return node_states.get(name, {}).get('result')
+
+        if self.include_options:
+            options_job.generate_options_report(
+                {'cme_options': result_of('cme_options'), 'cboe_sentiment': result_of('cboe_sentiment')},
+                self.target_date, self.options_metrics
+            )
+        if self.open_instruments:
+            futures_job.generate_summary_report(
+                {code: result_of(f"futures_{code}") for code in self.open_instruments},
+                self.target_date, self.futures_metrics
+            )
+        self.metrics.write_prometheus_textfile()
+
+def main(target_date: Optional[datetime] = None, retry_failed: bool = False,
+         nodes: Optional[List[str]] = None, max_workers: int = PIPELINE_MAX_WORKERS) -> int:
+    """
+    Esegue la pipeline giornaliera
+
+    Senza data target ogni categoria di strumenti usa la propria sessione
+    precedente: le date diverse (sessioni festive di FX e metalli) sono
+    eseguite come grafi separati, ciascuno con il proprio stato.
+
+    Returns:
+        Exit code (0 = tutti i nodi riusciti, 1 = parziale, 2 = nessun nodo riuscito)
+    """
+    if target_date:
+        runs = {target_date: None}
+    else:
+        categories = [DEFAULT_CATEGORY] + [config.get('category', DEFAULT_CATEGORY)
+                                           for config in futures_job.FUTURES_INSTRUMENTS.values()]
+        runs = previous_trading_days(datetime.now(), categories)
+
+    options_job.ensure_data_lake_exists()
+    pipelines = [DailyPipeline(day, max_workers, categories=categories) for day, categories in runs.items()]
+
+    if nodes:
+        unknown = set(nodes).difference(*(pipeline.nodes for pipeline in pipelines))
+        if unknown:
+            raise ValueError(f"Nodi sconosciuti: {', '.join(sorted(unknown))}")
+
+    node_states = {}
+    for pipeline in pipelines:
+        date_str = pipeline.target_date.strftime('%Y-%m-%d')
+        selected = [name for name in nodes if name in pipeline.nodes] if nodes else None
+        if nodes and not selected:
+            continue
+
+        logger.info(f"🚀 Avvio pipeline giornaliera per {date_str}")
+        for name, state in pipeline.run(retry_failed, selected).items():
+            node_states[f"{date_str} {name}" if len(pipelines) > 1 else name] = state
+
+    succeeded = [name for name, state in node_states.items() if state['status'] == SUCCESS]
+    for name, state in node_states.items():
+        reused = ' (riusato)' if state.get('reused') else ''
+        logger.info(f"   {name}: {state['status']} {state.get('seconds', 0):.2f}s{reused}")
+    logger.info(f"📊 Pipeline completata: {len(succeeded)}/{len(node_states)} nodi riusciti")
+
+    if len(succeeded) == len(node_states):
+        logger.info("🎉 Pipeline giornaliera completata con successo!")
+        return 0
+    elif succeeded:
+        logger.warning("⚠️ Pipeline parzialmente riuscita: rilancia con --retry-failed")
+        return 1
+    else:
+        logger.error("💥 Pipeline fallita completamente")
+        return 2
+
+def parse_args():
+    """Parsing degli argomenti da linea di comando"""
+    parser = argparse.ArgumentParser(description='Pipeline giornaliera: opzioni CME, sentiment CBOE, futures e livelli strutturali')
+    parser.add_argument('--date', type=str, help='Data target YYYY-MM-DD (default: sessione precedente di ogni categoria)')
+    parser.add_argument('--retry-failed', action='store_true',
+                        help="Riesegue solo i nodi non riusciti nell'ultima esecuzione della data")
+    parser.add_argument('--nodes', type=str, help='Nodi da rieseguire (separati da virgola), con i loro dipendenti')
+    parser.add_argument('--workers', type=int, default=PIPELINE_MAX_WORKERS, help='Nodi eseguiti in parallelo')
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    setup_logging()
+    target = datetime.strptime(args.date, '%Y-%m-%d') if args.date else None
+    selected = [name.strip() for name in args.nodes.split(',')] if args.nodes else None
+    sys.exit(main(target, args.retry_failed, selected, args.workers))
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Parser a colonne fisse dei file di settlement CME (stl_YYYYMMDD.txt).
+Il layout delle colonne viene rilevato una volta dalle righe di intestazione
+e i campi delle righe di dati vengono letti per posizione, in streaming.
+
+Funzionalità principali:
+- Rilevamento del layout dalle intestazioni (STRIKE, C/P, EST.VOL, OPEN INT, ...)
+- Lettura riga per riga a memoria limitata anche su file da centinaia di MB
+- Record emessi da un generatore verso il buffer colonnare (option_records)
+- Fallback alla regex di riga per le righe non allineate al layout
+- Lettura diretta dei file archiviati compressi (zstd/gzip) in streaming
+"""
+
+import logging
+import re
+from typing import Dict, Iterable, Optional, Tuple
+
+import pandas as pd
+
+from bulletin_store import open_bulletin_text
+from option_records import OptionColumnBuffer
+
+logger = logging.getLogger(__name__)
+
+# Etichette di intestazione riconosciute per colonna (in ordine di priorità)
+COLUMN_ALIASES = {
+    'open_interest': ('OPEN INTEREST', 'OPEN INT', 'OPEN_INT', 'PRIOR INT', 'OI'),
+    'volume': ('EST. VOL', 'EST.VOL', 'EST VOL', 'VOLUME', 'VOL'),
+    'strike': ('STRIKE PRICE', 'STRIKE'),
+    'type': ('PUT/CALL', 'C/P', 'P/C', 'TYPE'),
+    'option_symbol': ('CONTRACT', 'SYMBOL')
+}
+
+REQUIRED_COLUMNS = ('strike', 'volume', 'open_interest')
+
+OPTION_TYPES = {'C': 'CALL', 'CALL': 'CALL', 'CALLS': 'CALL', 'P': 'PUT', 'PUT': 'PUT', 'PUTS': 'PUT'}
+
+_ALIAS_PATTERNS = [
+    (column, re.compile(r'(?<!\S)' + r'\s'.join(re.escape(word) for word in alias.split()) + r'(?!\S)'))
+    for column, aliases in COLUMN_ALIASES.items()
+    for alias in aliases
+]
+
+_HEADER_HINT = re.compile(r'STRIKE', re.IGNORECASE)
+_WORD_PATTERN = re.compile(r'\S+')
+
+# Riga valida di una tabella di un prodotto non configurato
+_FOREIGN_ROW = object()
+
+class ColumnLayout:
+    """Posizioni delle colonne di una tabella di settlement"""
+
+    def __init__(self, spans: Dict[str, Tuple[int, Optional[int]]]):
+        self.spans = spans
+        self.slices = {column: slice(start, end) for column, (start, end) in spans.items()}
+        # Confini interni da verificare: un valore a cavallo indica una riga non allineata
+        self.boundaries = sorted({edge for start, end in spans.values() for edge in (start, end) if edge})
+
+    def is_aligned(self, line: str) -> bool:
+        """True se nessun campo attraversa i confini delle colonne"""
+        length = len(line)
+        for edge in self.boundaries:
+            if edge >= length:
+                break
+            if line[edge - 1] != ' ' and line[edge] != ' ':
+                return False
+        return True
+
+def detect_layout(header_line: str) -> Optional[ColumnLayout]:
+    """
+    Rileva il layout delle colonne da una riga di intestazione
+
+    Args:
+        header_line: Riga candidata (contiene 'STRIKE')
+
+    Returns:
+        ColumnLayout o None se mancano le colonne obbligatorie
+    """
+    upper = header_line.upper()
+    labels = []
+    claimed = set()
+
+    for column, pattern in _ALIAS_PATTERNS:
+        if column in claimed:
+            continue
+        for match in pattern.finditer(upper):
+            if any(start < match.end() and match.start() < end for start, end, _ in labels):
+                continue
+            labels.append((match.start(), match.end(), column))
+            claimed.add(column)
+            break
+
+    if not all(column in claimed for column in REQUIRED_COLUMNS):
+        return None
+
+    # Le altre etichette (OPEN, HIGH, SETT, ...) delimitano le colonne non usate
+    for match in _WORD_PATTERN.finditer(upper):
+        if not any(start < match.end() and match.start() < end for start, end, _ in labels):
+            labels.append((match.start(), match.end(), None))
+
+    labels.sort()
+
+    # Confine tra due colonne a metà dello spazio tra le etichette: copre
+    # sia i valori allineati a sinistra sia quelli allineati a destra
+    spans = {}
+    for index, (start, end, column) in enumerate(labels):
+        if column is None:
+            continue
+        left = 0 if index == 0 else (labels[index - 1][1] + start + 1) // 2
+        right = None if index == len(labels) - 1 else (end + labels[index + 1][0] + 1) // 2
+        spans[column] = (left, right)
+
+    return ColumnLayout(spans)
+
+def _to_int(value: str) -> int:
+    """Intero da un campo numerico (separatori delle migliaia e campi vuoti ammessi)"""
+    value = value.replace(',', '')
+    return int(value) if value.isdigit() else 0
+
+class SettlementReader:
+    """
+    Lettore in streaming delle tabelle di un file di settlement.
+    Mantiene il layout e la sezione correnti e una cache simbolo -> prodotto,
+    così le righe di dati costano una fetta per campo e nessuna regex.
+    """
+
+    def __init__(self, parser, products: Dict[str, Dict]):
+        self.parser = parser
+        self.products = products
+        self.layout = None
+        self.section = None
+        self.pending_section = None
+        self._symbol_products = {}
+        self.stats = {'layouts': 0, 'fixed_width': 0, 'fallback': 0, 'skipped': 0}
+
+    def _product_of(self, option_symbol: str) -> Optional[str]:
+        """Prodotto del simbolo di contratto (classificazione memorizzata)"""
+        try:
+            return self._symbol_products[option_symbol]
+        except KeyError:
+            product = self.parser.classify(option_symbol) if option_symbol else None
+            self._symbol_products[option_symbol] = product
+            return product
+
+    def _parse_fixed_width(self, line: str):
+        """
+        Estrae i campi di una riga per posizione
+
+        Returns:
+            Tupla del record, _FOREIGN_ROW per una riga valida di un prodotto
+            non configurato, None se la riga non è un record della tabella
+        """
+        layout = self.layout
+        if not layout.is_aligned(line):
+            return None
+
+        slices = layout.slices
+        strike_field = line[slices['strike']].strip().replace(',', '')
+
+        option_type = None
+        if 'type' in slices:
+            option_type = OPTION_TYPES.get(line[slices['type']].strip().upper())
+        elif strike_field[-1:] in ('C', 'P'):
+            # Strike con suffisso (es. 5000C)
+            option_type = OPTION_TYPES[strike_field[-1]]
+            strike_field = strike_field[:-1]
+
+        if option_type is None:
+            return None
+
+        try:
+            strike = float(strike_field)
+        except ValueError:
+            return None
+
+        option_symbol = line[slices['option_symbol']].strip() if 'option_symbol' in slices else ''
+        underlying = self._product_of(option_symbol) or self.section
+        if underlying is None:
+            return _FOREIGN_ROW
+
+        if not option_symbol:
+            option_symbol = self.products[underlying]['cme_product_code']
+
+        return (underlying, option_symbol, strike, option_type,
+                _to_int(line[slices['volume']].strip()), _to_int(line[slices['open_interest']].strip()))
+
+    def records(self, lines: Iterable[str]) -> Iterable[Tuple]:
+        """
+        Legge le righe di un file di settlement ed emette i record di opzioni
+
+        Args:
+            lines: Righe del file (iterabile in streaming)
+
+        Returns:
+            Generatore di tuple (underlying, option_symbol, strike, tipo, volume, open_interest)
+        """
+        stats = self.stats
+
+        for line in lines:
+            line = line.rstrip('\r\n')
+            if not line.strip():
+                continue
+
+            # Righe di dati della tabella corrente: lettura per posizione
+            if self.layout is not None:
+                record = self._parse_fixed_width(line)
+                if record is _FOREIGN_ROW:
+                    stats['skipped'] += 1
+                    continue
+                if record is not None:
+                    stats['fixed_width'] += 1
+                    yield record
+                    continue
+
+            # Nuova tabella: layout rilevato una volta sola dalla riga di intestazione
+            is_header = _HEADER_HINT.search(line) is not None
+            if is_header:
+                detected = detect_layout(line)
+                if detected is not None:
+                    self.layout = detected
+                    self.section = self.pending_section or self.parser.section_of(line)
+                    self.pending_section = None
+                    stats['layouts'] += 1
+                    continue
+
+            # Intestazione di sezione di un prodotto configurato
+            if not is_header:
+                header_symbol = self.parser.section_of(line)
+                if header_symbol is not None:
+                    self.pending_section = header_symbol
+                    continue
+
+            record = self.parser.parse_line(line)
+            if record is not None:
+                stats['fallback'] += 1
+                yield record
+
+        logger.debug(f"Settlement: {stats['layouts']} layout, {stats['fixed_width']} righe a colonne fisse, "
+                     f"{stats['fallback']} righe con regex, {stats['skipped']} righe di altri prodotti")
+
+def read_settlement_buffer(txt_path: str, parser, products: Dict[str, Dict]) -> OptionColumnBuffer:
+    """
+    Legge in streaming un file di settlement nel buffer colonnare
+
+    Args:
+        txt_path: Path del file TXT (anche compresso .zst/.gz, decompresso in streaming)
+        parser: BulletinLineParser dei prodotti configurati
+        products: Configurazione dei prodotti (FUTURES_SYMBOLS)
+
+    Returns:
+        OptionColumnBuffer con i record estratti
+    """
+    with open_bulletin_text(txt_path) as f:
+        return OptionColumnBuffer().extend(SettlementReader(parser, products).records(f))
+
+def parse_settlement_file(txt_path: str, date_str: str, parser, products: Dict[str, Dict]) -> pd.DataFrame:
+    """
+    Parsing in streaming di un file di settlement CME
+
+    Args:
+        txt_path: Path del file TXT
+        date_str: Data di riferimento (YYYY-MM-DD)
+        parser: BulletinLineParser dei prodotti configurati
+        products: Configurazione dei prodotti (FUTURES_SYMBOLS)
+
+    Returns:
+        DataFrame nel formato standard *_cme_options.csv
+    """
+    return read_settlement_buffer(txt_path, parser, products).to_frame(date_str)
+
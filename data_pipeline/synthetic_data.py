@@ -0,0 +1,747 @@
+#!/usr/bin/env python3
+"""
+Generatore di dati di mercato sintetici per i benchmark offline.
+Scrive in una data lake separata, negli stessi formati della pipeline, le barre
+intraday dei futures, le catene di opzioni CME, i Daily Bulletin (TXT di
+settlement e PDF semplici) e il sentiment CBOE, così structural_levels, i parser
+dei bulletin e PriceMapper si misurano senza file reali né API.
+
+Funzionalità principali:
+- Deterministico: stesso seed e stessi parametri, stessi file di dati byte per byte
+  (un generatore numpy per strumento, indipendente dagli altri strumenti scelti)
+- Dimensione configurabile: da una trade date ad anni (calendario CME), da decine
+  a decine di migliaia di strike per sottostante (strike per scadenza x scadenze)
+- Barre OHLCV sulla finestra Globex della trade date, volume a U nella sessione RTH
+- Catene con scadenze settimanali che scorrono, OI persistente tra le sessioni
+  (oi_change realistico) e concentrato sugli strike tondi vicino al prezzo
+- Bulletin TXT a colonne fisse e PDF (Courier, una riga per opzione) registrati nel
+  manifest dell'archivio, con una sezione di un prodotto non configurato da scartare
+- Quote future/CFD coerenti con le barre per i provider di PriceMapper
+- Profili di dimensione predefiniti per le suite di performance (--profile)
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import sys
+import time
+import zlib
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from bulletin_store import ARCHIVE_COMPRESSION, BulletinStore
+from exchange_calendar import get_session_window, is_trading_day
+from fetch_futures_volume import FUTURES_COLUMNS_ORDER, FUTURES_INSTRUMENTS, TIMEFRAME_CONFIG
+from fetch_options_data import FUTURES_SYMBOLS
+from lake_io import write_bytes_atomic, write_csv_atomic, write_json_atomic, write_text_atomic
+from option_records import OPTIONS_COLUMNS_ORDER
+from pipeline_logging import setup_logging
+
+logger = logging.getLogger(__name__)
+
+# Data lake dei dati sintetici (mai quella di produzione)
+SYNTHETIC_DATA_DIR = os.environ.get('SYNTHETIC_DATA_DIR',
+                                    os.path.join(os.path.dirname(__file__), '..', 'data_lake_synthetic'))
+SYNTHETIC_SEED = int(os.environ.get('SYNTHETIC_SEED', 42))
+SYNTHETIC_MANIFEST_FILENAME = 'synthetic_manifest.json'
+SYNTHETIC_START_DATE = '2024-01-02'
+
+# Prezzo iniziale, volatilità annua, volume medio per barra RTH e basis tipico del CFD
+SYNTHETIC_INSTRUMENTS = {
+    'ES': {'price': 4750.0, 'volatility': 0.16, 'bar_volume': 12000, 'basis': 2.5},
+    'NQ': {'price': 16800.0, 'volatility': 0.21, 'bar_volume': 4500, 'basis': 5.0},
+    'EUR': {'price': 1.095, 'volatility': 0.07, 'bar_volume': 3500, 'basis': 0.0001},
+    'GBP': {'price': 1.272, 'volatility': 0.08, 'bar_volume': 2500, 'basis': 0.0001},
+    'JPY': {'price': 141.5, 'volatility': 0.09, 'bar_volume': 3000, 'basis': 0.01},
+    'CHF': {'price': 0.842, 'volatility': 0.07, 'bar_volume': 1200, 'basis': 0.0001},
+    'AUD': {'price': 0.681, 'volatility': 0.10, 'bar_volume': 1800, 'basis': 0.0001},
+    'GOLD': {'price': 2065.0, 'volatility': 0.14, 'bar_volume': 2200, 'basis': 1.0},
+    'SILVER': {'price': 23.8, 'volatility': 0.25, 'bar_volume': 900, 'basis': 0.05},
+    'CRUDE': {'price': 71.6, 'volatility': 0.35, 'bar_volume': 3800, 'basis': 0.05}
+}
+
+# Catene di opzioni dei prodotti del bulletin: passo degli strike, strike "tondi"
+# (OI concentrato), OI e volume tipici per strike at-the-money
+OPTION_PRODUCTS = {
+    'ES': {'strike_step': 5.0, 'round_strike': 100.0, 'open_interest': 6000, 'volume': 900},
+    'NQ': {'strike_step': 25.0, 'round_strike': 500.0, 'open_interest': 1500, 'volume': 250}
+}
+
+# Prodotto non configurato nel bulletin: le sue righe devono essere scartate dai parser
+FOREIGN_PRODUCT = {'header': 'E-MINI RUSSELL 2000 OPTIONS', 'prefix': 'RTY', 'price': 2010.0,
+                   'strike_step': 5.0, 'volatility': 0.22}
+
+OPTION_PRICE_TICK = 0.05
+OPTION_VOLATILITY_SKEW = 0.08  # Volatilità in più per ogni 10% di strike sotto il prezzo (put OTM più care)
+
+# Ampiezza massima della griglia di strike di una scadenza (frazione del prezzo)
+MAX_STRIKE_SPAN = 0.8
+
+# Sessione RTH (minuti dalla mezzanotte, ora di Chicago) e peso del volume overnight
+RTH_OPEN_MINUTE = 8 * 60 + 30
+RTH_CLOSE_MINUTE = 15 * 60 + 15
+OVERNIGHT_VOLUME_WEIGHT = 0.12
+SESSION_OPEN_MINUTE = 17 * 60
+
+TRADING_DAYS_PER_YEAR = 252
+
+# Bulletin: righe per pagina (TXT e PDF) e formati generabili
+BULLETIN_LINES_PER_PAGE = 60
+BULLETIN_FORMATS = ('txt', 'pdf', 'none')
+BULLETIN_URL = 'synthetic://cme/{filename}'
+
+# Layout della tabella del bulletin TXT: (etichetta, larghezza, allineamento)
+SETTLEMENT_COLUMNS = [
+    ('CONTRACT', 12, '<'), ('STRIKE', 11, '>'), ('C/P', 5, '>'), ('OPEN', 11, '>'), ('HIGH', 11, '>'),
+    ('LOW', 11, '>'), ('SETT', 11, '>'), ('PT.CHGE', 10, '>'), ('EST.VOL', 10, '>'), ('OPEN INT', 11, '>')
+]
+
+# Profili di dimensione: trade date, strike per scadenza e scadenze per sottostante
+SIZE_PROFILES = {
+    'smoke': {'days': 1, 'strikes': 40, 'expiries': 1},
+    'day': {'days': 1, 'strikes': 400, 'expiries': 4},
+    'month': {'days': 21, 'strikes': 400, 'expiries': 4},
+    'year': {'days': 252, 'strikes': 400, 'expiries': 6},
+    'wide_chain': {'days': 5, 'strikes': 5000, 'expiries': 8}
+}
+DEFAULT_PROFILE = 'day'
+
+def _decimals(tick: float) -> int:
+    """Cifre decimali di un tick size (0.25 -> 2, 0.00005 -> 5)"""
+    text = f"{tick:.10f}".rstrip('0')
+    return len(text.split('.')[1]) if '.' in text else 0
+
+def round_to_tick(values, tick: float):
+    """Arrotonda prezzi al tick, senza residui binari nel CSV"""
+    return np.round(np.round(np.asarray(values, dtype=np.float64) / tick) * tick, _decimals(tick))
+
+def _stable_key(name: str) -> int:
+    return zlib.crc32(name.encode('utf-8'))
+
+def trading_dates(start: datetime, days: Optional[int] = None, end: Optional[datetime] = None) -> List[datetime]:
+    """
+    Trade date (equity index) a partire da start
+
+    Args:
+        start: Prima data candidata
+        days: Numero di trade date (alternativo a end)
+        end: Ultima data candidata inclusa
+
+    Returns:
+        Lista di trade date in ordine
+    """
+    dates = []
+    day = start
+    while (days is not None and len(dates) < days) or (days is None and end is not None and day <= end):
+        if is_trading_day(day):
+            dates.append(day)
+        day += timedelta(days=1)
+    return dates
+
+def _option_prefixes(underlying: str) -> List[str]:
+    """Radici dei simboli di opzione di un prodotto dai pattern configurati (ES[0-9]+ -> ES)"""
+    return [pattern.replace('[0-9]+', '') for pattern in FUTURES_SYMBOLS[underlying]['option_patterns']]
+
+_erf = np.vectorize(math.erf, otypes=[np.float64])
+
+def _norm_cdf(values: np.ndarray) -> np.ndarray:
+    return 0.5 * (1.0 + _erf(values / math.sqrt(2.0)))
+
+def _black76(forward: float, strikes: np.ndarray, volatility: np.ndarray, years: float,
+             is_put: np.ndarray) -> np.ndarray:
+    """Prezzo di Black-76 (senza sconto) di call e put"""
+    sigma_sqrt_t = np.maximum(volatility * math.sqrt(max(years, 1e-6)), 1e-9)
+    d1 = (np.log(forward / strikes) + 0.5 * sigma_sqrt_t ** 2) / sigma_sqrt_t
+    d2 = d1 - sigma_sqrt_t
+    call = forward * _norm_cdf(d1) - strikes * _norm_cdf(d2)
+    put = call - forward + strikes
+    return np.maximum(np.where(is_put, put, call), 0.0)
+
+class _Expiry:
+    """Scadenza listata di un sottostante: griglia di strike e stato tra le sessioni"""
+
+    def __init__(self, symbol: str, expiry: datetime, strikes: np.ndarray):
+        self.symbol = symbol
+        self.expiry = expiry
+        self.strikes = strikes
+        self.open_interest = np.zeros((2, len(strikes)), dtype=np.int64)  # [call, put]
+        self.settle = None
+
+class SyntheticMarketGenerator:
+    """Generatore deterministico di una data lake sintetica nei formati della pipeline"""
+
+    def __init__(self, output_dir: str = SYNTHETIC_DATA_DIR, seed: int = SYNTHETIC_SEED,
+                 instruments: Optional[List[str]] = None, strikes: int = 400, expiries: int = 4,
+                 resolution: str = '5', bulletin_format: str = 'txt',
+                 bulletin_compression: str = ARCHIVE_COMPRESSION):
+        """
+        Args:
+            output_dir: Data lake di destinazione
+            seed: Seed dei generatori casuali
+            instruments: Futures da generare (default: tutti FUTURES_INSTRUMENTS); le catene
+                di opzioni sono generate per quelli configurati nel bulletin (ES, NQ)
+            strikes: Strike per scadenza (ogni strike ha una call e una put)
+            expiries: Scadenze settimanali listate per sottostante
+            resolution: Risoluzione delle barre in minuti ('5', '15', '60')
+            bulletin_format: 'txt', 'pdf' o 'none'
+            bulletin_compression: Compressione dell'archivio bulletin ('zstd', 'gzip', 'none')
+        """
+        unknown = set(instruments or []) - set(FUTURES_INSTRUMENTS)
+        if unknown:
+            raise ValueError(f"Strumenti non configurati: {sorted(unknown)}")
+        if bulletin_format not in BULLETIN_FORMATS:
+            raise ValueError(f"Formato bulletin non valido: {bulletin_format}")
+
+        self.output_dir = output_dir
+        self.seed = seed
+        self.instruments = list(instruments or FUTURES_INSTRUMENTS)
+        self.underlyings = [code for code in self.instruments if code in FUTURES_SYMBOLS and code in OPTION_PRODUCTS]
+        self.strikes = max(1, strikes)
+        self.expiries = max(1, expiries)
+        self.resolution = resolution
+        self.bulletin_format = bulletin_format
+        self.bulletin_store = BulletinStore(output_dir, compression=bulletin_compression)
+
+        # Stato tra le trade date: ultimo prezzo per strumento, scadenze listate per sottostante
+        self._prices = {code: SYNTHETIC_INSTRUMENTS[code]['price'] for code in self.instruments}
+        self._listed: Dict[str, List[_Expiry]] = {code: [] for code in self.underlyings}
+        self._foreign_price = FOREIGN_PRODUCT['price']
+
+    def _day_rng(self, name: str, date: datetime) -> np.random.Generator:
+        # Un generatore per flusso (strumento, catena, ...) e per data: i dati di uno
+        # strumento non cambiano aggiungendo o togliendo gli altri
+        return np.random.default_rng([self.seed, _stable_key(name), int(date.strftime('%Y%m%d'))])
+
+    # ------------------------------------------------------------------
+    # Futures
+
+    def futures_bars(self, instrument: str, date: datetime) -> pd.DataFrame:
+        """
+        Barre OHLCV di una trade date nel formato dei file *_intraday_<res>m.csv
+
+        Args:
+            instrument: Codice strumento (FUTURES_INSTRUMENTS)
+            date: Trade date
+
+        Returns:
+            DataFrame con le colonne FUTURES_COLUMNS_ORDER (vuoto se il mercato è chiuso)
+        """
+        config = FUTURES_INSTRUMENTS[instrument]
+        window = get_session_window(date, config['category'])
+        if window is None:
+            return pd.DataFrame(columns=FUTURES_COLUMNS_ORDER)
+
+        rng = self._day_rng(instrument, date)
+        spec = SYNTHETIC_INSTRUMENTS[instrument]
+        tick = config['tick_size']
+        bar_seconds = TIMEFRAME_CONFIG[self.resolution]['seconds']
+
+        start_ts, end_ts = (int(moment.timestamp()) for moment in window)
+        timestamps = np.arange(start_ts, end_ts, bar_seconds, dtype=np.int64)
+        count = len(timestamps)
+
+        # Minuti locali di Chicago: la sessione apre alle 17:00 del giorno precedente
+        minutes = (SESSION_OPEN_MINUTE + (timestamps - start_ts) // 60) % 1440
+        rth = (minutes >= RTH_OPEN_MINUTE) & (minutes < RTH_CLOSE_MINUTE)
+        weights = np.where(
+            rth,
+            1.0 + 2.0 * np.exp(-(minutes - RTH_OPEN_MINUTE) / 25.0)
+            + 1.2 * np.exp(-(RTH_CLOSE_MINUTE - minutes) / 20.0),
+            OVERNIGHT_VOLUME_WEIGHT
+        )
+
+        # Volatilità per barra proporzionale all'attività (random walk log-normale)
+        session_seconds = max(end_ts - start_ts, bar_seconds)
+        bar_sigma = spec['volatility'] * math.sqrt(bar_seconds / (TRADING_DAYS_PER_YEAR * session_seconds))
+        bar_sigma = bar_sigma * np.sqrt(weights / weights.mean())
+
+        previous = self._prices[instrument]
+        closes = previous * np.exp(np.cumsum(rng.standard_normal(count) * bar_sigma))
+        opens = np.concatenate(([previous], closes[:-1]))
+        wicks = np.abs(rng.standard_normal((2, count))) * bar_sigma * 0.6 * closes
+
+        opens = round_to_tick(opens, tick)
+        closes = round_to_tick(closes, tick)
+        highs = np.maximum(round_to_tick(np.maximum(opens, closes) + wicks[0], tick), np.maximum(opens, closes))
+        lows = np.minimum(round_to_tick(np.minimum(opens, closes) - wicks[1], tick), np.minimum(opens, closes))
+        volumes = np.maximum(1, (spec['bar_volume'] * weights * rng.lognormal(0.0, 0.35, count))).astype(np.int64)
+
+        self._prices[instrument] = float(closes[-1])
+
+        return pd.DataFrame({
+            'datetime': pd.to_datetime(timestamps, unit='s'),
+            'timestamp': timestamps,
+            'instrument': instrument,
+            'symbol_used': config['finnhub_symbol'],
+            'open': opens,
+            'high': highs,
+            'low': lows,
+            'close': closes,
+            'volume': volumes,
+            'resolution_minutes': int(self.resolution)
+        }, columns=FUTURES_COLUMNS_ORDER)
+
+    # ------------------------------------------------------------------
+    # Catene di opzioni
+
+    def _strike_grid(self, underlying: str, spot: float) -> np.ndarray:
+        """Griglia di strike centrata sul prezzo (passo ridotto se la griglia è troppo ampia)"""
+        tick = FUTURES_INSTRUMENTS[underlying]['tick_size']
+        step = OPTION_PRODUCTS[underlying]['strike_step']
+        if self.strikes * step > spot * MAX_STRIKE_SPAN:
+            step = max(tick, round(spot * MAX_STRIKE_SPAN / self.strikes / tick) * tick)
+        center = round(spot / step) * step
+        first = center - (self.strikes // 2) * step
+        return round_to_tick(first + np.arange(self.strikes) * step, tick)
+
+    @staticmethod
+    def _next_expiry(after: datetime) -> datetime:
+        """Primo venerdì di trading successivo a after"""
+        day = after + timedelta(days=1)
+        while day.weekday() != 4 or not is_trading_day(day):
+            day += timedelta(days=1)
+        return day
+
+    def _roll_expiries(self, underlying: str, date: datetime, spot: float, rng: np.random.Generator):
+        """Toglie le scadenze passate e lista le nuove con OI iniziale"""
+        listed = [expiry for expiry in self._listed[underlying] if expiry.expiry >= date]
+        prefixes = _option_prefixes(underlying)
+        product = OPTION_PRODUCTS[underlying]
+        volatility = SYNTHETIC_INSTRUMENTS[underlying]['volatility']
+
+        while len(listed) < self.expiries:
+            last = listed[-1].expiry if listed else date - timedelta(days=1)
+            expiry_date = self._next_expiry(last)
+            prefix = prefixes[expiry_date.isocalendar()[1] % len(prefixes)]
+            expiry = _Expiry(f"{prefix}{expiry_date.strftime('%y%m%d')}", expiry_date,
+                             self._strike_grid(underlying, spot))
+
+            # OI iniziale: campana attorno al prezzo, picchi sugli strike tondi
+            years = max((expiry_date - date).days, 1) / 365.0
+            width = volatility * math.sqrt(years) * 2.0 + 0.01
+            moneyness = np.log(expiry.strikes / spot)
+            profile = np.exp(-0.5 * (moneyness / width) ** 2)
+            round_bonus = (1.0 + 3.0 * (np.mod(expiry.strikes, product['round_strike']) == 0)
+                           + 1.0 * (np.mod(expiry.strikes, product['round_strike'] / 2) == 0))
+            side_bias = np.vstack((1.0 + 0.5 * (moneyness > 0), 1.0 + 0.8 * (moneyness < 0)))
+            expiry.open_interest = (product['open_interest'] * profile * round_bonus * side_bias
+                                    * rng.lognormal(0.0, 0.5, (2, len(expiry.strikes)))).astype(np.int64)
+            listed.append(expiry)
+
+        self._listed[underlying] = listed
+
+    def option_chain(self, underlying: str, date: datetime, spot: float) -> pd.DataFrame:
+        """
+        Catena di opzioni di una trade date nel formato *_cme_options.csv, più le colonne
+        di prezzo (open/high/low/settle/change) usate dal bulletin
+
+        Args:
+            underlying: Sottostante con opzioni nel bulletin (ES, NQ)
+            date: Trade date
+            spot: Prezzo del future a fine sessione
+
+        Returns:
+            DataFrame in ordine di bulletin (scadenza, call poi put, strike crescente)
+        """
+        rng = self._day_rng(f"{underlying}:options", date)
+        self._roll_expiries(underlying, date, spot, rng)
+        product = OPTION_PRODUCTS[underlying]
+        volatility = SYNTHETIC_INSTRUMENTS[underlying]['volatility']
+        date_str = date.strftime('%Y-%m-%d')
+
+        frames = []
+        for expiry in self._listed[underlying]:
+            count = len(expiry.strikes)
+            days = (expiry.expiry - date).days
+            years = max(days, 0.25) / 365.0
+            moneyness = np.log(expiry.strikes / spot)
+
+            # Volume sugli strike vicini al prezzo; l'OI assorbe una parte del volume
+            width = volatility * math.sqrt(years) * 1.5 + 0.005
+            volume_profile = np.exp(-0.5 * (moneyness / width) ** 2) * (1.0 + 1.5 / (1.0 + days))
+            volume = (product['volume'] * volume_profile * rng.lognormal(0.0, 0.6, (2, count))).astype(np.int64)
+            change = np.rint(volume * rng.uniform(-0.35, 0.65, (2, count))).astype(np.int64)
+            expiry.open_interest = np.maximum(expiry.open_interest + change, 0)
+
+            is_put = np.concatenate((np.zeros(count, dtype=bool), np.ones(count, dtype=bool)))
+            strikes = np.concatenate((expiry.strikes, expiry.strikes))
+            skewed = volatility + OPTION_VOLATILITY_SKEW * np.maximum(-np.concatenate((moneyness, moneyness)), 0) / 0.1
+            settle = round_to_tick(_black76(spot, strikes, skewed, years, is_put), OPTION_PRICE_TICK)
+            previous_settle = settle if expiry.settle is None else expiry.settle
+            expiry.settle = settle
+
+            traded = volume.ravel() > 0
+            spread = np.abs(rng.standard_normal((2, 2 * count))) * np.maximum(settle, OPTION_PRICE_TICK) * 0.05
+            frames.append(pd.DataFrame({
+                'date': date_str,
+                'underlying': underlying,
+                'option_symbol': expiry.symbol,
+                'strike': strikes,
+                'type': np.where(is_put, 'PUT', 'CALL'),
+                'volume': volume.ravel(),
+                'open_interest': expiry.open_interest.ravel(),
+                'dte': days,
+                'open': np.where(traded, round_to_tick(settle + spread[0] - spread[1], OPTION_PRICE_TICK), np.nan),
+                'high': np.where(traded, round_to_tick(settle + spread[0], OPTION_PRICE_TICK), np.nan),
+                'low': np.where(traded, round_to_tick(np.maximum(settle - spread[1], 0), OPTION_PRICE_TICK), np.nan),
+                'settle': settle,
+                'change': round_to_tick(settle - previous_settle, OPTION_PRICE_TICK) + 0.0
+            }))
+
+        return pd.concat(frames, ignore_index=True)
+
+    def foreign_chain(self, date: datetime) -> pd.DataFrame:
+        """Catena del prodotto non configurato (solo nel bulletin, da scartare)"""
+        rng = self._day_rng(FOREIGN_PRODUCT['prefix'], date)
+        self._foreign_price *= math.exp(rng.standard_normal() * FOREIGN_PRODUCT['volatility']
+                                        / math.sqrt(TRADING_DAYS_PER_YEAR))
+        count = max(4, self.strikes // 4)
+        step = min(FOREIGN_PRODUCT['strike_step'], round(self._foreign_price * MAX_STRIKE_SPAN / count, 2))
+        strikes = np.round(round(self._foreign_price / step) * step + (np.arange(count) - count // 2) * step, 2)
+        expiry = self._next_expiry(date - timedelta(days=1))
+        years = max((expiry - date).days, 0.25) / 365.0
+        is_put = np.concatenate((np.zeros(count, dtype=bool), np.ones(count, dtype=bool)))
+        strikes = np.concatenate((strikes, strikes))
+        settle = round_to_tick(_black76(self._foreign_price, strikes, np.full(2 * count, FOREIGN_PRODUCT['volatility']),
+                                        years, is_put), OPTION_PRICE_TICK)
+        return pd.DataFrame({
+            'option_symbol': f"{FOREIGN_PRODUCT['prefix']}{expiry.strftime('%y%m%d')}",
+            'strike': strikes,
+            'type': np.where(is_put, 'PUT', 'CALL'),
+            'volume': rng.integers(0, 300, 2 * count),
+            'open_interest': rng.integers(0, 4000, 2 * count),
+            'open': np.nan, 'high': np.nan, 'low': np.nan,
+            'settle': settle,
+            'change': 0.0
+        })
+
+    # ------------------------------------------------------------------
+    # Bulletin
+
+    @staticmethod
+    def _page_header(date: datetime, page: int) -> List[str]:
+        return [f"CME GROUP DAILY BULLETIN (SYNTHETIC)   TRADE DATE {date.strftime('%m/%d/%Y')}   PAGE {page}", '']
+
+    @staticmethod
+    def _settlement_rows(chain: pd.DataFrame) -> List[str]:
+        """Righe a colonne fisse della tabella di settlement"""
+        def price(value: float) -> str:
+            return '' if pd.isna(value) else f"{value:.2f}"
+
+        widths = [(width, align) for _, width, align in SETTLEMENT_COLUMNS]
+        rows = []
+        for symbol, strike, option_type, open_, high, low, settle, change, volume, open_interest in zip(
+                chain['option_symbol'], chain['strike'], chain['type'], chain['open'], chain['high'], chain['low'],
+                chain['settle'], chain['change'], chain['volume'], chain['open_interest']):
+            values = (symbol, f"{strike:.2f}", option_type[0], price(open_), price(high), price(low),
+                      f"{settle:.2f}", f"{change:+.2f}", str(volume), str(open_interest))
+            rows.append(''.join(f"{value:{align}{width}}" for value, (width, align) in zip(values, widths)).rstrip())
+        return rows
+
+    @staticmethod
+    def _simple_rows(chain: pd.DataFrame) -> List[str]:
+        """Righe SYMBOL STRIKE C/P VOLUME OPEN_INTEREST del bulletin PDF"""
+        return [f"{symbol} {strike:.2f} {option_type[0]} {volume} {open_interest}"
+                for symbol, strike, option_type, volume, open_interest in zip(
+                    chain['option_symbol'], chain['strike'], chain['type'], chain['volume'], chain['open_interest'])]
+
+    def _bulletin_pages(self, date: datetime, sections: List[Tuple[str, pd.DataFrame]],
+                        column_header: str, row_builder) -> List[List[str]]:
+        """Impagina le sezioni: intestazione di pagina, di sezione e di colonne su ogni pagina"""
+        pages = []
+        for header, chain in sections:
+            rows = row_builder(chain)
+            for start in range(0, len(rows), BULLETIN_LINES_PER_PAGE):
+                pages.append(self._page_header(date, len(pages) + 1) + [header, column_header]
+                             + rows[start:start + BULLETIN_LINES_PER_PAGE])
+        return pages
+
+    def _bulletin_sections(self, date: datetime, chains: Dict[str, pd.DataFrame]) -> List[Tuple[str, pd.DataFrame]]:
+        sections = [(f"{FUTURES_SYMBOLS[code]['section_headers'][0]} OPTIONS", chain) for code, chain in chains.items()]
+        # Il prodotto non configurato sta in mezzo: i parser devono saltarlo e riprendere
+        sections.insert(min(1, len(sections)), (FOREIGN_PRODUCT['header'], self.foreign_chain(date)))
+        return sections
+
+    def settlement_text(self, date: datetime, chains: Dict[str, pd.DataFrame]) -> str:
+        """
+        Bulletin di settlement TXT (stl_YYYYMMDD.txt) a colonne fisse
+
+        Args:
+            date: Trade date
+            chains: Catene per sottostante (option_chain)
+
+        Returns:
+            Testo del bulletin
+        """
+        column_header = ''.join(f"{label:{align}{width}}" for label, width, align in SETTLEMENT_COLUMNS).rstrip()
+        pages = self._bulletin_pages(date, self._bulletin_sections(date, chains), column_header, self._settlement_rows)
+        return '\f\n'.join('\n'.join(page) + '\n' for page in pages)
+
+    def bulletin_pdf(self, date: datetime, chains: Dict[str, pd.DataFrame]) -> bytes:
+        """
+        Bulletin PDF semplice: testo Courier, una riga SYMBOL STRIKE C/P VOLUME OI per opzione
+
+        Args:
+            date: Trade date
+            chains: Catene per sottostante (option_chain)
+
+        Returns:
+            Contenuto del file PDF
+        """
+        pages = self._bulletin_pages(date, self._bulletin_sections(date, chains),
+                                     'CONTRACT STRIKE C/P EST.VOL OPEN INT', self._simple_rows)
+        return build_text_pdf(pages)
+
+    def _write_bulletin(self, date: datetime, chains: Dict[str, pd.DataFrame]) -> Optional[str]:
+        if self.bulletin_format == 'none' or not chains:
+            return None
+        filename = self.bulletin_store.bulletin_filename(date.strftime('%Y%m%d'), self.bulletin_format)
+        path = os.path.join(self.output_dir, filename)
+        if self.bulletin_format == 'pdf':
+            write_bytes_atomic(path, self.bulletin_pdf(date, chains), fsync=False)
+        else:
+            write_text_atomic(path, self.settlement_text(date, chains), fsync=False)
+        return self.bulletin_store.add_local(filename, BULLETIN_URL.format(filename=filename))
+
+    # ------------------------------------------------------------------
+    # Sentiment e quote
+
+    def sentiment(self, date: datetime, chains: Dict[str, pd.DataFrame]) -> Dict:
+        """
+        Put/Call Ratio CBOE coerente con i volumi delle catene generate
+
+        Args:
+            date: Trade date
+            chains: Catene per sottostante
+
+        Returns:
+            Record nel formato dei file *_cboe_sentiment.csv
+        """
+        rng = self._day_rng('CBOE', date)
+        volumes = pd.concat(chains.values()) if chains else pd.DataFrame(columns=['type', 'volume'])
+        calls = volumes.loc[volumes['type'] == 'CALL', 'volume'].sum()
+        puts = volumes.loc[volumes['type'] == 'PUT', 'volume'].sum()
+        ratio = float(np.clip(puts / calls if calls else 0.8 + rng.random() * 0.5, 0.3, 3.0))
+        return {
+            'date': date.strftime('%Y-%m-%d'),
+            'total_put_call_ratio': round(ratio, 3),
+            'equity_put_call_ratio': round(ratio * (1 + rng.normal(0, 0.05)), 3),
+            'index_put_call_ratio': round(ratio * (1 + rng.normal(0, 0.08)), 3),
+            'source': 'SYNTHETIC_DATA'
+        }
+
+    def quotes(self, date: datetime, bars: Dict[str, pd.DataFrame]) -> Dict[str, Dict]:
+        """
+        Quote future e CFD (bid/ask) a ogni barra, per alimentare i provider di PriceMapper
+
+        Args:
+            date: Trade date
+            bars: Barre generate per strumento
+
+        Returns:
+            Strumento -> {'future_symbol', 'cfd_symbol', 'basis', 'quotes': [[timestamp, future, bid, ask], ...]}
+        """
+        result = {}
+        for instrument, df in bars.items():
+            if df.empty:
+                continue
+            rng = self._day_rng(f"{instrument}:quotes", date)
+            config = FUTURES_INSTRUMENTS[instrument]
+            tick = config['tick_size']
+            basis = SYNTHETIC_INSTRUMENTS[instrument]['basis']
+            closes = df['close'].to_numpy()
+            mid = closes + basis * (1 + rng.normal(0, 0.2, len(closes)))
+            half_spread = np.maximum(tick, np.abs(closes) * 0.00002)
+            bids = round_to_tick(mid - half_spread, tick)
+            asks = round_to_tick(mid + half_spread, tick)
+            result[instrument] = {
+                'future_symbol': config['finnhub_symbol'],
+                'cfd_symbol': config['mt5_symbols'][0],
+                'basis': basis,
+                'quotes': [[int(ts), float(future), float(bid), float(ask)] for ts, future, bid, ask in zip(
+                    df['timestamp'], closes, bids, asks)]
+            }
+        return result
+
+    # ------------------------------------------------------------------
+
+    def generate_day(self, date: datetime) -> Dict[str, int]:
+        """
+        Scrive tutti i file di una trade date
+
+        Args:
+            date: Trade date
+
+        Returns:
+            Conteggi {'futures_rows', 'option_rows', 'files'}
+        """
+        date_str = date.strftime('%Y-%m-%d')
+        counts = {'futures_rows': 0, 'option_rows': 0, 'files': 0}
+
+        # Fixture rigenerabili dal seed: scritture atomiche ma senza fsync
+        bars = {instrument: self.futures_bars(instrument, date) for instrument in self.instruments}
+        for instrument, df in bars.items():
+            if df.empty:
+                continue
+            filename = f"{date_str}_{instrument}_intraday_{self.resolution}m.csv"
+            write_csv_atomic(df, os.path.join(self.output_dir, filename), fsync=False, index=False)
+            counts['futures_rows'] += len(df)
+            counts['files'] += 1
+
+        chains = {}
+        for underlying in self.underlyings:
+            if not bars[underlying].empty:
+                chains[underlying] = self.option_chain(underlying, date, float(bars[underlying]['close'].iloc[-1]))
+
+        if chains:
+            options_df = pd.concat(chains.values(), ignore_index=True).reindex(columns=OPTIONS_COLUMNS_ORDER)
+            write_csv_atomic(options_df, os.path.join(self.output_dir, f"{date_str}_cme_options.csv"),
+                             fsync=False, index=False)
+            counts['option_rows'] += len(options_df)
+            counts['files'] += 1
+            if self._write_bulletin(date, chains):
+                counts['files'] += 1
+
+        write_csv_atomic(pd.DataFrame([self.sentiment(date, chains)]),
+                         os.path.join(self.output_dir, f"{date_str}_cboe_sentiment.csv"), fsync=False, index=False)
+        write_json_atomic(os.path.join(self.output_dir, f"{date_str}_synthetic_quotes.json"),
+                          self.quotes(date, bars), fsync=False)
+        counts['files'] += 2
+        return counts
+
+    def generate(self, start: datetime, days: Optional[int] = None, end: Optional[datetime] = None) -> Dict:
+        """
+        Genera la data lake sintetica su un intervallo di trade date
+
+        Args:
+            start: Prima data candidata
+            days: Numero di trade date (default 1 se end non è indicato)
+            end: Ultima data candidata inclusa (alternativa a days)
+
+        Returns:
+            Riepilogo (parametri, date, righe, file, durata), salvato anche in synthetic_manifest.json
+        """
+        dates = trading_dates(start, days if days is not None or end is not None else 1, end)
+        os.makedirs(self.output_dir, exist_ok=True)
+        logger.info("🧪 Generazione dati sintetici: %d trade date, %d strumenti, %d strike x %d scadenze "
+                    "per %s in %s", len(dates), len(self.instruments), self.strikes, self.expiries,
+                    ','.join(self.underlyings) or '-', self.output_dir)
+
+        totals = {'futures_rows': 0, 'option_rows': 0, 'files': 0}
+        started = time.perf_counter()
+        for index, date in enumerate(dates, start=1):
+            for key, value in self.generate_day(date).items():
+                totals[key] += value
+            if index % 20 == 0:
+                logger.info("📈 %d/%d trade date generate", index, len(dates))
+
+        summary = {
+            'seed': self.seed,
+            'start': dates[0].strftime('%Y-%m-%d') if dates else None,
+            'end': dates[-1].strftime('%Y-%m-%d') if dates else None,
+            'trading_days': len(dates),
+            'instruments': self.instruments,
+            'option_underlyings': self.underlyings,
+            'strikes_per_expiry': self.strikes,
+            'expiries': self.expiries,
+            'resolution_minutes': int(self.resolution),
+            'bulletin_format': self.bulletin_format,
+            **totals,
+            'elapsed_seconds': round(time.perf_counter() - started, 3),
+            'generated_at': datetime.now().isoformat()
+        }
+        write_json_atomic(os.path.join(self.output_dir, SYNTHETIC_MANIFEST_FILENAME), summary, indent=2)
+        logger.info("✅ Dati sintetici generati: %d righe futures, %d righe opzioni, %d file in %.1fs",
+                    totals['futures_rows'], totals['option_rows'], totals['files'], summary['elapsed_seconds'])
+        return summary
+
+def _pdf_escape(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+def build_text_pdf(pages: List[List[str]], font_size: float = 8.0, leading: float = 11.0) -> bytes:
+    """
+    PDF minimale con una pagina di testo Courier (font standard, nessun embedding)
+    per ogni lista di righe; i content stream sono compressi come nei bulletin reali
+
+    Args:
+        pages: Righe di testo per pagina
+        font_size: Corpo del testo in punti
+        leading: Interlinea in punti
+
+    Returns:
+        Contenuto del file PDF
+    """
+    width, height, margin = 612, 792, 36
+    page_count = len(pages)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        ("<< /Type /Pages /Kids [" + ' '.join(f"{4 + 2 * i} 0 R" for i in range(page_count))
+         + f"] /Count {page_count} >>").encode('ascii'),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier /Encoding /WinAnsiEncoding >>"
+    ]
+    for index, lines in enumerate(pages):
+        text = '\n'.join(f"({_pdf_escape(line)}) '" for line in lines)
+        content = zlib.compress(
+            f"BT /F1 {font_size:g} Tf {leading:g} TL {margin} {height - margin} Td\n{text}\nET".encode('latin-1'))
+        objects.append((f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {width} {height}] "
+                        f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * index} 0 R >>").encode('ascii'))
+        objects.append(f"<< /Length {len(content)} /Filter /FlateDecode >>\nstream\n".encode('ascii')
+                       + content + b"\nendstream")
+
+    output = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n".encode('ascii') + body + b"\nendobj\n"
+
+    xref_offset = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode('ascii')
+    output += b''.join(f"{offset:010d} 00000 n \n".encode('ascii') for offset in offsets)
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode('ascii')
+    return bytes(output)
+
+def parse_args():
+    """Parsing degli argomenti da linea di comando"""
+    parser = argparse.ArgumentParser(description='Generatore di dati di mercato sintetici per i benchmark offline')
+    parser.add_argument('--profile', choices=list(SIZE_PROFILES), default=DEFAULT_PROFILE,
+                        help='Dimensione predefinita (trade date, strike, scadenze)')
+    parser.add_argument('--start', default=SYNTHETIC_START_DATE, help='Prima data YYYY-MM-DD')
+    parser.add_argument('--days', type=int, help='Numero di trade date (sovrascrive il profilo)')
+    parser.add_argument('--end', help='Ultima data YYYY-MM-DD (alternativa a --days)')
+    parser.add_argument('--strikes', type=int, help='Strike per scadenza (sovrascrive il profilo)')
+    parser.add_argument('--expiries', type=int, help='Scadenze per sottostante (sovrascrive il profilo)')
+    parser.add_argument('--instruments', nargs='+', choices=list(FUTURES_INSTRUMENTS), help='Futures (default: tutti)')
+    parser.add_argument('--resolution', choices=list(TIMEFRAME_CONFIG), default='5', help='Risoluzione barre in minuti')
+    parser.add_argument('--bulletin-format', choices=BULLETIN_FORMATS, default='txt', help='Formato del Daily Bulletin')
+    parser.add_argument('--bulletin-compression', choices=['zstd', 'gzip', 'none'], default=ARCHIVE_COMPRESSION,
+                        help="Compressione dell'archivio bulletin")
+    parser.add_argument('--seed', type=int, default=SYNTHETIC_SEED, help='Seed dei generatori casuali')
+    parser.add_argument('--output-dir', default=SYNTHETIC_DATA_DIR, help='Data lake di destinazione')
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    setup_logging(log_file=None)
+    profile = SIZE_PROFILES[args.profile]
+
+    generator = SyntheticMarketGenerator(
+        output_dir=args.output_dir,
+        seed=args.seed,
+        instruments=args.instruments,
+        strikes=args.strikes or profile['strikes'],
+        expiries=args.expiries or profile['expiries'],
+        resolution=args.resolution,
+        bulletin_format=args.bulletin_format,
+        bulletin_compression=args.bulletin_compression
+    )
+    start_date = datetime.strptime(args.start, '%Y-%m-%d')
+    end_date = datetime.strptime(args.end, '%Y-%m-%d') if args.end else None
+    days = args.days or (None if end_date else profile['days'])
+
+    print(json.dumps(generator.generate(start_date, days, end_date), indent=2))
+    sys.exit(0)
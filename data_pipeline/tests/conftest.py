@@ -0,0 +1,42 @@
+"""
+Fixture condivise dei test della data pipeline: i moduli sono importati come
+dagli script (directory data_pipeline e analytics_engine nel path) e le
+sorgenti remote sono sostituite da server HTTP locali.
+"""
+
+import os
+import sys
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+DATA_PIPELINE_DIR = os.path.join(os.path.dirname(__file__), '..')
+ANALYTICS_ENGINE_DIR = os.path.join(DATA_PIPELINE_DIR, '..', 'analytics_engine')
+
+# Nessuna cache su disco né fallback MT5 implicito nei fetcher creati dai test
+os.environ.setdefault('PIPELINE_HTTP_CACHE', 'off')
+os.environ.setdefault('PIPELINE_MT5_FALLBACK', '0')
+
+sys.path.append(DATA_PIPELINE_DIR)
+sys.path.append(ANALYTICS_ENGINE_DIR)
+
+@pytest.fixture
+def stand_in_server():
+    """Avvia server HTTP locali con l'handler indicato e li ferma a fine test"""
+    servers = []
+
+    def start(handler_class, **attributes):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), handler_class)
+        server.daemon_threads = True
+        for name, value in attributes.items():
+            setattr(server, name, value)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+
+    for server in servers:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,154 @@
+"""
+Acquisizione hedged delle barre (bar_sources) contro stand-in locali
+dell'API Finnhub e del bridge MT5.
+"""
+
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+import fetch_futures_volume
+from bar_sources import FinnhubBarSource, HedgedBarAcquirer, MT5BridgeBarSource
+from pipeline_metrics import PipelineMetrics
+
+FROM_TS = 1_700_000_000
+TO_TS = FROM_TS + 3600
+
+INSTRUMENT = {
+    'name': 'E-mini S&P 500 Future',
+    'finnhub_symbol': 'ES',
+    'category': 'equity_index',
+    'mt5_symbols': ['US500']
+}
+
+def _candles(start: int, count: int = 3) -> dict:
+    timestamps = [start + i * 300 for i in range(count)]
+    return {
+        's': 'ok',
+        't': timestamps,
+        'o': [5000.0] * count,
+        'h': [5001.0] * count,
+        'l': [4999.0] * count,
+        'c': [5000.5] * count,
+        'v': [100] * count
+    }
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    """GET /forex/candle come Finnhub, POST /rates come il bridge MT5"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def _reply(self, status: int, payload: dict):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        symbol = parse_qs(urlsplit(self.path).query)['symbol'][0]
+        server.requests.append(('finnhub', symbol, time.monotonic()))
+        time.sleep(server.finnhub_delay)
+        if server.finnhub_status != 200:
+            self._reply(server.finnhub_status, {'error': 'stand-in failure'})
+        elif server.finnhub_has_data:
+            self._reply(200, _candles(FROM_TS))
+        else:
+            self._reply(200, {'s': 'no_data'})
+
+    def do_POST(self):
+        server = self.server
+        request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        server.requests.append(('mt5', request['symbol'], time.monotonic()))
+        rates = [{'time': t, 'open': 5000.0, 'high': 5001.0, 'low': 4999.0, 'close': 5000.5, 'tick_volume': 7}
+                 for t in _candles(FROM_TS)['t']]
+        self._reply(200, {'rates': rates})
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def sources(stand_in_server, monkeypatch):
+    """Sorgenti reali puntate sugli stand-in; restituisce (server, crea_acquirer)"""
+    def start(finnhub_delay=0.0, finnhub_status=200, finnhub_has_data=True):
+        server, base_url = stand_in_server(_StandInHandler, requests=[], finnhub_delay=finnhub_delay,
+                                           finnhub_status=finnhub_status, finnhub_has_data=finnhub_has_data)
+        monkeypatch.setattr(fetch_futures_volume, 'FINNHUB_BASE_URL', base_url)
+        monkeypatch.setattr(fetch_futures_volume, 'RATE_LIMIT_DELAY', 0)
+
+        metrics = PipelineMetrics('futures')
+        fetcher = fetch_futures_volume.FinnhubDataFetcher(api_key='test', metrics=metrics)
+        # Niente pause tra i tentativi di simbolo a vuoto
+        monkeypatch.setattr(metrics, 'sleep', lambda seconds: None)
+
+        def acquirer(hedge_delay):
+            return HedgedBarAcquirer(FinnhubBarSource(fetcher), MT5BridgeBarSource(base_url, timeout=5),
+                                     hedge_delay=hedge_delay, metrics=metrics)
+
+        return server, metrics, acquirer
+
+    return start
+
+def test_primary_wins_within_budget(sources):
+    server, metrics, acquirer = sources()
+
+    result = acquirer(hedge_delay=2.0).fetch_bars(INSTRUMENT, '5', FROM_TS, TO_TS)
+
+    assert result['symbol_used'] == 'CME:ES'
+    assert result['t'] == _candles(FROM_TS)['t']
+    assert [source for source, _, _ in server.requests] == ['finnhub']
+    assert metrics.counters['hedged_requests'] == 0
+
+def test_hedge_fires_after_delay(sources):
+    server, metrics, acquirer = sources(finnhub_delay=1.5)
+    hedge_delay = 0.3
+
+    start = time.monotonic()
+    result = acquirer(hedge_delay).fetch_bars(INSTRUMENT, '5', FROM_TS, TO_TS)
+    elapsed = time.monotonic() - start
+
+    assert result['symbol_used'] == 'MT5:US500'
+    assert elapsed < 1.5
+
+    mt5_sent = [sent for source, _, sent in server.requests if source == 'mt5']
+    assert len(mt5_sent) == 1
+    assert mt5_sent[0] - start >= hedge_delay
+    assert metrics.counters['hedged_requests'] == 1
+    assert metrics.counters['secondary_source_wins'] == 1
+
+def test_hedge_not_starved_by_concurrent_acquisitions(sources):
+    server, metrics, acquirer = sources(finnhub_delay=1.5)
+    shared = acquirer(hedge_delay=0.2)
+
+    # Più nodi futures sullo stesso fetcher: ogni hedge deve partire entro il budget
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda _: shared.fetch_bars(INSTRUMENT, '5', FROM_TS, TO_TS), range(4)))
+    elapsed = time.monotonic() - start
+
+    assert [r['symbol_used'] for r in results] == ['MT5:US500'] * 4
+    assert elapsed < 1.5
+    assert metrics.counters['hedged_requests'] == 4
+
+@pytest.mark.parametrize('failure', [{'finnhub_has_data': False}, {'finnhub_status': 403}],
+                         ids=['no_data', 'http_error'])
+def test_secondary_used_when_primary_fails(sources, failure):
+    server, metrics, acquirer = sources(**failure)
+    hedge_delay = 5.0
+
+    start = time.monotonic()
+    result = acquirer(hedge_delay).fetch_bars(INSTRUMENT, '5', FROM_TS, TO_TS)
+
+    # La secondaria parte appena la primaria risponde senza dati, senza attendere il budget
+    assert time.monotonic() - start < hedge_delay
+    assert result['symbol_used'] == 'MT5:US500'
+    assert result['v'] == [7, 7, 7]
+    assert {source for source, _, _ in server.requests} == {'finnhub', 'mt5'}
+    assert metrics.counters['hedged_requests'] == 0
+    assert metrics.counters['secondary_source_wins'] == 1
@@ -0,0 +1,197 @@
+"""
+Download riprendibili di BulletinStore contro uno stand-in HTTP locale che
+interrompe le connessioni a metà body.
+"""
+
+import hashlib
+import json
+import os
+import socket
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+import bulletin_store
+from bulletin_store import PART_SUFFIX, BulletinStore
+from http_client import create_session
+
+FILENAME = 'cme_bulletin_20250106.txt'
+CONTENT = b''.join(f"ES OPTION {i:06d} 5000 C 12.50 1200\n".encode('ascii') for i in range(6000))
+
+# Byte inviati prima della disconnessione e byte che restano nel '.part'
+# (solo i blocchi di lettura completati vengono scritti)
+DROP_AFTER = 150_000
+RESUME_OFFSET = DROP_AFTER // bulletin_store.DOWNLOAD_READ_SIZE * bulletin_store.DOWNLOAD_READ_SIZE
+
+class _BulletinHandler(BaseHTTPRequestHandler):
+    """Bulletin statico con ETag, Range opzionale e chiusura della connessione dopo N byte"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        content = server.content
+        range_header = self.headers.get('Range')
+        if_range = self.headers.get('If-Range')
+
+        start = 0
+        if range_header and server.honor_range and (if_range is None or if_range == server.etag):
+            start = int(range_header.split('=')[1].rstrip('-'))
+
+        if start >= len(content):
+            status = 416
+            self.send_response(416)
+            self.send_header('Content-Range', f"bytes */{len(content)}")
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            body = b''
+        else:
+            status = 206 if start else 200
+            body = content[start:]
+            self.send_response(status)
+            if start:
+                self.send_header('Content-Range', f"bytes {start}-{len(content) - 1}/{len(content)}")
+            self.send_header('ETag', server.etag)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+
+        server.requests.append({'range': range_header, 'if_range': if_range, 'status': status})
+
+        drop_after = server.drops.pop(0) if server.drops else None
+        if drop_after is None:
+            self.wfile.write(body)
+            return
+
+        # Connessione persa a metà body
+        self.wfile.write(body[:drop_after])
+        self.wfile.flush()
+        self.close_connection = True
+        self.connection.shutdown(socket.SHUT_RDWR)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def bulletin_server(stand_in_server, monkeypatch):
+    """Stand-in del bulletin CME; restituisce (server, url)"""
+    monkeypatch.setattr(bulletin_store, 'DOWNLOAD_RETRY_BACKOFF', 0)
+
+    def start(content=CONTENT, etag='"v1"', honor_range=True, drops=None):
+        server, base_url = stand_in_server(_BulletinHandler, content=content, etag=etag,
+                                           honor_range=honor_range, drops=list(drops or []), requests=[])
+        return server, f"{base_url}/{FILENAME}"
+
+    return start
+
+@pytest.fixture
+def session():
+    session = create_session(cache=False)
+    yield session
+    session.close()
+
+def _read(path: str) -> bytes:
+    with bulletin_store.open_bulletin(path) as f:
+        return f.read()
+
+def _assert_recorded(store: BulletinStore, content: bytes):
+    entry = store.load_manifest()[FILENAME]
+    assert store.verify(FILENAME, entry)
+    assert entry.get('raw_sha256', entry['sha256']) == hashlib.sha256(content).hexdigest()
+    assert not os.path.exists(os.path.join(store.data_dir, FILENAME + PART_SUFFIX))
+    assert not os.path.exists(os.path.join(store.data_dir, FILENAME + PART_SUFFIX + '.json'))
+
+def test_resume_with_206_after_dropped_connection(tmp_path, bulletin_server, session):
+    server, url = bulletin_server(drops=[DROP_AFTER])
+    store = BulletinStore(str(tmp_path), compression='none')
+
+    path = store.download(session, url, FILENAME)
+
+    assert _read(path) == CONTENT
+    assert server.requests == [
+        {'range': None, 'if_range': None, 'status': 200},
+        {'range': f"bytes={RESUME_OFFSET}-", 'if_range': '"v1"', 'status': 206}
+    ]
+    _assert_recorded(store, CONTENT)
+
+def test_range_ignored_restarts_from_zero(tmp_path, bulletin_server, session):
+    server, url = bulletin_server(honor_range=False, drops=[DROP_AFTER])
+    store = BulletinStore(str(tmp_path), compression='none')
+
+    path = store.download(session, url, FILENAME)
+
+    # Il 200 completo sostituisce il parziale invece di accodarsi
+    assert _read(path) == CONTENT
+    assert [r['status'] for r in server.requests] == [200, 200]
+    assert server.requests[1]['range'] == f"bytes={RESUME_OFFSET}-"
+    _assert_recorded(store, CONTENT)
+
+def test_if_range_mismatch_downloads_new_version(tmp_path, bulletin_server, session, monkeypatch):
+    monkeypatch.setattr(bulletin_store, 'DOWNLOAD_RETRIES', 0)
+    server, url = bulletin_server(drops=[DROP_AFTER])
+    store = BulletinStore(str(tmp_path), compression='none')
+
+    assert store.download(session, url, FILENAME) is None
+
+    # Il bulletin cambia sul server prima della ripresa
+    updated = CONTENT.replace(b'12.50', b'13.75')
+    server.content, server.etag = updated, '"v2"'
+    path = store.download(session, url, FILENAME)
+
+    assert _read(path) == updated
+    assert server.requests[1] == {'range': f"bytes={RESUME_OFFSET}-", 'if_range': '"v1"', 'status': 200}
+    _assert_recorded(store, updated)
+
+def test_416_on_complete_part_finalizes_without_body(tmp_path, bulletin_server, session):
+    server, url = bulletin_server()
+    store = BulletinStore(str(tmp_path), compression='none')
+
+    # Body ricevuto per intero ma processo terminato prima del rename
+    part_path = tmp_path / (FILENAME + PART_SUFFIX)
+    part_path.write_bytes(CONTENT)
+    (tmp_path / (FILENAME + PART_SUFFIX + '.json')).write_text(json.dumps(
+        {'url': url, 'filename': FILENAME, 'etag': '"v1"', 'total': len(CONTENT)}))
+
+    path = store.download(session, url, FILENAME)
+
+    assert _read(path) == CONTENT
+    assert server.requests == [{'range': f"bytes={len(CONTENT)}-", 'if_range': '"v1"', 'status': 416}]
+    _assert_recorded(store, CONTENT)
+
+def test_part_file_resumed_across_runs(tmp_path, bulletin_server, session, monkeypatch):
+    monkeypatch.setattr(bulletin_store, 'DOWNLOAD_RETRIES', 0)
+    server, url = bulletin_server(drops=[DROP_AFTER])
+
+    # Prima esecuzione: nessun retry, resta il '.part' con i suoi metadati
+    assert BulletinStore(str(tmp_path), compression='none').download(session, url, FILENAME) is None
+    assert (tmp_path / (FILENAME + PART_SUFFIX)).stat().st_size == RESUME_OFFSET
+
+    # Seconda esecuzione (nuovo store, nuova sessione): riprende dal '.part'
+    store = BulletinStore(str(tmp_path), compression='none')
+    pending = store.pending_download('20250106')
+    assert pending['url'] == url and pending['etag'] == '"v1"'
+
+    with create_session(cache=False) as next_session:
+        path = store.download(next_session, pending['url'], pending['filename'])
+
+    assert _read(path) == CONTENT
+    assert server.requests[1] == {'range': f"bytes={RESUME_OFFSET}-", 'if_range': '"v1"', 'status': 206}
+    _assert_recorded(store, CONTENT)
+
+def test_corrupt_copy_is_downloaded_again(tmp_path, bulletin_server, session):
+    server, url = bulletin_server()
+    store = BulletinStore(str(tmp_path), compression='gzip')
+
+    path = store.download(session, url, FILENAME)
+    assert store.local_bulletin('20250106') == path
+
+    # Stessa dimensione, contenuto alterato: solo lo SHA-256 lo rileva
+    data = bytearray(open(path, 'rb').read())
+    data[len(data) // 2] ^= 0xFF
+    with open(path, 'wb') as f:
+        f.write(data)
+    assert store.local_bulletin('20250106') is None
+
+    assert store.download(session, url, FILENAME) == path
+    assert _read(path) == CONTENT
+    assert [r['status'] for r in server.requests] == [200, 200]
+    _assert_recorded(store, CONTENT)
@@ -0,0 +1,82 @@
+"""
+Limite di richieste in volo per host della sessione condivisa (http_client)
+contro uno stand-in locale con redirect e risposte 503 + Retry-After.
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+import http_client
+from http_client import create_session
+
+class _LimitHandler(BaseHTTPRequestHandler):
+    """/redirect -> /final sullo stesso host, /busy risponde 503 con Retry-After al primo tentativo"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def _reply(self, status: int, headers=None, body: bytes = b'ok'):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.server.paths.append(self.path)
+        if self.path == '/redirect':
+            self._reply(302, {'Location': '/final'}, b'')
+        elif self.path == '/busy' and self.server.paths.count('/busy') == 1:
+            self._reply(503, {'Retry-After': '1'}, b'')
+        else:
+            self._reply(200)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def single_permit(monkeypatch):
+    """Un solo permesso per 127.0.0.1, semafori ricreati per il test"""
+    monkeypatch.setitem(http_client.HOST_CONCURRENCY_OVERRIDES, '127.0.0.1', 1)
+    monkeypatch.setattr(http_client, '_host_semaphores', {})
+
+def _get_with_deadline(session, url: str, seconds: float = 10):
+    """GET in un thread separato: None se non termina entro il tempo (deadlock)"""
+    result = {}
+    worker = threading.Thread(target=lambda: result.update(response=session.get(url)), daemon=True)
+    worker.start()
+    worker.join(seconds)
+    return result.get('response')
+
+def test_same_host_redirect_does_not_deadlock(stand_in_server, single_permit):
+    server, base_url = stand_in_server(_LimitHandler, paths=[])
+
+    with create_session(cache=False) as session:
+        response = _get_with_deadline(session, f"{base_url}/redirect")
+
+    assert response is not None and response.status_code == 200
+    assert server.paths == ['/redirect', '/final']
+
+def test_retry_backoff_releases_host_permit(stand_in_server, single_permit):
+    server, base_url = stand_in_server(_LimitHandler, paths=[])
+
+    with create_session(cache=False) as session:
+        busy = {}
+        worker = threading.Thread(target=lambda: busy.update(response=session.get(f"{base_url}/busy")))
+        worker.start()
+        while '/busy' not in server.paths:
+            time.sleep(0.01)
+
+        # Durante l'attesa del Retry-After il permesso è libero per le altre richieste
+        start = time.monotonic()
+        other = session.get(f"{base_url}/other")
+        waited = time.monotonic() - start
+        worker.join(10)
+
+    assert other.status_code == 200
+    assert waited < 0.5
+    assert busy['response'].status_code == 200
+    assert server.paths.count('/busy') == 2
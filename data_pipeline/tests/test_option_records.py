@@ -0,0 +1,74 @@
+"""
+Scadenze (dte) dei record estratti dai bulletin e gamma exposure calcolata
+sull'output del parser, non sulla catena del generatore sintetico.
+"""
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fetch_options_data import BULLETIN_PARSER, FUTURES_SYMBOLS
+from gamma_exposure import compute_gamma_exposure
+from option_records import OptionColumnBuffer, days_to_expiry
+from settlement_parser import parse_settlement_file
+from synthetic_data import SyntheticMarketGenerator
+
+TRADE_DATE = datetime(2025, 1, 6)
+DATE_STR = TRADE_DATE.strftime('%Y-%m-%d')
+KEYS = ['underlying', 'option_symbol', 'strike', 'type']
+
+@pytest.fixture(scope='module')
+def chains(tmp_path_factory):
+    """(catena scritta dal generatore, catena estratta dal suo bulletin TXT)"""
+    output_dir = str(tmp_path_factory.mktemp('lake'))
+    generator = SyntheticMarketGenerator(output_dir, seed=7, instruments=['ES', 'NQ'], strikes=40, expiries=3,
+                                         bulletin_format='txt', bulletin_compression='none')
+    generator.generate_day(TRADE_DATE)
+
+    generated = pd.read_csv(f"{output_dir}/{DATE_STR}_cme_options.csv")
+    bulletin = generator.bulletin_store.local_bulletin(TRADE_DATE.strftime('%Y%m%d'))
+    parsed = parse_settlement_file(bulletin, DATE_STR, BULLETIN_PARSER, FUTURES_SYMBOLS)
+    return generated, parsed
+
+def _spots(chain: pd.DataFrame) -> pd.DataFrame:
+    return chain.groupby('underlying', observed=True)['strike'].median().rename('spot').reset_index()
+
+@pytest.mark.parametrize('symbol, expected', [
+    ('ES250117', 11), ('E1A250106', 0), ('ES', None), ('ES5000', None), ('ES250199', None), ('ES250103', None)
+])
+def test_days_to_expiry_from_symbol(symbol, expected):
+    assert days_to_expiry(symbol, DATE_STR) == expected
+
+def test_parser_writes_dte_of_each_contract(chains):
+    generated, parsed = chains
+
+    merged = generated.merge(parsed.astype({'underlying': str, 'option_symbol': str, 'type': str}),
+                             on=KEYS, suffixes=('_generated', '_parsed'))
+
+    assert len(merged) == len(generated) == len(parsed)
+    assert parsed['dte'].notna().all()
+    assert parsed['dte'].nunique() == 3
+    assert (merged['dte_parsed'].astype(int) == merged['dte_generated']).all()
+
+def test_gex_on_parser_output_matches_generated_chain(chains):
+    generated, parsed = chains
+    spots = _spots(generated)
+
+    from_parser = compute_gamma_exposure(parsed.drop(columns=['date']), spots)['by_strike']
+    from_generator = compute_gamma_exposure(generated.drop(columns=['date']), spots)['by_strike']
+
+    assert set(from_parser['underlying'].astype(str)) == {'ES', 'NQ'}
+    assert np.allclose(from_parser['net_gex'], from_generator['net_gex'])
+
+def test_gex_omitted_when_expiry_unknown():
+    # Settlement senza colonna del contratto: il simbolo è il codice prodotto
+    buffer = OptionColumnBuffer().extend([('ES', 'ES', 5000.0, 'CALL', 10, 1200), ('ES', 'ES', 5000.0, 'PUT', 5, 900)])
+    chain = buffer.to_frame(DATE_STR)
+
+    assert chain['dte'].isna().all()
+
+    exposure = compute_gamma_exposure(chain.drop(columns=['date']), pd.DataFrame({'underlying': ['ES'], 'spot': [5000.0]}))
+    assert exposure['summary'].empty
+    assert exposure['by_strike'].empty
@@ -204,12 +204,13 @@ echo @echo off
 echo cd /d "%INSTALL_DIR%"
 echo echo [%%date%% %%time%%] Avvio acquisizione dati
 echo echo.
-echo echo Acquisizione dati opzioni...
-echo python data_pipeline\fetch_options_data.py ^>^> logs\acquisition.log 2^>^&1
-echo echo Pausa per rate limiting...
-echo timeout /t 120 /nobreak ^> nul
-echo echo Acquisizione dati futures...
-echo python data_pipeline\fetch_futures_volume.py ^>^> logs\acquisition.log 2^>^&1
+echo echo Pipeline giornaliera: opzioni, sentiment, futures e livelli strutturali...
+echo python data_pipeline\run_pipeline.py ^>^> logs\acquisition.log 2^>^&1
+echo if errorlevel 1 ^(
+echo     echo Nodi non riusciti, nuovo tentativo tra 5 minuti...
+echo     timeout /t 300 /nobreak ^> nul
+echo     python data_pipeline\run_pipeline.py --retry-failed ^>^> logs\acquisition.log 2^>^&1
+echo ^)
 echo echo [%%date%% %%time%%] Acquisizione completata
 echo echo Controlla i log in: logs\acquisition.log
 echo pause
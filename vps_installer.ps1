@@ -308,14 +308,15 @@ echo.
 REM Carica configurazione
 call config\load_env.bat
 
-echo Acquisizione dati opzioni e sentiment...
-python data_pipeline\fetch_options_data.py >> logs\acquisition.log 2>&1
-
-echo Pausa per rate limiting...
-timeout /t 120 /nobreak > nul
-
-echo Acquisizione dati futures...  
-python data_pipeline\fetch_futures_volume.py >> logs\acquisition.log 2>&1
+echo Pipeline giornaliera: opzioni, sentiment, futures e livelli strutturali...
+python data_pipeline\run_pipeline.py >> logs\acquisition.log 2>&1
+
+REM Solo i nodi falliti vengono rieseguiti
+if errorlevel 1 (
+    echo Nodi non riusciti, nuovo tentativo tra 5 minuti...
+    timeout /t 300 /nobreak > nul
+    python data_pipeline\run_pipeline.py --retry-failed >> logs\acquisition.log 2>&1
+)
 
 echo [%date% %time%] Acquisizione completata
 echo Controlla i log in: logs\acquisition.log